@@ -0,0 +1,3 @@
+# backend/bench/__init__.py
+# Benchmarks: synthetic data (generate), per-route timing against a baseline (harness),
+# replay of captured traffic (replay) and query-plan checks (plans).
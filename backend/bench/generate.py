@@ -0,0 +1,354 @@
+"""
+Deterministic synthetic farm data for benchmarks.
+
+    python -m backend.bench.generate --db sqlite:///bench.db --preset medium --reset
+    python -m backend.bench.generate --db sqlite:///bench.db --preset large --reset
+    python -m backend.bench.generate --db sqlite:///bench.db --animals 20000 --weights 400000
+
+The same seed and scale always produce the same rows: dates are anchored to
+ANCHOR, not today. Rows are written with Core executemany in chunks and with
+explicit primary keys, so stock events and their ledger rows can reference
+each other without reading anything back. Stocktakes are counted against the
+running ledger balance, so their book_stock and variance are what
+stock_reconcile would compute, and some have their variance posted back as
+an adjustment. Dead animals get their deceased/slaughtered history event.
+Camp occupancy and vaccination due dates are derived afterwards by the
+regular services.
+
+The target database must be empty; --reset drops and recreates the schema.
+"""
+import argparse
+import random
+import time
+from dataclasses import asdict, dataclass, fields, replace
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import bindparam, func, insert, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+import backend.models  # noqa: F401  (registers every table on Base.metadata)
+from backend.db import Base, make_engine
+from backend.models.animal import Animal
+from backend.models.camp import Camp
+from backend.models.feed import Feed
+from backend.models.fertiliser import Fertiliser
+from backend.models.fuel import Fuel
+from backend.models.group import Group, GroupMovementEvent
+from backend.models.history import AnimalHistory
+from backend.models.stock_ledger import StockLedger
+from backend.models.vaccination import Vaccination
+from backend.models.vaccine import Vaccine, VaccineWasteEvent
+from backend.models.weight import Weight
+from backend.services.occupancy import rebuild as rebuild_occupancy
+from backend.services.stock import CATEGORIES
+from backend.services.stock_batch import TARGETS
+from backend.services.stock_reconcile import STOCKTAKES
+from backend.services.vaccination_schedule import refresh_due_dates
+from backend.startup import stamp_head
+
+ANCHOR = datetime(2026, 1, 1)
+HISTORY_DAYS = 3 * 365
+CHUNK = 10000
+
+
+@dataclass
+class Scale:
+    camps: int = 60
+    groups: int = 40
+    animals: int = 2000
+    weights: int = 20000
+    vaccines: int = 8
+    vaccinations: int = 6000
+    movements: int = 2000
+    feeds: int = 12
+    fertilisers: int = 6
+    fuels: int = 3
+    stock_events: int = 20000
+    stocktakes: int = 400
+
+
+PRESETS = {
+    "small": Scale(),
+    "medium": Scale(camps=150, groups=120, animals=20000, weights=400000, vaccinations=60000,
+                    movements=20000, stock_events=100000, stocktakes=4000),
+    "large": Scale(camps=400, groups=300, animals=100000, weights=5000000, vaccinations=300000,
+                   movements=100000, stock_events=1000000, stocktakes=20000),
+}
+
+
+class _Writer:
+    """Buffers rows per table and writes them in chunks, tables in first-use order (parents first)."""
+
+    def __init__(self, conn, chunk: int = CHUNK):
+        self.conn = conn
+        self.chunk = chunk
+        self.buffers: Dict = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, model, row: dict) -> None:
+        buf = self.buffers.setdefault(model, [])
+        buf.append(row)
+        if len(buf) >= self.chunk:
+            self.flush()
+
+    def flush(self) -> None:
+        for model, rows in self.buffers.items():
+            if rows:
+                self.conn.execute(insert(model), rows)
+                name = model.__tablename__
+                self.counts[name] = self.counts.get(name, 0) + len(rows)
+                rows.clear()
+
+
+def _spread(total: int, n: int, i: int) -> int:
+    """Share of `total` for the i-th of `n` buckets (the first total % n get one extra)."""
+    return total // n + (1 if i < total % n else 0) if n else 0
+
+
+def _when(rng: random.Random, days_back: float = HISTORY_DAYS) -> datetime:
+    return ANCHOR - timedelta(days=rng.uniform(0, days_back))
+
+
+def _movements(rng: random.Random, scale: Scale) -> List[dict]:
+    rows = []
+    mid = 0
+    for g in range(1, scale.groups + 1):
+        camp = rng.randint(1, scale.camps)
+        for at in sorted(_when(rng) for _ in range(_spread(scale.movements, scale.groups, g - 1))):
+            mid += 1
+            to = rng.randint(1, scale.camps)
+            rows.append({"id": mid, "group_id": g, "from_camp_id": camp, "to_camp_id": to,
+                         "date": at, "reason": "rotation"})
+            camp = to
+    return rows
+
+
+def _write_herd(w: _Writer, rng: random.Random, scale: Scale) -> List[int]:
+    """Camps, groups, movements, animals and their weights. Returns each animal's group (index = id - 1)."""
+    for c in range(1, scale.camps + 1):
+        w.add(Camp, {
+            "id": c, "name": f"Camp {c:03d}", "area_ha": round(rng.uniform(2, 40), 1),
+            "greenfeed": rng.random() < 0.2, "grazed_status": rng.choice(["Y", "N", "in_progress"]),
+            "greenfeed_planting_date": (ANCHOR - timedelta(days=rng.randint(0, 200))).date(),
+            "fertilised_date": (ANCHOR - timedelta(days=rng.randint(0, 365))).date(),
+            "grazed_out_date": (ANCHOR - timedelta(days=rng.randint(0, 90))).date(),
+        })
+    moves = _movements(rng, scale)
+    final_camp = {m["group_id"]: m["to_camp_id"] for m in moves}
+    for g in range(1, scale.groups + 1):
+        w.add(Group, {"id": g, "name": f"Group {g:03d}", "camp_id": final_camp.get(g, rng.randint(1, scale.camps)),
+                      "created_at": ANCHOR, "updated_at": ANCHOR})
+    w.flush()
+    for m in moves:
+        w.add(GroupMovementEvent, m)
+
+    animal_group = []
+    weight_id = 0
+    history_id = 0
+    for a in range(1, scale.animals + 1):
+        group = rng.randint(1, scale.groups) if rng.random() < 0.9 else None
+        born = (ANCHOR - timedelta(days=rng.randint(30, 3000))).date()
+        sex = rng.choice("FFM")
+        age_days = (ANCHOR.date() - born).days
+        calved = sex == "F" and age_days > 730 and rng.random() < 0.6
+        n_calves = rng.randint(1, 4) if calved else 0
+
+        # weights from birth to ANCHOR on a noisy growth curve
+        n_w = _spread(scale.weights, scale.animals, a - 1)
+        readings = []
+        for k in range(n_w):
+            day = born + timedelta(days=int(age_days * (k + 1) / (n_w + 1)))
+            age = (day - born).days
+            readings.append((day, round(35 + 560 * (1 - 0.997 ** age) + rng.gauss(0, 8), 1)))
+
+        deceased = rng.random() < 0.05
+        killed = deceased and rng.random() < 0.6
+        death_reason = ("Sold for slaughter" if killed else rng.choice(["Illness", "Injury", "Predator"])) if deceased else None
+
+        animal_group.append(group)
+        w.add(Animal, {
+            "id": a, "tag_number": f"A{a:07d}", "sex": sex, "birth_date": born,
+            "group_id": group, "camp_id": final_camp.get(group) if group else rng.randint(1, scale.camps),
+            "deceased": deceased, "killed": killed, "death_reason": death_reason,
+            "has_calved": calved, "calves_count": n_calves,
+            "calves_tags": [f"A{rng.randint(1, scale.animals):07d}" for _ in range(n_calves)],
+            "current_weight": int(readings[-1][1]) if readings else None,
+            "weight_date": readings[-1][0] if readings else None,
+            "created_at": ANCHOR, "updated_at": ANCHOR,
+        })
+        for day, kg in readings:
+            weight_id += 1
+            w.add(Weight, {"id": weight_id, "animal_id": a, "weight": kg, "date": day})
+        if deceased:
+            history_id += 1
+            last = readings[-1][0] if readings else born
+            w.add(AnimalHistory, {
+                "id": history_id, "animal_id": a, "event_type": "slaughtered" if killed else "deceased",
+                "event_date": last + timedelta(days=rng.randint(1, max((ANCHOR.date() - last).days, 1))),
+                "reason": death_reason,
+            })
+    w.flush()
+    return animal_group
+
+
+def _write_vaccinations(w: _Writer, rng: random.Random, scale: Scale, animal_group: List[int]) -> None:
+    for v in range(1, scale.vaccines + 1):
+        w.add(Vaccine, {
+            "id": v, "name": f"Vaccine {v:02d}", "default_dose": rng.choice([1.0, 2.0, 5.0]), "unit": "ml",
+            "methods": '["SC", "IM"]', "current_stock": 0.0,
+            "first_dose_age_days": rng.choice([60, 90, 180]), "booster_interval_days": rng.choice([180, 365]),
+        })
+    w.flush()
+    for i in range(1, scale.vaccinations + 1):
+        a = rng.randint(1, scale.animals)
+        group = animal_group[a - 1]
+        w.add(Vaccination, {
+            "id": i, "animal_id": a, "vaccine_id": rng.randint(1, scale.vaccines),
+            "group_id": group if rng.random() < 0.7 else None, "date": _when(rng).date(),
+            "dose": 2.0, "method": "SC", "source": "group" if group else "manual", "created_at": ANCHOR,
+        })
+    w.flush()
+
+
+def _write_stock(w: _Writer, rng: random.Random, scale: Scale) -> Dict[tuple, float]:
+    """
+    Stock items, their in/out/waste events and stocktakes, with matching ledger
+    rows. Returns final balances.
+    """
+    for f in range(1, scale.feeds + 1):
+        w.add(Feed, {"id": f, "name": f"Feed {f:02d}", "unit": "kg", "current_stock": 0.0})
+    for f in range(1, scale.fertilisers + 1):
+        w.add(Fertiliser, {"id": f, "name": f"Fertiliser {f:02d}", "unit": "kg", "current_stock": 0.0})
+    for f in range(1, scale.fuels + 1):
+        w.add(Fuel, {"id": f, "type": f"Fuel {f:02d}", "unit": "L", "current_stock": 0.0})
+    w.flush()
+
+    items = (
+        [("vaccine", i) for i in range(1, scale.vaccines + 1)]
+        + [("feed", i) for i in range(1, scale.feeds + 1)]
+        + [("fertiliser", i) for i in range(1, scale.fertilisers + 1)]
+        + [("fuel", i) for i in range(1, scale.fuels + 1)]
+    )
+    next_id: Dict = {}
+    ledger_id = 0
+    balances = {}
+    for n, (cat, item_id) in enumerate(items):
+        balance = 0.0
+        n_events = _spread(scale.stock_events, len(items), n)
+        counted = set(rng.sample(range(n_events), min(_spread(scale.stocktakes, len(items), n), n_events)))
+        for k, at in enumerate(sorted(_when(rng) for _ in range(n_events))):
+            kind = "in" if balance <= 0 or rng.random() < 0.3 else "out"
+            if kind == "out" and cat == "vaccine" and rng.random() < 0.1:
+                kind = "waste"
+            amount = round(rng.uniform(50, 500), 1) if kind == "in" else round(min(balance, rng.uniform(1, 60)), 1)
+            if amount <= 0:
+                continue
+            model, item_col, ref_type, sign = TARGETS[(cat, kind)]
+            eid = next_id[model] = next_id.get(model, 0) + 1
+            row = {"id": eid, item_col: item_id, "amount": amount, "date": at, "reason": "bench"}
+            if model is not VaccineWasteEvent:
+                row["event_type"] = kind
+            w.add(model, row)
+            balance = round(balance + sign * amount, 6)
+            ledger_id += 1
+            w.add(StockLedger, {
+                "id": ledger_id, "category": cat, "item_id": item_id, "delta": sign * amount,
+                "reason": "bench", "ref_type": ref_type, "ref_id": eid, "event_date": at,
+                "created_at": at, "balance_after": balance,
+            })
+            if k in counted:
+                # counted right after this movement: the book value is the running balance
+                model, item_col = STOCKTAKES[cat]
+                sid = next_id[model] = next_id.get(model, 0) + 1
+                recorded = max(round(balance + rng.gauss(0, 2), 1), 0.0)
+                variance = round(recorded - balance, 6)
+                posted = rng.random() < 0.5
+                w.add(model, {
+                    "id": sid, item_col: item_id, "recorded_stock": recorded, "date": at, "notes": "bench",
+                    "book_stock": balance, "variance": variance, "adjustment_posted": posted,
+                })
+                if posted and variance:
+                    balance = recorded
+                    ledger_id += 1
+                    w.add(StockLedger, {
+                        "id": ledger_id, "category": cat, "item_id": item_id, "delta": variance,
+                        "reason": "Stocktake adjustment", "ref_type": f"{cat}_stocktake", "ref_id": sid,
+                        "event_date": at, "created_at": at, "balance_after": balance,
+                    })
+        balances[(cat, item_id)] = balance
+    w.flush()
+    return balances
+
+
+def _reset_sequences(conn) -> None:
+    """Explicit ids leave Postgres sequences behind; move them past the generated rows."""
+    for table in Base.metadata.sorted_tables:
+        if "id" in table.c and table.c.id.primary_key:
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table.name}), 0) + 1, false)"
+            ))
+
+
+def generate(engine: Engine, scale: Scale, *, seed: int = 42, reset: bool = False) -> Dict[str, int]:
+    """Fill an empty database at `scale`; returns rows written per table."""
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        stamp_head(conn)   # the models are the schema at the migrations' head
+    with engine.connect() as conn:
+        if conn.execute(select(func.count()).select_from(Animal)).scalar():
+            raise SystemExit("database is not empty; use --reset to start from scratch")
+
+    rng = random.Random(seed)
+    with engine.begin() as conn:
+        w = _Writer(conn)
+        animal_group = _write_herd(w, rng, scale)
+        _write_vaccinations(w, rng, scale, animal_group)
+        balances = _write_stock(w, rng, scale)
+        for cat, model in CATEGORIES.items():
+            rows = [{"item": i, "stock": b} for (c, i), b in balances.items() if c == cat]
+            if rows:
+                conn.execute(
+                    update(model.__table__).where(model.__table__.c.id == bindparam("item"))
+                    .values(current_stock=bindparam("stock")),
+                    rows,
+                )
+        if conn.dialect.name == "postgresql":
+            _reset_sequences(conn)
+        counts = dict(w.counts)
+
+    with Session(engine) as db:
+        counts["camp_occupancy"] = rebuild_occupancy(db)
+        counts["vaccination_due"] = refresh_due_dates(db)
+        db.commit()
+    return counts
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Fill a database with deterministic synthetic farm data.")
+    parser.add_argument("--db", required=True, help="database URL, e.g. sqlite:///bench.db")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    for f in fields(Scale):
+        parser.add_argument(f"--{f.name.replace('_', '-')}", type=int, help=f"override the preset's {f.name}")
+    args = parser.parse_args(argv)
+
+    overrides = {f.name: getattr(args, f.name) for f in fields(Scale) if getattr(args, f.name) is not None}
+    scale = replace(PRESETS[args.preset], **overrides)
+    engine = make_engine(args.db)
+    started = time.perf_counter()
+    counts = generate(engine, scale, seed=args.seed, reset=args.reset)
+    engine.dispose()
+    print(f"scale: {asdict(scale)}")
+    for table, n in sorted(counts.items()):
+        print(f"  {table:28s} {n:>10d}")
+    print(f"done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
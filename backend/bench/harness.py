@@ -0,0 +1,219 @@
+"""
+Per-route API benchmark.
+
+    python -m backend.bench.harness --db sqlite:///bench.db --save bench/baseline.json
+    python -m backend.bench.harness --db sqlite:///bench.db --compare bench/baseline.json --budget 1.25
+
+Runs the API in-process (backend.main with API_ONLY=1) through TestClient
+against a database filled by backend.bench.generate. Each route is called
+once to warm up and then --repeat times. Per route it records p50/p95/mean
+latency and the SQL statement count from the Server-Timing header. The
+process peak RSS is recorded once for the whole run (it is a high-water mark,
+so a per-route reading would only repeat the heaviest route so far); it is
+not available on Windows.
+
+With --compare the run fails (exit 1) when a route's p95 exceeds
+baseline p95 * budget + --slack-ms, it runs more SQL statements than in the
+baseline, or the run's peak RSS exceeds the baseline's * --rss-budget.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# (name, path); {animal}, {group}, {camp} and {feed} are filled in from the database
+ROUTES: List[Tuple[str, str]] = [
+    ("animals.list", "/api/animals/"),
+    ("animals.history", "/api/animals/{animal}/history"),
+    ("groups.list", "/api/groups/"),
+    ("groups.weight_history", "/api/groups/{group}/weight-history"),
+    ("camps.list", "/api/camps/"),
+    ("camps.occupancy", "/api/camps/{camp}/occupancy"),
+    ("camps.rotation_plan", "/api/camps/rotation-plan"),
+    ("stats.herd_summary", "/api/stats/herd-summary"),
+    ("stats.camps_summary", "/api/stats/camps-summary"),
+    ("history.all", "/api/history/"),
+    ("vaccinations.list", "/api/vaccinations/?group_id={group}"),
+    ("vaccinations.due", "/api/vaccinations/due?within_days=30"),
+    ("vaccinations.coverage", "/api/vaccinations/coverage"),
+    ("weights.animal", "/api/weights/?animal_id={animal}"),
+    ("weights.group", "/api/weights/?group_id={group}&bucket=month"),
+    ("analytics.growth", "/api/analytics/growth?group_id={group}"),
+    ("stocks.vaccines", "/api/stocks/vaccines"),
+    ("stocks.feeds", "/api/stocks/feeds"),
+    ("stocks.ledger", "/api/stocks/feeds/{feed}/ledger"),
+    ("stocks.balances", "/api/stocks/balances?as_of=2025-06-30"),
+]
+
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _ids(db) -> Dict[str, int]:
+    from sqlalchemy import func, select
+    from backend.models.animal import Animal
+    from backend.models.camp import Camp
+    from backend.models.feed import Feed
+    from backend.models.group import Group
+
+    # the busiest group/camp and an animal in that group, so the routes do real work
+    group = db.execute(
+        select(Animal.group_id).where(Animal.group_id.isnot(None))
+        .group_by(Animal.group_id).order_by(func.count().desc()).limit(1)
+    ).scalar() or db.execute(select(func.min(Group.id))).scalar()
+    animal = db.execute(select(func.min(Animal.id)).where(Animal.group_id == group)).scalar() \
+        or db.execute(select(func.min(Animal.id))).scalar()
+    return {
+        "animal": animal or 1,
+        "group": group or 1,
+        "camp": db.execute(select(Group.camp_id).where(Group.id == group)).scalar()
+        or db.execute(select(func.min(Camp.id))).scalar() or 1,
+        "feed": db.execute(select(func.min(Feed.id))).scalar() or 1,
+    }
+
+
+def run(repeat: int = 20, only: Optional[List[str]] = None) -> Dict:
+    """Time every route in ROUTES against the database in DATABASE_URL."""
+    from fastapi.testclient import TestClient
+    from backend.db import SessionLocal
+    from backend.main import app
+
+    with SessionLocal() as db:
+        ids = _ids(db)
+
+    results = {}
+    with TestClient(app) as client:
+        for name, template in ROUTES:
+            if only and not any(name.startswith(o) for o in only):
+                continue
+            path = template.format(**ids)
+            warm = client.get(path)
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                r = client.get(path)
+                timings.append((time.perf_counter() - started) * 1000)
+            m = _QUERIES.search(r.headers.get("server-timing", ""))
+            results[name] = {
+                "path": path,
+                "status": warm.status_code,
+                "p50_ms": round(_percentile(timings, 50), 2),
+                "p95_ms": round(_percentile(timings, 95), 2),
+                "mean_ms": round(statistics.fmean(timings), 2),
+                "statements": int(m.group(1)) if m else None,
+                "bytes": len(r.content),
+            }
+    return results
+
+
+def compare(results: Dict, baseline: Dict, *, budget: float, slack_ms: float,
+            peak_rss_mb: Optional[float] = None, rss_budget: float = 1.25) -> List[str]:
+    """Regressions of `results` (and the run's `peak_rss_mb`) against `baseline`, as readable lines."""
+    problems = []
+    base_rss = baseline.get("peak_rss_mb")
+    if peak_rss_mb is not None and base_rss and peak_rss_mb > base_rss * rss_budget:
+        problems.append(f"peak RSS {peak_rss_mb:.1f} MB > {base_rss * rss_budget:.1f} MB (baseline {base_rss:.1f} MB)")
+    for name, cur in results.items():
+        base = baseline.get("routes", {}).get(name)
+        if base is None:
+            continue
+        limit = base["p95_ms"] * budget + slack_ms
+        if cur["p95_ms"] > limit:
+            problems.append(f"{name}: p95 {cur['p95_ms']:.1f} ms > {limit:.1f} ms (baseline {base['p95_ms']:.1f} ms)")
+        if base.get("statements") is not None and cur["statements"] is not None \
+                and cur["statements"] > base["statements"]:
+            problems.append(f"{name}: {cur['statements']} SQL statements > baseline {base['statements']}")
+        if cur["status"] != base.get("status"):
+            problems.append(f"{name}: status {cur['status']} (baseline {base.get('status')})")
+    return problems
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the API routes against a generated database.")
+    parser.add_argument("--db", help="database URL (default: DATABASE_URL)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--only", action="append", help="route name prefix to run (repeatable)")
+    parser.add_argument("--save", help="write results as a JSON baseline to this file")
+    parser.add_argument("--compare", help="baseline JSON to check against")
+    parser.add_argument("--budget", type=float, default=1.25, help="allowed p95 ratio to the baseline")
+    parser.add_argument("--slack-ms", type=float, default=2.0, help="absolute p95 allowance on top of the ratio")
+    parser.add_argument("--rss-budget", type=float, default=1.25, help="allowed peak RSS ratio to the baseline")
+    args = parser.parse_args(argv)
+
+    # must be set before backend.db / backend.main are imported
+    if args.db:
+        os.environ["DATABASE_URL"] = args.db
+    os.environ.setdefault("API_ONLY", "1")
+    os.environ.setdefault("SQL_WARN_STATEMENTS", str(10 ** 9))   # the report shows the counts
+    os.environ.setdefault("SQL_WARN_REPEATS", str(10 ** 9))
+    save = os.path.abspath(args.save) if args.save else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+    os.chdir(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+    results = run(repeat=args.repeat, only=args.only)
+    peak_rss_mb = _peak_rss_mb()
+
+    print(f"{'route':26s} {'p50 ms':>9s} {'p95 ms':>9s} {'stmts':>6s} {'status':>6s}")
+    for name, r in results.items():
+        print(f"{name:26s} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} {str(r['statements']):>6s} {r['status']:6d}")
+    if peak_rss_mb is not None:
+        print(f"peak RSS {peak_rss_mb:.1f} MB")
+
+    if save:
+        import sqlalchemy
+        os.makedirs(os.path.dirname(save), exist_ok=True)
+        with open(save, "w") as f:
+            json.dump({
+                "meta": {
+                    "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "python": platform.python_version(),
+                    "sqlalchemy": sqlalchemy.__version__,
+                    "platform": platform.platform(),
+                    "database": os.environ.get("DATABASE_URL"),
+                    "repeat": args.repeat,
+                },
+                "peak_rss_mb": peak_rss_mb,
+                "routes": results,
+            }, f, indent=2)
+        print(f"saved {save}")
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        problems = compare(results, baseline, budget=args.budget, slack_ms=args.slack_ms,
+                           peak_rss_mb=peak_rss_mb, rss_budget=args.rss_budget)
+        if problems:
+            print("\nREGRESSIONS:")
+            for p in problems:
+                print("  " + p)
+            raise SystemExit(1)
+        print(f"\nno regressions against {baseline_path} (budget x{args.budget} + {args.slack_ms} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+Query-plan regression check.
+
+    python -m backend.bench.generate --db sqlite:///bench.db --preset small --reset
+    python -m backend.bench.plans --db sqlite:///bench.db
+    python -m backend.bench.plans --db sqlite:///bench.db --writes
+
+Makes every call in CALLS once - the benchmark's ROUTES, the filtered
+variants of the read routes and, with --writes, every POST/PATCH/PUT/DELETE
+route - records each distinct statement the call runs and asks the database
+for its plan (EXPLAIN QUERY PLAN on SQLite, EXPLAIN on Postgres). A statement
+that reads a whole table - "SCAN <table>" without an index on SQLite, "Seq
+Scan on <table>" on Postgres - fails the check (exit 1) unless the (call,
+table) pair is listed in ALLOWED_SCANS, i.e. the route really does need every
+row. A call that does not succeed fails too: its queries were not all planned.
+
+Run it on a database built by backend.bench.generate and migrated to head,
+so the routes have rows to work on and the planner sees the real indexes.
+The write calls change that database (they add stock movements and
+vaccinations, move a group and create, slaughter and delete rows of their
+own), so only use --writes on a throwaway copy. The test suite
+(backend/tests/test_query_plans.py) runs every call on a freshly generated
+database and also fails when an API route has no call here.
+"""
+import argparse
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.bench.harness import ROUTES, _ids
+
+
+@dataclass
+class Call:
+    name: str
+    path: str                                   # str.format-ed with the ids
+    method: str = "GET"
+    json: Any = None                            # "{name}" strings become that id
+    files: Optional[Dict[str, Tuple[str, str]]] = None   # form field -> (filename, content)
+    data: Optional[Dict[str, str]] = None       # other form fields
+    save: Optional[str] = None                  # keep the response's "id" under this name
+
+
+DAY = "2025-12-01"
+_BOUNDARY = {"type": "Polygon", "coordinates": [[
+    [30.0, -29.0], [30.01, -29.0], [30.01, -28.99], [30.0, -28.99], [30.0, -29.0],
+]]}
+
+# Read calls on top of the benchmark's routes: the filters each list route accepts
+READS: List[Call] = [Call(name, path) for name, path in ROUTES] + [
+    Call("animals.by_calf_tag", "/api/animals/?calf_tag={tag}"),
+    Call("camps.occupancy_range", "/api/camps/{camp}/occupancy?from=2024-01-01&to=2025-12-31"),
+    Call("camps.rotation_series", "/api/camps/rotation-plan?days=30&include_series=true"),
+    Call("stats.stocks_summary", "/api/stats/stocks-summary"),
+    Call("vaccinations.by_vaccine", "/api/vaccinations/?vaccine_id={vaccine}"),
+    Call("vaccinations.by_animal", "/api/vaccinations/?animal_id={animal}"),
+    Call("vaccinations.by_date", "/api/vaccinations/?date_from=2025-01-01&date_to=2025-03-31"),
+    Call("vaccinations.by_source", "/api/vaccinations/?source=group"),
+    Call("vaccinations.search", "/api/vaccinations/?q={tag}"),
+    Call("vaccinations.due_filtered", "/api/vaccinations/due?within_days=365&vaccine_id={vaccine}&group_id={group}"),
+    Call("vaccinations.coverage_group", "/api/vaccinations/coverage?group_id={group}&format=csv"),
+    Call("vaccinations.coverage_dates", "/api/vaccinations/coverage?vaccine_ids={vaccine}&mode=dates"),
+    Call("vaccines.list", "/api/vaccines/"),
+    Call("weights.tag", "/api/weights/?tag_number={tag}"),
+    Call("weights.animal_bucketed", "/api/weights/?animal_id={animal}&bucket=week"),
+    Call("weights.animal_points", "/api/weights/?animal_id={animal}&points=20"),
+    Call("weights.group_points", "/api/weights/?group_id={group}&points=50"),
+    Call("analytics.growth_camp", "/api/analytics/growth?camp_id={camp}&target_date=2026-06-30"),
+    Call("analytics.growth_herd", "/api/analytics/growth?model=gompertz"),
+    Call("stocks.fertilisers", "/api/stocks/fertilisers"),
+    Call("stocks.fuels", "/api/stocks/fuels"),
+    Call("stocks.recipes", "/api/stocks/feeds/recipes"),
+    Call("stocks.ledger_vaccine", "/api/stocks/vaccines/{vaccine}/ledger"),
+    Call("stocks.ledger_fertiliser", "/api/stocks/fertilisers/{fertiliser}/ledger"),
+    Call("stocks.ledger_fuel", "/api/stocks/fuels/{fuel}/ledger"),
+    Call("stocks.ledger_page", "/api/stocks/feeds/{feed}/ledger?limit=20&before_id={ledger}"),
+    Call("stocks.balances_category", "/api/stocks/balances?as_of=2025-06-30&category=feeds"),
+]
+
+
+def _stock_calls(category: str, plural: str, fields: dict) -> List[Call]:
+    """Create/update an item of one stock category; record an event and a stocktake on an existing one."""
+    item = "{%s}" % category
+    return [
+        Call(f"stocks.{category}_create", f"/api/stocks/{plural}", "POST", fields, save=f"new_{category}"),
+        Call(f"stocks.{category}_update", f"/api/stocks/{plural}/{{new_{category}}}", "PATCH",
+             dict(fields, notes="plan check")),
+        Call(f"stocks.{category}_event", f"/api/stocks/{plural}/{item}/event?event_type=in&amount=100&date={DAY}",
+             "POST"),
+        Call(f"stocks.{category}_stocktake", f"/api/stocks/{plural}/{item}/stocktake", "POST",
+             {f"{category}_id": item, "recorded_stock": 80, "date": DAY}),
+    ]
+
+
+# Every write route, in an order that works on a generated database: the
+# deletes at the end remove what the calls before them created. Reads that
+# need a row created here come in between.
+WRITES: List[Call] = [
+    Call("animals.create", "/api/animals/", "POST",
+         {"tag_number": "PLAN-0001", "sex": "F", "birth_date": "2025-03-01", "camp_id": "{camp}", "group_id": "{group}"},
+         save="new_animal"),
+    Call("animals.update", "/api/animals/{new_animal}", "PATCH",
+         {"tag_number": "PLAN-0001", "sex": "F", "camp_id": "{camp}", "group_id": "{group}", "notes": "plan check"}),
+    Call("animals.upload_photo", "/api/animals/{new_animal}/upload-photo", "POST",
+         files={"file": ("plan.jpg", "not really a jpeg")}),
+    Call("animals.deceased", "/api/animals/{spare}/deceased", "POST", {"killed": False, "reason": "plan check"}),
+    Call("weights.record", "/api/weights/", "POST", {"animal_id": "{animal}", "weight": 180.5, "date": DAY}),
+    Call("weights.bulk", "/api/weights/bulk", "POST",
+         files={"file": ("session.csv", "tag,weight\n{tag},310\nNO-SUCH-TAG,200\n")}, data={"date": "2025-12-02"}),
+    Call("camps.create", "/api/camps/", "POST", {"name": "Plan camp", "area_ha": 12.5}, save="new_camp"),
+    Call("camps.update", "/api/camps/{new_camp}", "PATCH", {"name": "Plan camp", "area_ha": 13, "grazed_status": "G"}),
+    Call("camps.set_boundary", "/api/camps/{new_camp}/boundary", "PUT", _BOUNDARY),
+    Call("camps.boundary", "/api/camps/{new_camp}/boundary"),   # generated camps have no boundary
+    Call("camps.locate", "/api/camps/locate", "POST", {"points": [[30.005, -28.995], [31.0, -28.0]]}),
+    Call("groups.create", "/api/groups/", "POST",
+         {"name": "Plan group", "camp_id": "{new_camp}", "animal_ids": ["{new_animal}"]}, save="new_group"),
+    Call("groups.move", "/api/groups/move", "POST",
+         {"group_id": "{new_group}", "from_camp_id": "{new_camp}", "to_camp_id": "{camp}", "date": "2025-12-03"}),
+    Call("groups.move_camp", "/api/groups/{group}/move-camp", "POST", {"camp_id": "{camp2}"}),
+    Call("groups.update", "/api/groups/{new_group}", "PATCH",
+         {"name": "Plan group", "camp_id": "{camp}", "animal_ids": ["{new_animal}"], "notes": "plan check"}),
+    Call("camps.rebuild_occupancy", "/api/camps/occupancy/rebuild", "POST"),
+    Call("vaccinations.animal", "/api/vaccinations/animal", "POST",
+         {"animal_id": "{animal}", "vaccine_id": "{vaccine}", "date": "2025-12-04", "dose": 2}),
+    Call("vaccinations.group", "/api/vaccinations/group", "POST",
+         {"group_id": "{group}", "vaccine_id": "{vaccine}", "date": "2025-12-05", "dose_per_animal": 2}),
+    Call("vaccinations.refresh_due", "/api/vaccinations/due/refresh", "POST"),
+    Call("vaccinations.delete", "/api/vaccinations/{vaccination}", "DELETE"),
+    Call("stocks.vaccine_create", "/api/stocks/vaccines", "POST",
+         {"name": "Plan vaccine", "default_dose": 2, "unit": "ml", "methods": ["SC"], "current_stock": 100,
+          "booster_interval_days": 365},
+         save="new_vaccine"),
+    Call("stocks.vaccine_update", "/api/stocks/vaccines/{new_vaccine}", "PATCH", {"booster_interval_days": 180}),
+    Call("stocks.vaccine_event", "/api/stocks/vaccines/{vaccine}/event", "POST",
+         {"vaccine_id": "{vaccine}", "event_type": "in", "amount": 50, "date": DAY}),
+    Call("stocks.vaccine_waste", "/api/stocks/vaccines/waste", "POST",
+         {"vaccine_id": "{vaccine}", "amount": 1, "date": DAY, "reason": "plan check"}),
+    Call("stocks.vaccine_stocktake", "/api/stocks/vaccines/{vaccine}/stocktake", "POST",
+         {"vaccine_id": "{vaccine}", "recorded_stock": 40, "date": DAY}),
+    *_stock_calls("feed", "feeds", {"name": "Plan mix", "unit": "kg"}),
+    *_stock_calls("fertiliser", "fertilisers", {"name": "Plan fertiliser", "unit": "kg"}),
+    *_stock_calls("fuel", "fuels", {"type": "Plan diesel", "unit": "l"}),
+    Call("stocks.feed_mix", "/api/stocks/feeds/mix", "POST",
+         {"components": {"{feed}": 10}, "output_feed_id": "{new_feed}", "output_amount": 10, "date": "2025-12-08"}),
+    Call("stocks.recipe_create", "/api/stocks/feeds/recipes", "POST",
+         {"name": "Plan recipe", "output_feed_id": "{new_feed}", "output_amount": 10,
+          "components": [{"feed_id": "{feed}", "amount": 10}]},
+         save="recipe"),
+    Call("stocks.recipe_execute", "/api/stocks/feeds/recipes/execute", "POST",
+         [{"recipe_id": "{recipe}", "batches": 2, "date": "2025-12-09"}]),
+    Call("stocks.events_batch", "/api/stocks/events/batch", "POST", [
+        {"category": "feed", "item_id": "{feed}", "event_type": "out", "amount": 5, "date": "2025-12-10"},
+        {"category": "vaccine", "item_id": "{vaccine}", "event_type": "waste", "amount": 1, "date": "2025-12-10"},
+        {"category": "fuel", "item_id": "{fuel}", "event_type": "in", "amount": 20, "date": "2025-12-10"},
+    ]),
+    Call("stocks.reconcile", "/api/stocks/reconcile", "POST",
+         {"category": "feeds", "since": "2025-01-01T00:00:00", "post_adjustments": True}),
+    Call("stocks.checkpoints", "/api/stocks/checkpoints?period=month", "POST"),
+    Call("stocks.recipe_delete", "/api/stocks/feeds/recipes/{recipe}", "DELETE"),
+    Call("stocks.feed_delete", "/api/stocks/feeds/{new_feed}", "DELETE"),
+    Call("stocks.vaccine_delete", "/api/stocks/vaccines/{new_vaccine}", "DELETE"),
+    Call("stocks.fertiliser_delete", "/api/stocks/fertilisers/{new_fertiliser}", "DELETE"),
+    Call("stocks.fuel_delete", "/api/stocks/fuels/{new_fuel}", "DELETE"),
+    Call("groups.slaughter", "/api/groups/{new_group}/slaughter", "POST", {"reason": "plan check", "date": "2025-12-11"}),
+    Call("groups.delete", "/api/groups/{new_group}", "DELETE"),
+    Call("animals.delete", "/api/animals/{new_animal}?hard=true", "DELETE"),
+    Call("camps.clear_boundary", "/api/camps/{new_camp}/boundary", "DELETE"),
+    Call("camps.delete", "/api/camps/{new_camp}", "DELETE"),
+]
+
+CALLS: List[Call] = READS + WRITES
+
+# (route, table) -> why reading the whole table is expected
+ALLOWED_SCANS: Dict[Tuple[str, str], str] = {
+    ("animals.list", "animals"): "lists every animal",
+    ("animals.by_calf_tag", "animals"): "looks inside calves_tags; only Postgres has an index for that (GIN)",
+    # the new animal / every animal gets a due date for every vaccine
+    ("animals.create", "vaccines"): "due dates for every vaccine",
+    ("vaccinations.refresh_due", "vaccines"): "due dates for every vaccine",
+    ("groups.list", "groups"): "lists every group",
+    ("groups.list", "animals"): "head counts for every group",
+    ("camps.list", "camps"): "lists every camp",
+    ("camps.rotation_plan", "camps"): "plans over every camp",
+    ("camps.rotation_plan", "groups"): "plans over every group",
+    ("camps.rotation_series", "camps"): "plans over every camp",
+    ("camps.rotation_series", "groups"): "plans over every group",
+    ("camps.set_boundary", "camps"): "first boundary: backfills the R-tree from every camp, once",
+    ("stats.herd_summary", "animals"): "aggregates the whole herd",
+    ("stats.camps_summary", "camps"): "one row per camp",
+    ("stats.camps_summary", "groups"): "one row per camp",
+    # the history feed returns every event of every kind
+    **{("history.all", t): "the full history feed" for t in (
+        "animal_history", "group_movement_events",
+        "vaccine_events", "vaccine_waste_events", "vaccine_stocktake_events",
+        "feed_events", "feed_stocktake_events",
+        "fertiliser_events", "fertiliser_stocktake_events",
+        "fuel_events", "fuel_stocktake_events",
+    )},
+    ("vaccinations.coverage", "vaccines"): "coverage per vaccine",
+    ("vaccinations.coverage", "animals"): "coverage over the live herd",
+    ("vaccinations.coverage_group", "vaccines"): "coverage per vaccine",
+    ("vaccinations.coverage_dates", "animals"): "coverage over the live herd",
+    ("vaccines.list", "vaccines"): "lists every vaccine",
+    ("stocks.vaccines", "vaccines"): "lists every vaccine",
+    ("stocks.feeds", "feeds"): "lists every feed",
+    ("stocks.balances", "feeds"): "a balance per item",
+    ("stocks.balances", "vaccines"): "a balance per item",
+    ("stocks.balances", "fertilisers"): "a balance per item",
+    ("stocks.balances", "fuels"): "a balance per item",
+    ("stocks.checkpoints", "stock_checkpoints"): "finds the days that still need checkpoints",
+}
+
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+_PG_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+def full_scans(conn, statement: str, parameters) -> List[str]:
+    """
+    Tables `statement` reads in full, according to the database's plan. Asked
+    on the connection that is about to run it, so temp tables are visible.
+    """
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if conn.dialect.name == "sqlite":
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            details = [row[-1] for row in cursor.fetchall()]
+            pattern = _SQLITE_SCAN
+        else:
+            cursor.execute("EXPLAIN " + statement, parameters)
+            details = [row[0] for row in cursor.fetchall()]
+            pattern = _PG_SCAN
+    finally:
+        cursor.close()
+    found = []
+    for detail in details:
+        m = pattern.search(detail.strip())
+        if m and m.group(1) not in found:
+            found.append(m.group(1))
+    return found
+
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+_PLANNED = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+
+def _fill(value, ids: Dict[str, Any]):
+    """`value` with "{name}" placeholders filled in; a string that is only a placeholder becomes the id itself."""
+    if isinstance(value, str):
+        m = _PLACEHOLDER.fullmatch(value)
+        return ids[m.group(1)] if m else value.format(**ids)
+    if isinstance(value, dict):
+        return {_fill(k, ids): _fill(v, ids) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, ids) for v in value]
+    return value
+
+
+def _plan_ids(db) -> Dict[str, Any]:
+    """The benchmark's ids plus the extra rows the filtered and write calls need."""
+    from sqlalchemy import func, select
+    from backend.models.animal import Animal
+    from backend.models.camp import Camp
+    from backend.models.fertiliser import Fertiliser
+    from backend.models.fuel import Fuel
+    from backend.models.stock_ledger import StockLedger
+    from backend.models.vaccination import Vaccination
+    from backend.models.vaccine import Vaccine
+
+    ids: Dict[str, Any] = _ids(db)
+    ids.update(
+        vaccine=db.execute(select(func.min(Vaccine.id))).scalar() or 1,
+        fertiliser=db.execute(select(func.min(Fertiliser.id))).scalar() or 1,
+        fuel=db.execute(select(func.min(Fuel.id))).scalar() or 1,
+        camp2=db.execute(select(func.min(Camp.id)).where(Camp.id != ids["camp"])).scalar() or ids["camp"],
+        # a live animal outside the busy group, for the death call
+        spare=db.execute(
+            select(func.max(Animal.id)).where(Animal.deceased == False, Animal.group_id != ids["group"])  # noqa: E712
+        ).scalar() or ids["animal"],
+        vaccination=db.execute(select(func.max(Vaccination.id))).scalar() or 1,
+        ledger=db.execute(
+            select(func.max(StockLedger.id)).where(StockLedger.category == "feed", StockLedger.item_id == ids["feed"])
+        ).scalar() or 1,
+        tag=db.execute(select(Animal.tag_number).where(Animal.id == ids["animal"])).scalar() or "",
+    )
+    return ids
+
+
+def check(only: Optional[List[str]] = None, writes: bool = False) -> Dict[str, dict]:
+    """
+    Per call: its HTTP status (or the error that kept it from running) and the
+    statements that scan a table, with the scanned tables and whether that is allowed.
+    """
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    from backend.db import Base, SessionLocal
+    from backend.main import app
+
+    tables = set(Base.metadata.tables)
+    seen: Dict[str, object] = {}     # statement -> the tables it scans, or the error EXPLAIN raised
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement in seen or not statement.lstrip()[:6].upper().startswith(_PLANNED):
+            return
+        if executemany and isinstance(parameters, list):   # a batch; RETURNING inserts may come row by row
+            parameters = parameters[0] if parameters else ()
+        try:
+            seen[statement] = [t for t in full_scans(conn, statement, parameters) if t in tables]
+        except Exception as e:  # noqa: BLE001 - reported as a failed call
+            seen[statement] = e
+
+    with SessionLocal() as db:
+        ids = _plan_ids(db)
+
+    report: Dict[str, dict] = {}
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        with TestClient(app, raise_server_exceptions=False) as client:
+            for call in CALLS if writes else READS:
+                if only and not any(call.name.startswith(o) for o in only):
+                    continue
+                try:
+                    path = _fill(call.path, ids)
+                    json, data = _fill(call.json, ids), _fill(call.data, ids)
+                    files = {k: (n, _fill(c, ids)) for k, (n, c) in call.files.items()} if call.files else None
+                except KeyError as e:
+                    report[call.name] = {"status": None, "error": f"no {e.args[0]} id (an earlier call failed)",
+                                         "findings": []}
+                    continue
+                seen.clear()
+                r = client.request(call.method, path, json=json, files=files, data=data)
+                if call.save and r.status_code < 400:
+                    ids[call.save] = r.json()["id"]
+                findings, errors = [], []
+                for statement, scanned in seen.items():
+                    if isinstance(scanned, Exception):
+                        errors.append(f"EXPLAIN failed: {scanned}")
+                    elif scanned:
+                        findings.append({
+                            "statement": " ".join(statement.split()),
+                            "tables": scanned,
+                            "unexpected": [t for t in scanned if (call.name, t) not in ALLOWED_SCANS],
+                        })
+                if r.status_code >= 400:
+                    errors.insert(0, r.text[:200])
+                report[call.name] = {
+                    "status": r.status_code,
+                    "error": "; ".join(errors) or None,
+                    "findings": findings,
+                }
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+    return report
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Fail when a route's queries fall back to full table scans.")
+    parser.add_argument("--db", help="database URL (default: DATABASE_URL)")
+    parser.add_argument("--only", action="append", help="call name prefix to check (repeatable)")
+    parser.add_argument("--writes", action="store_true",
+                        help="also make the POST/PATCH/PUT/DELETE calls (they change the database)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="also print allowed scans")
+    args = parser.parse_args(argv)
+
+    # must be set before backend.db / backend.main are imported
+    if args.db:
+        os.environ["DATABASE_URL"] = args.db
+    os.environ.setdefault("API_ONLY", "1")
+    os.environ.pop("REQUEST_CAPTURE_DIR", None)
+    os.chdir(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+    report = check(only=args.only, writes=args.writes)
+
+    failed = 0
+    for name, result in report.items():
+        bad = [f for f in result["findings"] if f["unexpected"]]
+        failed += len(bad) + bool(result["error"])
+        print(f"{'FAIL' if bad or result['error'] else 'ok  '} {name}")
+        if result["error"]:
+            print(f"       HTTP {result['status']}: {result['error']}")
+        for f in result["findings"]:
+            if f["unexpected"] or args.verbose:
+                label = "full scan of " + ", ".join(f["unexpected"] or f["tables"])
+                print(f"       {label}{'' if f['unexpected'] else ' (allowed)'}: {f['statement'][:160]}")
+    if failed:
+        print(f"\n{failed} failed call(s) or statement(s) scanning a table without an index")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
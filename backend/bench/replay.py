@@ -0,0 +1,173 @@
+"""
+Replay captured traffic (backend.middleware.capture) against an instance.
+
+    REQUEST_CAPTURE_DIR=captures uvicorn backend.main:app ...       # record
+    python -m backend.bench.replay 'captures/*.jsonl' --target http://127.0.0.1:8000
+    python -m backend.bench.replay captures/capture-*.jsonl --speed 10 --concurrency 32
+    python -m backend.bench.replay captures/*.jsonl --in-process --db sqlite:///bench.db --read-only
+
+Requests are sent at their captured offsets from the first one, divided by
+--speed (1 = original timing, 0 = as fast as possible); --concurrency caps
+the requests in flight. Requests whose body was not captured (uploads,
+oversized bodies) are skipped. --read-only sends only GET requests, which is
+the safe choice against a database you care about.
+
+Reports throughput, latency p50/p95/p99/max overall and per route (numeric
+path segments folded to {id}), status counts and how far sending fell behind
+the schedule (a large lag means the client, not the server, was the limit).
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from backend.bench.harness import _percentile
+
+_ID = re.compile(r"/\d+(?=/|$)")
+
+
+def load(patterns: List[str], read_only: bool = False) -> List[dict]:
+    """Captured records from the files matching `patterns`, ordered by timestamp."""
+    records = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue                      # a line cut off by a crash or rotation
+                    if read_only and rec["method"] != "GET":
+                        continue
+                    if "body_size" in rec:
+                        continue                      # body was not captured; can't be replayed faithfully
+                    records.append(rec)
+    records.sort(key=lambda r: r["ts"])
+    return records
+
+
+def route_of(path: str) -> str:
+    return _ID.sub("/{id}", path)
+
+
+async def replay(records: List[dict], client, *, speed: float = 1.0, concurrency: int = 16) -> Dict:
+    """Send `records` through an httpx.AsyncClient on their (scaled) schedule."""
+    sem = asyncio.Semaphore(concurrency)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Counter = Counter()
+    lags: List[float] = []
+    t0 = records[0]["ts"] if records else 0.0
+    start = time.perf_counter()
+
+    async def one(rec: dict) -> None:
+        due = (rec["ts"] - t0) / speed if speed > 0 else 0.0
+        delay = due - (time.perf_counter() - start)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        async with sem:
+            lags.append(max((time.perf_counter() - start) - due, 0.0) * 1000)
+            url = rec["path"] + ("?" + rec["query"] if rec.get("query") else "")
+            kwargs = {"json": rec["body"]} if "body" in rec else {}
+            sent = time.perf_counter()
+            try:
+                r = await client.request(rec["method"], url, **kwargs)
+                status = str(r.status_code)
+            except Exception as e:                    # connection refused, timeouts, ...
+                status = type(e).__name__
+            latencies[f"{rec['method']} {route_of(rec['path'])}"].append((time.perf_counter() - sent) * 1000)
+            statuses[status] += 1
+
+    await asyncio.gather(*(one(rec) for rec in records))
+    elapsed = time.perf_counter() - start
+
+    def summary(values: List[float]) -> Dict:
+        return {
+            "count": len(values),
+            "p50_ms": round(_percentile(values, 50), 2),
+            "p95_ms": round(_percentile(values, 95), 2),
+            "p99_ms": round(_percentile(values, 99), 2),
+            "max_ms": round(max(values), 2),
+        }
+
+    every = [v for values in latencies.values() for v in values]
+    return {
+        "requests": len(every),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(every) / elapsed, 1) if elapsed else None,
+        "latency": summary(every) if every else None,
+        "routes": {name: summary(values) for name, values in sorted(latencies.items())},
+        "statuses": dict(sorted(statuses.items())),
+        "lag_p95_ms": round(_percentile(lags, 95), 2) if lags else None,
+        "lag_max_ms": round(max(lags), 2) if lags else None,
+    }
+
+
+async def _run(records: List[dict], target: Optional[str], *, speed: float, concurrency: int, timeout: float) -> Dict:
+    import httpx
+
+    if target:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=target, timeout=timeout, limits=limits) as client:
+            return await replay(records, client, speed=speed, concurrency=concurrency)
+
+    from backend.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=timeout) as client:
+            return await replay(records, client, speed=speed, concurrency=concurrency)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Replay captured API traffic and report latency.")
+    parser.add_argument("captures", nargs="+", help="capture files or glob patterns")
+    parser.add_argument("--target", default="http://127.0.0.1:8000", help="base URL of the instance to replay against")
+    parser.add_argument("--in-process", action="store_true", help="replay against backend.main in this process instead of --target")
+    parser.add_argument("--db", help="database URL for --in-process (default: DATABASE_URL)")
+    parser.add_argument("--speed", type=float, default=1.0, help="N x the captured pace; 0 sends as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=16, help="maximum requests in flight")
+    parser.add_argument("--read-only", action="store_true", help="replay GET requests only")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    records = load(args.captures, read_only=args.read_only)
+    if not records:
+        raise SystemExit("no replayable requests in " + " ".join(args.captures))
+
+    if args.in_process:
+        # must be set before backend.db / backend.main are imported
+        if args.db:
+            os.environ["DATABASE_URL"] = args.db
+        os.environ.setdefault("API_ONLY", "1")
+        os.environ.pop("REQUEST_CAPTURE_DIR", None)          # don't record the replay itself
+    report = asyncio.run(_run(
+        records, None if args.in_process else args.target,
+        speed=args.speed, concurrency=args.concurrency, timeout=args.timeout,
+    ))
+
+    lat = report["latency"]
+    print(f"{report['requests']} requests in {report['seconds']:.2f} s = {report['throughput_rps']} req/s "
+          f"(speed x{args.speed:g}, concurrency {args.concurrency})")
+    print(f"latency ms: p50 {lat['p50_ms']:.1f}  p95 {lat['p95_ms']:.1f}  p99 {lat['p99_ms']:.1f}  max {lat['max_ms']:.1f}")
+    print(f"schedule lag ms: p95 {report['lag_p95_ms']:.1f}  max {report['lag_max_ms']:.1f}")
+    print("statuses: " + ", ".join(f"{k}={v}" for k, v in report["statuses"].items()))
+    print(f"\n{'route':44s} {'n':>6s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'max ms':>9s}")
+    for name, r in report["routes"].items():
+        print(f"{name:44s} {r['count']:6d} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} {r['p99_ms']:9.2f} {r['max_ms']:9.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,205 @@
 # backend/db/__init__.py
+"""
+The one database module: declarative Base, engine, SessionLocal and the
+request-scoped get_db dependency, plus the async counterparts (async engine,
+AsyncSessionLocal, get_async_db) used by the read-heavy async endpoints.
+Everything else imports from here.
+
+Settings come from the environment:
+  DATABASE_URL            default sqlite:///./farm.db
+  SQL_ECHO=1              log SQL
+  ASYNC_DATABASE_URL      default derived from DATABASE_URL: sqlite+aiosqlite
+                          for SQLite, postgresql+asyncpg for PostgreSQL
+SQLite only (applied to every new connection):
+  SQLITE_JOURNAL_MODE     default WAL (readers no longer wait for writers)
+  SQLITE_SYNCHRONOUS      default NORMAL (safe with WAL, far fewer fsyncs)
+  SQLITE_BUSY_TIMEOUT_MS  default 5000 (wait for a lock instead of failing)
+  SQLITE_CACHE_SIZE_KB    default 65536 (page cache per connection)
+  SQLITE_MMAP_SIZE        default 268435456 (bytes of the file memory-mapped)
+  SQLITE_TEMP_STORE       default MEMORY
+PostgreSQL (DATABASE_URL=postgresql://...; psycopg 3 is used unless a driver is named):
+  DB_POOL_SIZE            default 10 connections kept open per process
+  DB_MAX_OVERFLOW         default 20 extra connections under burst
+  DB_POOL_TIMEOUT         default 30 seconds to wait for a free connection
+  DB_POOL_RECYCLE         default 1800 seconds before a connection is replaced
+  PG_PREPARE_THRESHOLD    default 5 executions before psycopg prepares a
+                          statement server-side; "none" disables (PgBouncer
+                          in transaction mode)
+"""
 from __future__ import annotations
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from typing import AsyncIterator, Iterator, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
+
+from backend.db.pool import TimedAsyncQueuePool, TimedQueuePool
+from backend.services import metrics
 
 # Single declarative Base used by ALL models
 class Base(DeclarativeBase):
     pass
 
-# Choose your DB URL (env, or fallback to local SQLite)
+
 DATABASE_URL = os.getenv("DATABASE_URL") or "sqlite:///./farm.db"
+SQL_ECHO = os.getenv("SQL_ECHO", "0") == "1"
+
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536")),   # negative = KiB
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+
+def _count_sqlite_busy(context) -> None:
+    """handle_error hook: count statements that gave up on a locked database."""
+    if "database is locked" in str(context.original_exception):
+        metrics.inc("db_sqlite_busy_total")
+
+
+def _apply_sqlite_pragmas(dbapi_conn, _record) -> None:
+    cur = dbapi_conn.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cur.execute(f"PRAGMA {name}={value}")
+    finally:
+        cur.close()
+
+
+PG_POOL = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": True,
+}
+_threshold = os.getenv("PG_PREPARE_THRESHOLD", "5").strip().lower()
+PG_PREPARE_THRESHOLD = None if _threshold in ("", "none", "off") else int(_threshold)
+
+
+def _in_memory(url: str) -> bool:
+    # in-memory SQLite keeps its own single-connection pool
+    return url.startswith("sqlite") and (url.split("://", 1)[1] in ("", "/", "/:memory:") or "mode=memory" in url)
+
+
+def normalize_url(url: str) -> str:
+    """postgres:// and bare postgresql:// mean psycopg 3; any other URL is returned unchanged."""
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    if url.startswith("postgresql://"):
+        url = "postgresql+psycopg://" + url[len("postgresql://"):]
+    return url
+
+
+def make_engine(url: Optional[str] = None, **kwargs) -> Engine:
+    """Engine for `url` (default DATABASE_URL) with the project's connection settings."""
+    url = normalize_url(url or DATABASE_URL)
+    is_sqlite = url.startswith("sqlite")
+    connect_args = kwargs.pop("connect_args", {})
+    if is_sqlite:
+        # FastAPI runs sync endpoints in a thread pool
+        connect_args.setdefault("check_same_thread", False)
+    elif url.startswith("postgresql+psycopg"):
+        connect_args.setdefault("prepare_threshold", PG_PREPARE_THRESHOLD)
+    if not is_sqlite and "poolclass" not in kwargs:
+        for key, value in PG_POOL.items():
+            kwargs.setdefault(key, value)
+    if "poolclass" not in kwargs and not _in_memory(url):
+        kwargs["poolclass"] = TimedQueuePool
+    eng = create_engine(url, echo=SQL_ECHO, connect_args=connect_args, **kwargs)
+    if is_sqlite:
+        event.listen(eng, "connect", _apply_sqlite_pragmas)
+        event.listen(eng, "handle_error", _count_sqlite_busy)
+    return eng
+
 
-# SQLite needs this connect arg in single-threaded dev
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
-)
+engine = make_engine()
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+
+def get_db() -> Iterator[Session]:
+    """Request-scoped session; closed (and rolled back if uncommitted) after the response."""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# ---------- async ----------
+def async_url(url: Optional[str] = None) -> str:
+    """The async-driver form of `url`: sqlite -> sqlite+aiosqlite, postgresql -> postgresql+asyncpg."""
+    url = normalize_url(url or DATABASE_URL)
+    scheme, rest = url.split("://", 1)
+    if scheme == "sqlite":
+        scheme = "sqlite+aiosqlite"
+    elif scheme.startswith("postgresql") and scheme != "postgresql+asyncpg":
+        scheme = "postgresql+asyncpg"
+    return f"{scheme}://{rest}"
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_url()
+
+
+def make_async_engine(url: Optional[str] = None, **kwargs) -> AsyncEngine:
+    """Async engine with the same pool and SQLite settings as make_engine()."""
+    url = url or ASYNC_DATABASE_URL
+    is_sqlite = url.startswith("sqlite")
+    connect_args = kwargs.pop("connect_args", {})
+    if url.startswith("postgresql+asyncpg"):
+        # asyncpg prepares every statement; its per-connection cache is the
+        # equivalent of psycopg's prepare_threshold (0 disables, for PgBouncer)
+        connect_args.setdefault("prepared_statement_cache_size", 0 if PG_PREPARE_THRESHOLD is None else 500)
+    if not is_sqlite and "poolclass" not in kwargs:
+        for key, value in PG_POOL.items():
+            kwargs.setdefault(key, value)
+    if "poolclass" not in kwargs and not _in_memory(url):
+        kwargs["poolclass"] = TimedAsyncQueuePool
+    eng = create_async_engine(url, echo=SQL_ECHO, connect_args=connect_args, **kwargs)
+    if is_sqlite:
+        event.listen(eng.sync_engine, "connect", _apply_sqlite_pragmas)
+        event.listen(eng.sync_engine, "handle_error", _count_sqlite_busy)
+    return eng
+
+
+# Created on first use so sync-only entry points (Alembic, CLI jobs) do not
+# need the async driver installed.
+_async_engine: Optional[AsyncEngine] = None
+_async_sessions: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = make_async_engine()
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    global _async_sessions
+    if _async_sessions is None:
+        _async_sessions = async_sessionmaker(
+            bind=get_async_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _async_sessions()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Async counterpart of get_db for `async def` endpoints."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_engines() -> None:
+    """Close pooled connections of both engines (app shutdown)."""
+    global _async_engine, _async_sessions
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = _async_sessions = None
+    engine.dispose()
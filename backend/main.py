@@ -1,55 +1,96 @@
-from fastapi import FastAPI, APIRouter
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from fastapi.routing import APIRoute
-import os
-
-from backend.db import Base, engine
-from backend.routers import animals, camps, groups, stats, stocks, uploads, history
-from backend.routers.weights import router as weights_router
-from backend.routers.vaccinations import router as vaccinations_router
-from backend.models.animal import Animal
-from backend.models.history import AnimalHistory
-from backend.routers.vaccines import router as vaccines_router
-
-app = FastAPI()
-
-# CORS: keep dev origins; when serving the SPA from the same origin (8001), CORS won’t be used by the app itself
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5173", "http://127.0.0.1:5173"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# --- Static media (for uploaded photos) ---
-app.mount("/media", StaticFiles(directory="backend/media"), name="media")
-
-# --- DB schema (create if not exists) ---
-Base.metadata.create_all(bind=engine)
-
-# ---------------- API under /api ----------------
-api = APIRouter(prefix="/api")
-
-api.include_router(stats.router)
-api.include_router(animals.router)
-api.include_router(camps.router)
-api.include_router(groups.router)
-api.include_router(stocks.router)
-app.include_router(vaccinations_router, prefix="/api/vaccinations")
-api.include_router(uploads.router)
-api.include_router(history.router)
-app.include_router(weights_router, prefix="/api/weights")
-app.include_router(vaccines_router, prefix="/api/vaccines")
-
-# Optional health check at /api/health
-@api.get("/health")
-def health():
-    return {"ok": True}
-
-app.include_router(api)
+from backend.startup import phase
+
+with phase("fastapi"):
+    from contextlib import asynccontextmanager
+
+    from fastapi import FastAPI, APIRouter
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.staticfiles import StaticFiles
+    from fastapi.responses import FileResponse
+    from fastapi.routing import APIRoute
+    import logging
+    import os
+
+with phase("db"):
+    from backend.db import dispose_engines, engine
+
+with phase("routers"):
+    from backend.routers import animals, camps, groups, stats, stocks, uploads, history, analytics, metrics
+    from backend.routers.weights import router as weights_router
+    from backend.routers.vaccinations import router as vaccinations_router
+    from backend.routers.vaccines import router as vaccines_router
+
+from backend.middleware.idempotency import IdempotencyMiddleware
+from backend.middleware.sql_timing import SQLTimingMiddleware
+from backend.middleware.metrics import MetricsMiddleware
+from backend.middleware.capture import CaptureMiddleware
+from backend import startup
+
+log = logging.getLogger("backend.startup")
+
+# API_ONLY=1 serves just /api and /media (no frontend build needed), e.g. for backend.bench
+API_ONLY = os.getenv("API_ONLY", "0") == "1"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # --- DB schema: compared with the Alembic head (an empty database is created) ---
+    with phase("schema"):
+        startup.check_schema(engine)
+    with phase("media"):
+        startup.ensure_media_dirs()
+    startup.report()
+    yield
+    await dispose_engines()
+
+app = FastAPI(lifespan=lifespan)
+
+with phase("app"):
+    # CORS: keep dev origins; when serving the SPA from the same origin (8001), CORS won’t be used by the app itself
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:5173", "http://127.0.0.1:5173"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Retried writes carrying an Idempotency-Key replay the first response instead of running again
+    app.add_middleware(IdempotencyMiddleware)
+
+    # Server-Timing header with per-request SQL count/time; warns on N+1-looking requests
+    app.add_middleware(SQLTimingMiddleware)
+
+    # Per-route counters/latency histograms, scraped from /api/metrics
+    app.add_middleware(MetricsMiddleware)
+
+    # REQUEST_CAPTURE_DIR=... records sanitised /api traffic for backend.bench.replay (off by default)
+    app.add_middleware(CaptureMiddleware)
+
+    # --- Static media (for uploaded photos); the directories are created on startup ---
+    app.mount("/media", StaticFiles(directory="backend/media", check_dir=False), name="media")
+
+    # ---------------- API under /api ----------------
+    api = APIRouter(prefix="/api")
+
+    api.include_router(stats.router)
+    api.include_router(animals.router)
+    api.include_router(camps.router)
+    api.include_router(groups.router)
+    api.include_router(stocks.router)
+    app.include_router(vaccinations_router, prefix="/api/vaccinations")
+    api.include_router(uploads.router)
+    api.include_router(history.router)
+    api.include_router(analytics.router)
+    api.include_router(metrics.router)
+    app.include_router(weights_router, prefix="/api/weights")
+    app.include_router(vaccines_router, prefix="/api/vaccines")
+
+    # Optional health check at /api/health
+    @api.get("/health")
+    def health():
+        return {"ok": True}
+
+    app.include_router(api)
 
 # -------------- Serve built frontend --------------
 # Adjust this path if your repo layout differs:
@@ -59,24 +100,24 @@ app.include_router(api)
 #   frontend/
 #     dist/    <-- after `npm run build`
 frontend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "frontend", "dist"))
-if not os.path.isdir(frontend_dir):
-    raise RuntimeError(f"Frontend build not found: {frontend_dir}. Run `npm run build` in the frontend.")
-
-# Serve the SPA at root
-app.mount("/", StaticFiles(directory=frontend_dir, html=True), name="frontend")
-
-# SPA fallback for client-side routes (anything not matched above and not starting with /api)
-@app.get("/{full_path:path}")
-def spa_fallback(full_path: str):
-    if full_path.startswith("api"):
-        return {"detail": "Not Found"}  # API routes are handled by routers above
-    return FileResponse(os.path.join(frontend_dir, "index.html"))
-
-# -------------- Debug: print registered routes --------------
-from fastapi.routing import APIRoute
-print("\nRegistered routes:")
-for r in app.routes:
-    if isinstance(r, APIRoute):
-        methods = ",".join(sorted(r.methods))
-        print(f"{methods:7s} {r.path}")
-print()
+if not API_ONLY and not os.path.isdir(frontend_dir):
+    log.warning("Frontend build not found: %s. Serving the API only; run `npm run build` in the frontend.", frontend_dir)
+elif not API_ONLY:
+    # Serve the SPA at root
+    app.mount("/", StaticFiles(directory=frontend_dir, html=True), name="frontend")
+
+    # SPA fallback for client-side routes (anything not matched above and not starting with /api)
+    @app.get("/{full_path:path}")
+    def spa_fallback(full_path: str):
+        if full_path.startswith("api"):
+            return {"detail": "Not Found"}  # API routes are handled by routers above
+        return FileResponse(os.path.join(frontend_dir, "index.html"))
+
+# -------------- Debug: DEBUG_ROUTES=1 prints the registered routes --------------
+if os.getenv("DEBUG_ROUTES", "0") == "1":
+    print("\nRegistered routes:")
+    for r in app.routes:
+        if isinstance(r, APIRoute):
+            methods = ",".join(sorted(r.methods))
+            print(f"{methods:7s} {r.path}")
+    print()
@@ -0,0 +1,2 @@
+# backend/middleware/__init__.py
+# Pure ASGI middleware wrapped around the whole app in main.py.
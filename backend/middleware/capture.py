@@ -0,0 +1,222 @@
+"""
+Request capture for replay (backend.bench.replay).
+
+Off unless REQUEST_CAPTURE_DIR is set. Every /api request (except
+/api/metrics) is then appended as one JSON line to
+REQUEST_CAPTURE_DIR/capture-<timestamp>.jsonl:
+
+    {"ts": 1760000000.123, "method": "POST", "path": "/api/weights/",
+     "query": "", "content_type": "application/json", "body": {...},
+     "status": 201, "duration_ms": 12.4}
+
+Sanitising: JSON bodies and query strings have values under sensitive-looking
+keys (password, token, secret, authorization, api_key, ...) replaced by "***"; other bodies
+(photo uploads, forms) and bodies over MAX_BODY_BYTES are not stored, only
+their size. No headers are kept.
+
+Nothing is written on the event loop: a request only queues its raw record,
+and a writer thread (one per process) sanitises, serialises and appends it,
+flushing whenever the queue runs dry. If the writer falls QUEUE_MAX records
+behind, further records are dropped (counted in `dropped`) rather than
+slowing requests down. Pending records are written at interpreter exit.
+
+Files rotate at REQUEST_CAPTURE_MAX_MB (default 50); only the newest
+REQUEST_CAPTURE_KEEP files (default 10) are kept. A worker prunes only its own
+files and those of workers that have exited, never a file another live
+worker is still writing.
+"""
+import atexit
+import glob
+import json
+import os
+import queue
+import re
+import threading
+import time
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode
+
+from backend.services.metrics import _alive
+
+MAX_BODY_BYTES = 64 * 1024
+QUEUE_MAX = 10000
+_PID = re.compile(r"capture-\d{8}-\d{6}-(\d+)\.jsonl$")
+SKIP_PATHS = ("/api/metrics",)
+SENSITIVE = re.compile(r"pass(word)?|token|secret|authori[sz]ation|api[_-]?key|cookie", re.I)
+
+
+def sanitize(value):
+    if isinstance(value, dict):
+        return {k: "***" if SENSITIVE.search(str(k)) else sanitize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [sanitize(v) for v in value]
+    return value
+
+
+def sanitize_query(query: str) -> str:
+    pairs = parse_qsl(query, keep_blank_values=True)
+    return urlencode([(k, "***" if SENSITIVE.search(k) else v) for k, v in pairs])
+
+
+def _finish(raw: dict) -> dict:
+    """The stored form of a queued record: sanitised query, and the body parsed or reduced to its size."""
+    chunks, size = raw.pop("body"), raw.pop("body_size")
+    raw["query"] = sanitize_query(raw["query"].decode("latin-1"))
+    content_type = raw["content_type"] or ""
+    if chunks is not None and content_type.startswith("application/json"):
+        try:
+            raw["body"] = sanitize(json.loads(b"".join(chunks)))
+        except ValueError:
+            raw["body_size"] = size
+    elif size:
+        raw["body_size"] = size
+    return raw
+
+
+class CaptureMiddleware:
+    def __init__(self, app, directory: Optional[str] = None, prefix: str = "/api",
+                 max_mb: Optional[float] = None, keep: Optional[int] = None):
+        self.app = app
+        self.directory = directory or os.getenv("REQUEST_CAPTURE_DIR") or None
+        self.prefix = prefix
+        self.max_bytes = int((max_mb if max_mb is not None else float(os.getenv("REQUEST_CAPTURE_MAX_MB", "50"))) * 1024 * 1024)
+        self.keep = keep if keep is not None else int(os.getenv("REQUEST_CAPTURE_KEEP", "10"))
+        self._file = None
+        self._size = 0
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=QUEUE_MAX)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self.dropped = 0
+
+    # ---------- files ----------
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.directory, f"capture-{stamp}-{os.getpid()}.jsonl")
+        self._file = open(path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+        self._prune(current=path)
+
+    def _prune(self, current: str) -> None:
+        """Drop the oldest files beyond `keep`, skipping files of other live workers."""
+        old = []
+        for f in glob.glob(os.path.join(self.directory, "capture-*.jsonl")):
+            try:
+                old.append((os.path.getmtime(f), f))
+            except OSError:
+                pass                                # pruned by another worker meanwhile
+        old.sort()
+        for _, stale in old[: max(len(old) - self.keep, 0)]:
+            m = _PID.search(os.path.basename(stale))
+            pid = int(m.group(1)) if m else None
+            if stale == current or (pid is not None and pid != os.getpid() and _alive(pid)):
+                continue
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+    def _write(self, record: dict) -> None:
+        line = json.dumps(record, default=str, separators=(",", ":")) + "\n"
+        if self._file is None or self._size + len(line) > self.max_bytes:
+            self._rotate()
+        self._file.write(line)
+        self._size += len(line)
+
+    # ---------- writer thread ----------
+    def _submit(self, record: dict) -> None:
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._drain, name="request-capture", daemon=True)
+                    self._writer.start()
+                    atexit.register(self.close)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self) -> None:
+        while True:
+            record = self._queue.get()
+            while record is not None:
+                try:
+                    self._write(_finish(record))
+                except Exception:                   # a bad record or a full disk must not kill the writer
+                    pass
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if self._file is not None:
+                self._file.flush()
+            if record is None:
+                return
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write what is queued and close the file (also run at interpreter exit)."""
+        writer = self._writer
+        if writer is None or not writer.is_alive():
+            return
+        self._queue.put(None)
+        writer.join(timeout)
+        if self._file is not None and not writer.is_alive():
+            self._file.close()
+            self._file = None
+
+    # ---------- ASGI ----------
+    async def __call__(self, scope, receive, send):
+        if (
+            self.directory is None
+            or scope["type"] != "http"
+            or not scope["path"].startswith(self.prefix)
+            or scope["path"].startswith(SKIP_PATHS)
+        ):
+            return await self.app(scope, receive, send)
+
+        content_type = ""
+        for name, value in scope["headers"]:
+            if name == b"content-type":
+                content_type = value.decode("latin-1")
+                break
+
+        chunks = []
+        size = 0
+
+        async def recording_receive():
+            nonlocal size
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                size += len(body)
+                if size <= MAX_BODY_BYTES:
+                    chunks.append(body)
+            return message
+
+        status = 500
+
+        async def status_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        ts = time.time()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, recording_receive, status_send)
+        finally:
+            # raw parts only; sanitising and serialising happen on the writer thread
+            self._submit({
+                "ts": round(ts, 3),
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b""),
+                "content_type": content_type or None,
+                "status": status,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "body": chunks if size and size <= MAX_BODY_BYTES else None,
+                "body_size": size,
+            })
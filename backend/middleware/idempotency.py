@@ -0,0 +1,181 @@
+"""
+Idempotency-Key support for write endpoints.
+
+A client that may retry a request sends `Idempotency-Key: <uuid>`. The first
+request with a key runs normally and its response is stored; a retry with the
+same key and the same request replays that response (with
+`Idempotent-Replayed: true`) without calling the handler again.
+
+- same key, different method/path/query/body -> 422
+- same key while the first request is still running -> 409
+- 5xx responses and handler exceptions are not stored, so the retry runs again
+- keys older than IDEMPOTENCY_TTL_HOURS (default 24) are forgotten
+
+Pure ASGI, so the request body is buffered once and handed on unchanged.
+"""
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+import anyio
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from backend.db import engine
+from backend.models.idempotency import IdempotencyKey
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+DEFAULT_PREFIXES = ("/api/stocks", "/api/vaccinations", "/api/weights", "/api/groups")
+MAX_STORED_BODY = 1024 * 1024
+
+T = IdempotencyKey.__table__
+
+
+def _json_response(status: int, detail: str):
+    body = json.dumps({"detail": detail}).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    return status, headers, body
+
+
+class IdempotencyMiddleware:
+    def __init__(
+        self,
+        app,
+        prefixes: Iterable[str] = DEFAULT_PREFIXES,
+        ttl_hours: Optional[float] = None,
+        bind=None,
+    ):
+        self.app = app
+        self.prefixes = tuple(prefixes)
+        hours = ttl_hours if ttl_hours is not None else float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+        self.ttl = timedelta(hours=hours)
+        self.bind = bind or engine
+        self._next_purge = 0.0
+
+    # ---------- storage (sync; run in a worker thread) ----------
+    def _claim(self, key: str, digest: str):
+        """Insert a pending row for `key`; returns None if claimed, else the existing row."""
+        now = datetime.utcnow()
+        with self.bind.begin() as conn:
+            if time.monotonic() >= self._next_purge:
+                conn.execute(delete(T).where(T.c.created_at < now - self.ttl))
+                self._next_purge = time.monotonic() + 600
+            row = conn.execute(select(T).where(T.c.key == key)).first()
+            if row is not None and row.created_at < now - self.ttl:
+                conn.execute(delete(T).where(T.c.id == row.id))
+                row = None
+        if row is not None:
+            return row
+        try:
+            with self.bind.begin() as conn:
+                conn.execute(insert(T).values(key=key, request_hash=digest, completed=False, created_at=now))
+        except IntegrityError:
+            # lost the race to a concurrent request carrying the same key
+            with self.bind.connect() as conn:
+                return conn.execute(select(T).where(T.c.key == key)).first()
+        return None
+
+    def _store(self, key: str, status: int, headers, body: bytes) -> None:
+        with self.bind.begin() as conn:
+            conn.execute(
+                update(T).where(T.c.key == key).values(
+                    completed=True,
+                    status_code=status,
+                    headers=json.dumps([[k.decode("latin-1"), v.decode("latin-1")] for k, v in headers]),
+                    body=body,
+                )
+            )
+
+    def _release(self, key: str) -> None:
+        with self.bind.begin() as conn:
+            conn.execute(delete(T).where(T.c.key == key, T.c.completed.is_(False)))
+
+    # ---------- ASGI ----------
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in WRITE_METHODS
+            or not scope["path"].startswith(self.prefixes)
+        ):
+            return await self.app(scope, receive, send)
+
+        key = None
+        for name, value in scope["headers"]:
+            if name == b"idempotency-key":
+                key = value.decode("latin-1").strip()
+                break
+        if not key:
+            return await self.app(scope, receive, send)
+        if len(key) > 128:
+            return await self._send(send, *_json_response(400, "Idempotency-Key must be at most 128 characters"))
+
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+
+        h = hashlib.sha256()
+        for part in (scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body):
+            h.update(part)
+            h.update(b"\0")
+        digest = h.hexdigest()
+
+        existing = await anyio.to_thread.run_sync(self._claim, key, digest)
+        if existing is not None:
+            if existing.request_hash != digest:
+                return await self._send(send, *_json_response(422, "Idempotency-Key was already used for a different request"))
+            if not existing.completed:
+                return await self._send(send, *_json_response(409, "A request with this Idempotency-Key is still in progress"))
+            headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in json.loads(existing.headers or "[]")]
+            headers.append((b"idempotent-replayed", b"true"))
+            return await self._send(send, existing.status_code, headers, existing.body or b"")
+
+        replayed = False
+
+        async def replay_receive():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status = 500
+        headers = []
+        out = []
+        size = 0
+        stored = False
+
+        async def capture_send(message):
+            nonlocal status, headers, size, stored
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size <= MAX_STORED_BODY:
+                    out.append(chunk)
+                # store before the client sees the end of the response, so a retry always finds it
+                if not message.get("more_body") and status < 500 and size <= MAX_STORED_BODY:
+                    await anyio.to_thread.run_sync(self._store, key, status, headers, b"".join(out))
+                    stored = True
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        finally:
+            if not stored:
+                await anyio.to_thread.run_sync(self._release, key)
+
+    @staticmethod
+    async def _send(send, status: int, headers, body: bytes) -> None:
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
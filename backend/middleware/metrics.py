@@ -0,0 +1,56 @@
+"""
+Per-route request metrics for /api/metrics (see backend.services.metrics).
+
+Routes are labelled by their template (/api/animals/{animal_id}), not the
+raw path, so the number of series stays bounded; requests that match no
+route share the label "unmatched".
+"""
+import time
+
+from backend.services import metrics
+
+IN_FLIGHT = "http_requests_in_flight"
+
+
+def route_label(scope) -> str:
+    """Full path template of the matched route, including router prefixes."""
+    template = getattr(scope.get("route"), "path", None)
+    if not template:
+        return "unmatched"
+    # a route inside an included router only knows its own part of the path;
+    # whatever precedes the rendered template in the request path is the prefix
+    path = scope["path"]
+    try:
+        rendered = template.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    return path[: len(path) - len(rendered)] + template if path.endswith(rendered) else template
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def status_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.inc(IN_FLIGHT)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, status_send)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.dec(IN_FLIGHT)
+            labels = (("method", scope["method"]), ("route", route_label(scope)))
+            metrics.inc("http_requests_total", labels + (("status", str(status)),))
+            metrics.observe("http_request_duration_seconds", labels, elapsed)
+            metrics.flush()
@@ -0,0 +1,117 @@
+"""
+Per-request SQL instrumentation.
+
+Engine events (installed once for every engine, sync and async) add each
+cursor execution to the current request's RequestStats, found through a
+context variable; the context follows the request into the thread pool and
+into AsyncSession greenlets. The middleware then:
+
+- adds `Server-Timing: db;dur=<ms>;desc="<n> queries", app;dur=<ms>`
+- logs a warning when a request runs more than SQL_WARN_STATEMENTS
+  statements (default 50) or one statement SQL_WARN_REPEATS times or more
+  (default 10) - the usual sign of an N+1 loop
+
+SQL_TIMING=0 switches it off.
+"""
+import logging
+import os
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger("backend.sql")
+
+_current: ContextVar[Optional["RequestStats"]] = ContextVar("sql_request_stats", default=None)
+_installed = False
+
+
+@dataclass
+class RequestStats:
+    statements: int = 0
+    db_seconds: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+    def top_repeat(self):
+        """(statement, count) of the most repeated statement, or (None, 0)."""
+        if not self.shapes:
+            return None, 0
+        return self.shapes.most_common(1)[0]
+
+
+def current_stats() -> Optional[RequestStats]:
+    """Stats of the request being served, or None outside a request."""
+    return _current.get()
+
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("sql_timing_start", []).append(time.perf_counter())
+
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    starts = conn.info.get("sql_timing_start")
+    if stats is None or not starts:
+        return
+    stats.db_seconds += time.perf_counter() - starts.pop()
+    stats.statements += 1
+    stats.shapes[statement] += 1
+
+
+def install() -> None:
+    """Attach the cursor events to all engines (idempotent)."""
+    global _installed
+    if not _installed:
+        event.listen(Engine, "before_cursor_execute", _before)
+        event.listen(Engine, "after_cursor_execute", _after)
+        _installed = True
+
+
+class SQLTimingMiddleware:
+    def __init__(self, app, max_statements: Optional[int] = None, max_repeats: Optional[int] = None):
+        self.app = app
+        self.max_statements = max_statements if max_statements is not None else int(os.getenv("SQL_WARN_STATEMENTS", "50"))
+        self.max_repeats = max_repeats if max_repeats is not None else int(os.getenv("SQL_WARN_REPEATS", "10"))
+        self.enabled = os.getenv("SQL_TIMING", "1") != "0"
+        if self.enabled:
+            install()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - started) * 1000
+                value = (
+                    f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.statements} queries", '
+                    f"app;dur={total_ms:.1f}"
+                )
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", value.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            _current.reset(token)
+            self._check(scope, stats)
+
+    def _check(self, scope, stats: RequestStats) -> None:
+        statement, repeats = stats.top_repeat()
+        if stats.statements <= self.max_statements and repeats < self.max_repeats:
+            return
+        log.warning(
+            "%s %s ran %d SQL statements in %.1f ms; most repeated (%dx): %s",
+            scope["method"], scope["path"], stats.statements, stats.db_seconds * 1000,
+            repeats, " ".join((statement or "").split())[:200],
+        )
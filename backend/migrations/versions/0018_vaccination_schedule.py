@@ -0,0 +1,47 @@
+"""vaccination scheduling rules and due-date table
+
+Revision ID: 0018_vaccination_schedule
+Revises: bdc47f427c94
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0018_vaccination_schedule'
+down_revision: Union[str, Sequence[str], None] = 'bdc47f427c94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('vaccines') as batch:
+        batch.add_column(sa.Column('first_dose_age_days', sa.Integer(), nullable=True))
+        batch.add_column(sa.Column('booster_interval_days', sa.Integer(), nullable=True))
+
+    op.create_table(
+        'vaccination_due',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('animal_id', sa.Integer(), sa.ForeignKey('animals.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('vaccine_id', sa.Integer(), sa.ForeignKey('vaccines.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('last_date', sa.Date(), nullable=True),
+        sa.Column('due_date', sa.Date(), nullable=False),
+        sa.Column('kind', sa.String(length=16), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.UniqueConstraint('animal_id', 'vaccine_id', name='uq_vaccination_due_animal_vaccine'),
+    )
+    op.create_index('ix_vaccination_due_id', 'vaccination_due', ['id'])
+    op.create_index('ix_vaccination_due_vaccine_id', 'vaccination_due', ['vaccine_id'])
+    op.create_index('ix_vaccination_due_due_date', 'vaccination_due', ['due_date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('vaccination_due')
+    with op.batch_alter_table('vaccines') as batch:
+        batch.drop_column('booster_interval_days')
+        batch.drop_column('first_dose_age_days')
@@ -0,0 +1,131 @@
+"""unified stock ledger for all stock categories
+
+Revision ID: 0019_unified_stock_ledger
+Revises: 0018_vaccination_schedule
+Create Date: 2026-10-18
+
+stock_ledger moves from vaccine_id to (category, item_id) and is
+backfilled from the existing event tables, so that for every item the
+ledger sums to current_stock:
+  1. one "opening" row per item for whatever the events do not explain
+  2. every historical movement, in date order
+  3. balance_after as the running total in id order
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0019_unified_stock_ledger'
+down_revision: Union[str, Sequence[str], None] = '0018_vaccination_schedule'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (category, item_id, delta, reason, ref_type, ref_id, event_date) for every historical movement
+MOVEMENTS = """
+    SELECT 'vaccine' AS category, vaccine_id AS item_id,
+           CASE event_type WHEN 'in' THEN amount ELSE -amount END AS delta,
+           reason, 'vaccine_event' AS ref_type, id AS ref_id, date AS event_date
+      FROM vaccine_events WHERE event_type IN ('in', 'out')
+    UNION ALL
+    SELECT 'vaccine', vaccine_id, -amount, reason, 'vaccine_waste', id, date
+      FROM vaccine_waste_events
+    UNION ALL
+    SELECT 'vaccine', vaccine_id, -dose, 'Vaccination', 'vaccination', id, date
+      FROM vaccinations
+     WHERE group_id IS NOT NULL OR source IS NULL OR source = 'manual'
+    UNION ALL
+    SELECT 'feed', feed_id,
+           CASE event_type WHEN 'in' THEN amount ELSE -amount END,
+           reason, 'feed_event', id, date
+      FROM feed_events WHERE event_type IN ('in', 'out', 'mix')
+    UNION ALL
+    SELECT 'fertiliser', fertiliser_id,
+           CASE event_type WHEN 'in' THEN amount ELSE -amount END,
+           reason, 'fertiliser_event', id, date
+      FROM fertiliser_events WHERE event_type IN ('in', 'out')
+    UNION ALL
+    SELECT 'fuel', fuel_id,
+           CASE event_type WHEN 'in' THEN amount ELSE -amount END,
+           reason, 'fuel_event', id, date
+      FROM fuel_events WHERE event_type IN ('in', 'out')
+"""
+
+ITEM_TABLES = (("vaccine", "vaccines"), ("feed", "feeds"), ("fertiliser", "fertilisers"), ("fuel", "fuels"))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('stock_ledger') as batch:
+        batch.add_column(sa.Column('category', sa.String(length=16), nullable=True))
+        batch.add_column(sa.Column('item_id', sa.Integer(), nullable=True))
+        batch.add_column(sa.Column('event_date', sa.DateTime(), nullable=True))
+
+    op.execute("UPDATE stock_ledger SET category = 'vaccine', item_id = vaccine_id, event_date = created_at")
+
+    with op.batch_alter_table('stock_ledger') as batch:
+        batch.drop_index('ix_stock_ledger_vaccine_id')
+        batch.drop_column('vaccine_id')
+        batch.alter_column('category', existing_type=sa.String(length=16), nullable=False)
+        batch.alter_column('item_id', existing_type=sa.Integer(), nullable=False)
+        batch.alter_column('event_date', existing_type=sa.DateTime(), nullable=False)
+    op.create_index('ix_stock_ledger_item', 'stock_ledger', ['category', 'item_id', 'id'])
+
+    # 1. opening rows: current_stock minus everything the history explains
+    for category, table in ITEM_TABLES:
+        op.execute(f"""
+            INSERT INTO stock_ledger (category, item_id, delta, reason, ref_type, event_date, created_at)
+            SELECT '{category}', i.id,
+                   COALESCE(i.current_stock, 0) - COALESCE(m.total, 0),
+                   'Opening balance', 'opening',
+                   COALESCE(m.first_date, CURRENT_TIMESTAMP), CURRENT_TIMESTAMP
+              FROM {table} i
+              LEFT JOIN (
+                    SELECT item_id, SUM(delta) AS total, MIN(event_date) AS first_date
+                      FROM ({MOVEMENTS}) mv
+                     WHERE category = '{category}'
+                     GROUP BY item_id
+              ) m ON m.item_id = i.id
+             WHERE COALESCE(i.current_stock, 0) - COALESCE(m.total, 0) <> 0
+        """)
+
+    # 2. historical movements in date order, so ids follow time
+    op.execute(f"""
+        INSERT INTO stock_ledger (category, item_id, delta, reason, ref_type, ref_id, event_date, created_at)
+        SELECT category, item_id, delta, reason, ref_type, ref_id, event_date, CURRENT_TIMESTAMP
+          FROM ({MOVEMENTS}) mv
+         ORDER BY event_date, ref_id
+    """)
+
+    # 3. running balances
+    op.execute("""
+        UPDATE stock_ledger SET balance_after = (
+            SELECT SUM(l2.delta) FROM stock_ledger l2
+             WHERE l2.category = stock_ledger.category
+               AND l2.item_id = stock_ledger.item_id
+               AND l2.id <= stock_ledger.id
+        )
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # the old table only ever held vaccine rows; drop what upgrade() and the new code wrote
+    op.execute(
+        "DELETE FROM stock_ledger WHERE category <> 'vaccine' "
+        "OR ref_type IN ('opening', 'adjustment', 'vaccine_event', 'vaccine_waste', 'vaccination', "
+        "'vaccination_group', 'vaccination_animal')"
+    )
+    op.drop_index('ix_stock_ledger_item', table_name='stock_ledger')
+    with op.batch_alter_table('stock_ledger') as batch:
+        batch.add_column(sa.Column('vaccine_id', sa.Integer(), nullable=True))
+    op.execute("UPDATE stock_ledger SET vaccine_id = item_id")
+    with op.batch_alter_table('stock_ledger') as batch:
+        batch.alter_column('vaccine_id', existing_type=sa.Integer(), nullable=False)
+        batch.drop_column('event_date')
+        batch.drop_column('item_id')
+        batch.drop_column('category')
+        batch.create_index('ix_stock_ledger_vaccine_id', ['vaccine_id'])
@@ -0,0 +1,46 @@
+"""stock balance checkpoints
+
+Revision ID: 0020_stock_checkpoints
+Revises: 0019_unified_stock_ledger
+Create Date: 2026-10-18
+
+Adds stock_checkpoints (end-of-day balance per item) and an index on
+stock_ledger (category, item_id, event_date) for the "movements after the
+checkpoint" sums. Checkpoints are written by backend.services.stock_checkpoints.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0020_stock_checkpoints'
+down_revision: Union[str, Sequence[str], None] = '0019_unified_stock_ledger'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'stock_checkpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('category', sa.String(length=16), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('as_of', sa.Date(), nullable=False),
+        sa.Column('cutoff', sa.DateTime(), nullable=False),
+        sa.Column('balance', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('category', 'item_id', 'cutoff', name='uq_stock_checkpoints_item_cutoff'),
+    )
+    op.create_index(op.f('ix_stock_checkpoints_id'), 'stock_checkpoints', ['id'], unique=False)
+    op.create_index('ix_stock_ledger_item_date', 'stock_ledger', ['category', 'item_id', 'event_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stock_ledger_item_date', table_name='stock_ledger')
+    op.drop_index(op.f('ix_stock_checkpoints_id'), table_name='stock_checkpoints')
+    op.drop_table('stock_checkpoints')
@@ -0,0 +1,57 @@
+"""stocktake book value and variance
+
+Revision ID: 0021_stocktake_reconciliation
+Revises: 0020_stock_checkpoints
+Create Date: 2026-10-18
+
+Adds book_stock / variance / adjustment_posted to the four stocktake tables
+and fills book_stock from the ledger balance at each stocktake date.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0021_stocktake_reconciliation'
+down_revision: Union[str, Sequence[str], None] = '0020_stock_checkpoints'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# table -> (ledger category, item id column)
+STOCKTAKES = {
+    'vaccine_stocktake_events': ('vaccine', 'vaccine_id'),
+    'feed_stocktake_events': ('feed', 'feed_id'),
+    'fertiliser_stocktake_events': ('fertiliser', 'fertiliser_id'),
+    'fuel_stocktake_events': ('fuel', 'fuel_id'),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, (category, item_col) in STOCKTAKES.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('book_stock', sa.Float(), nullable=True))
+            batch_op.add_column(sa.Column('variance', sa.Float(), nullable=True))
+            batch_op.add_column(sa.Column('adjustment_posted', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+        op.execute(f"""
+            UPDATE {table}
+               SET book_stock = (
+                   SELECT COALESCE(SUM(l.delta), 0.0) FROM stock_ledger l
+                    WHERE l.category = '{category}' AND l.item_id = {table}.{item_col}
+                      AND l.event_date <= {table}.date
+               )
+        """)
+        op.execute(f"UPDATE {table} SET variance = recorded_stock - book_stock")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in STOCKTAKES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('adjustment_posted')
+            batch_op.drop_column('variance')
+            batch_op.drop_column('book_stock')
@@ -0,0 +1,68 @@
+"""feed mix recipes
+
+Revision ID: 0022_feed_recipes
+Revises: 0021_stocktake_reconciliation
+Create Date: 2026-10-18
+
+Adds feed_recipes / feed_recipe_components and fills output_feed_id on old
+mix events from their "Used in mix for feed N" reason text.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0022_feed_recipes'
+down_revision: Union[str, Sequence[str], None] = '0021_stocktake_reconciliation'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PREFIX = 'Used in mix for feed '
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'feed_recipes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('output_feed_id', sa.Integer(), nullable=False),
+        sa.Column('output_amount', sa.Float(), nullable=False),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['output_feed_id'], ['feeds.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+    )
+    op.create_index(op.f('ix_feed_recipes_id'), 'feed_recipes', ['id'], unique=False)
+    op.create_index(op.f('ix_feed_recipes_output_feed_id'), 'feed_recipes', ['output_feed_id'], unique=False)
+    op.create_table(
+        'feed_recipe_components',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recipe_id', sa.Integer(), nullable=False),
+        sa.Column('feed_id', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['feed_id'], ['feeds.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['recipe_id'], ['feed_recipes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_feed_recipe_components_id'), 'feed_recipe_components', ['id'], unique=False)
+    op.create_index(op.f('ix_feed_recipe_components_recipe_id'), 'feed_recipe_components', ['recipe_id'], unique=False)
+
+    op.execute(f"""
+        UPDATE feed_events
+           SET output_feed_id = CAST(SUBSTR(reason, {len(PREFIX) + 1}) AS INTEGER)
+         WHERE event_type = 'mix' AND output_feed_id IS NULL AND reason LIKE '{PREFIX}%'
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_feed_recipe_components_recipe_id'), table_name='feed_recipe_components')
+    op.drop_index(op.f('ix_feed_recipe_components_id'), table_name='feed_recipe_components')
+    op.drop_table('feed_recipe_components')
+    op.drop_index(op.f('ix_feed_recipes_output_feed_id'), table_name='feed_recipes')
+    op.drop_index(op.f('ix_feed_recipes_id'), table_name='feed_recipes')
+    op.drop_table('feed_recipes')
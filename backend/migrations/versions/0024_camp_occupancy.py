@@ -0,0 +1,56 @@
+"""camp occupancy intervals
+
+Revision ID: 0024_camp_occupancy
+Revises: 0023_idempotency_keys
+Create Date: 2026-10-18
+
+One row per stay of a group in a camp, backfilled from group_movement_events:
+each move opens [date, next move of the same group).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0024_camp_occupancy'
+down_revision: Union[str, Sequence[str], None] = '0023_idempotency_keys'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'camp_occupancy',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('group_id', sa.Integer(), nullable=False),
+        sa.Column('camp_id', sa.Integer(), nullable=False),
+        sa.Column('start_at', sa.DateTime(), nullable=False),
+        sa.Column('end_at', sa.DateTime(), nullable=True),
+        sa.Column('movement_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['camp_id'], ['camps.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['movement_id'], ['group_movement_events.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_camp_occupancy_id'), 'camp_occupancy', ['id'], unique=False)
+    op.create_index('ix_camp_occupancy_camp_interval', 'camp_occupancy', ['camp_id', 'start_at', 'end_at'], unique=False)
+    op.create_index('ix_camp_occupancy_group_interval', 'camp_occupancy', ['group_id', 'start_at'], unique=False)
+
+    op.execute("""
+        INSERT INTO camp_occupancy (group_id, camp_id, start_at, end_at, movement_id)
+        SELECT group_id, to_camp_id, date,
+               LEAD(date) OVER (PARTITION BY group_id ORDER BY date, id),
+               id
+          FROM group_movement_events
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_camp_occupancy_group_interval', table_name='camp_occupancy')
+    op.drop_index('ix_camp_occupancy_camp_interval', table_name='camp_occupancy')
+    op.drop_index(op.f('ix_camp_occupancy_id'), table_name='camp_occupancy')
+    op.drop_table('camp_occupancy')
@@ -0,0 +1,29 @@
+"""camp grazeable area
+
+Revision ID: 0025_camp_area
+Revises: 0024_camp_occupancy
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0025_camp_area'
+down_revision: Union[str, Sequence[str], None] = '0024_camp_occupancy'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('camps', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('area_ha', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('camps', schema=None) as batch_op:
+        batch_op.drop_column('area_ha')
@@ -0,0 +1,50 @@
+"""camp boundaries and bounding-box R-tree
+
+Revision ID: 0026_camp_boundaries
+Revises: 0025_camp_area
+Create Date: 2026-10-18
+
+Adds the GeoJSON boundary and its bounding box to camps. On SQLite the boxes
+are also indexed in the camp_rtree R-tree virtual table; other databases get a
+plain index on the box corners.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0026_camp_boundaries'
+down_revision: Union[str, Sequence[str], None] = '0025_camp_area'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('camps', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('boundary', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('min_lon', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('min_lat', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('max_lon', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('max_lat', sa.Float(), nullable=True))
+
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS camp_rtree USING rtree(id, min_lon, max_lon, min_lat, max_lat)")
+    else:
+        op.create_index('ix_camps_bbox', 'camps', ['min_lon', 'max_lon', 'min_lat', 'max_lat'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS camp_rtree")
+    else:
+        op.drop_index('ix_camps_bbox', table_name='camps')
+    with op.batch_alter_table('camps', schema=None) as batch_op:
+        batch_op.drop_column('max_lat')
+        batch_op.drop_column('max_lon')
+        batch_op.drop_column('min_lat')
+        batch_op.drop_column('min_lon')
+        batch_op.drop_column('boundary')
@@ -0,0 +1,41 @@
+"""postgres: jsonb calves_tags and GIN index
+
+Revision ID: 0027_postgres_jsonb
+Revises: 0026_camp_boundaries
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0027_postgres_jsonb'
+down_revision: Union[str, Sequence[str], None] = '0026_camp_boundaries'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # 0004 added calves_tags as plain json; GIN containment needs jsonb
+    op.execute(
+        "ALTER TABLE animals ALTER COLUMN calves_tags TYPE jsonb USING calves_tags::jsonb"
+    )
+    op.create_index(
+        'ix_animals_calves_tags_gin', 'animals', ['calves_tags'],
+        postgresql_using='gin', postgresql_ops={'calves_tags': 'jsonb_path_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_animals_calves_tags_gin', table_name='animals')
+    op.execute(
+        "ALTER TABLE animals ALTER COLUMN calves_tags TYPE json USING calves_tags::json"
+    )
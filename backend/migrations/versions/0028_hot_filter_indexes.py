@@ -0,0 +1,55 @@
+"""indexes for the hot router filters
+
+Revision ID: 0028_hot_filter_indexes
+Revises: 0027_postgres_jsonb
+Create Date: 2026-10-19
+
+Matched to the queries the routers run (checked with backend.bench.plans):
+live animals by group / camp (partial on deceased = false), weights and
+animal history per animal in date order, latest vaccination per
+(animal, vaccine), vaccinations by date and group moves in date order.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0028_hot_filter_indexes'
+down_revision: Union[str, Sequence[str], None] = '0027_postgres_jsonb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LIVE_SQLITE = sa.text('deceased = 0')
+LIVE_POSTGRES = sa.text('NOT deceased')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_animals_group_id'), 'animals', ['group_id'], unique=False)
+    op.create_index(op.f('ix_animals_camp_id'), 'animals', ['camp_id'], unique=False)
+    op.create_index(op.f('ix_animals_mother_id'), 'animals', ['mother_id'], unique=False)
+    op.create_index('ix_animals_group_live', 'animals', ['group_id'], unique=False,
+                    sqlite_where=LIVE_SQLITE, postgresql_where=LIVE_POSTGRES)
+    op.create_index('ix_animals_camp_live', 'animals', ['camp_id'], unique=False,
+                    sqlite_where=LIVE_SQLITE, postgresql_where=LIVE_POSTGRES)
+    op.create_index('ix_weights_animal_date', 'weights', ['animal_id', 'date'], unique=False)
+    op.create_index('ix_animal_history_animal_date', 'animal_history', ['animal_id', 'event_date'], unique=False)
+    op.create_index('ix_vaccinations_animal_vaccine_date', 'vaccinations', ['animal_id', 'vaccine_id', 'date'], unique=False)
+    op.create_index(op.f('ix_vaccinations_date'), 'vaccinations', ['date'], unique=False)
+    op.create_index('ix_group_movement_events_group_date', 'group_movement_events', ['group_id', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_group_movement_events_group_date', table_name='group_movement_events')
+    op.drop_index(op.f('ix_vaccinations_date'), table_name='vaccinations')
+    op.drop_index('ix_vaccinations_animal_vaccine_date', table_name='vaccinations')
+    op.drop_index('ix_animal_history_animal_date', table_name='animal_history')
+    op.drop_index('ix_weights_animal_date', table_name='weights')
+    op.drop_index('ix_animals_camp_live', table_name='animals')
+    op.drop_index('ix_animals_group_live', table_name='animals')
+    op.drop_index(op.f('ix_animals_mother_id'), table_name='animals')
+    op.drop_index(op.f('ix_animals_camp_id'), table_name='animals')
+    op.drop_index(op.f('ix_animals_group_id'), table_name='animals')
@@ -0,0 +1,39 @@
+"""indexes for the write paths and filtered stock routes
+
+Revision ID: 0029_write_path_indexes
+Revises: 0028_hot_filter_indexes
+Create Date: 2026-10-19
+
+Found by running backend.bench.plans over the write routes too: groups by
+camp (deleting a camp unlinks its groups), checkpoints by cutoff (the
+checkpoint job replaces a day's rows) and stocktakes by date (reconcile
+?since=).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0029_write_path_indexes'
+down_revision: Union[str, Sequence[str], None] = '0028_hot_filter_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STOCKTAKES = ('vaccine_stocktake_events', 'feed_stocktake_events', 'fertiliser_stocktake_events', 'fuel_stocktake_events')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_groups_camp_id'), 'groups', ['camp_id'], unique=False)
+    op.create_index(op.f('ix_stock_checkpoints_cutoff'), 'stock_checkpoints', ['cutoff'], unique=False)
+    for table in STOCKTAKES:
+        op.create_index(op.f(f'ix_{table}_date'), table, ['date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(STOCKTAKES):
+        op.drop_index(op.f(f'ix_{table}_date'), table_name=table)
+    op.drop_index(op.f('ix_stock_checkpoints_cutoff'), table_name='stock_checkpoints')
+    op.drop_index(op.f('ix_groups_camp_id'), table_name='groups')
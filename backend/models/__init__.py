@@ -6,6 +6,7 @@ from .animal import Animal              # noqa: F401
 from .camp import Camp                  # noqa: F401
 from .group import Group                # noqa: F401
 from .vaccine import Vaccine            # noqa: F401
-from .stock_ledger import StockLedger   # noqa: F401
-from .vaccination import Vaccination    # noqa: F401
+from .stock_ledger import StockLedger, StockCheckpoint   # noqa: F401
+from .vaccination import Vaccination, VaccinationDue    # noqa: F401
+from .idempotency import IdempotencyKey # noqa: F401
 # add any others (stocks, users, etc.)
@@ -1,7 +1,7 @@
 # backend/models/animal.py
 from datetime import datetime
 from sqlalchemy import (
-    Column, Integer, String, Date, Boolean, Text, DateTime, ForeignKey, JSON, Float
+    Column, Integer, String, Date, Boolean, Text, DateTime, ForeignKey, JSON, Float, Index, text
 )
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
@@ -16,6 +16,18 @@ history = relationship("AnimalHistory", back_populates="animal", cascade="all, d
 
 class Animal(Base):
     __tablename__ = "animals"
+    __table_args__ = (
+        # Postgres only: GIN over the JSONB list so calves_tags @> '["T1"]' is an index lookup
+        Index(
+            "ix_animals_calves_tags_gin", "calves_tags",
+            postgresql_using="gin", postgresql_ops={"calves_tags": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+        # live animals by group / camp: head counts and member lists all filter deceased = false
+        Index("ix_animals_group_live", "group_id",
+              sqlite_where=text("deceased = 0"), postgresql_where=text("NOT deceased")),
+        Index("ix_animals_camp_live", "camp_id",
+              sqlite_where=text("deceased = 0"), postgresql_where=text("NOT deceased")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     tag_number = Column(String(64), index=True)
@@ -25,8 +37,8 @@ class Animal(Base):
     pregnancy_status = Column(String(32))  # 'pregnant' | 'open' | None
 
     # add FKs so joins / referential integrity work (only if you have these tables)
-    camp_id = Column(Integer, ForeignKey("camps.id"), nullable=True)
-    group_id = Column(Integer, ForeignKey("groups.id"), nullable=True)
+    camp_id = Column(Integer, ForeignKey("camps.id"), nullable=True, index=True)
+    group_id = Column(Integer, ForeignKey("groups.id"), nullable=True, index=True)
 
     notes = Column(Text)
     photo_path = Column(String(512))
@@ -42,7 +54,7 @@ class Animal(Base):
     calves_tags = Column(JSON_COMPAT, nullable=False, default=list)  # list[str]
 
     # Optional direct mother link (self-referential)
-    mother_id = Column(Float, ForeignKey("animals.id"))
+    mother_id = Column(Float, ForeignKey("animals.id"), index=True)
     mother = relationship("Animal", remote_side=[id], uselist=False)
 
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -17,6 +17,15 @@ class Camp(Base):
     fertilised_amount = Column(Float, nullable=True)
     grazed_status = Column(String(20), default="N")  # "Y", "N", "in_progress"
     grazed_out_date = Column(Date, nullable=True)
+    area_ha = Column(Float, nullable=True)  # grazeable area, used by the rotation planner
+
+    # GeoJSON Polygon/MultiPolygon (lon/lat) and its bounding box, kept by backend.services.camp_geo.
+    # On SQLite the box is mirrored into the camp_rtree R-tree for point lookups.
+    boundary = Column(Text, nullable=True)
+    min_lon = Column(Float, nullable=True)
+    min_lat = Column(Float, nullable=True)
+    max_lon = Column(Float, nullable=True)
+    max_lat = Column(Float, nullable=True)
     notes = Column(Text, nullable=True)
 
     # One-to-many: a camp can have many animals.
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean
 from sqlalchemy.orm import relationship
 from backend.db import Base
 from datetime import datetime
@@ -31,7 +31,38 @@ class FeedStocktakeEvent(Base):
     id = Column(Integer, primary_key=True, index=True)
     feed_id = Column(Integer, ForeignKey("feeds.id", ondelete="CASCADE"), nullable=False, index=True)
     recorded_stock = Column(Float, nullable=False)  # The manually counted stock
-    date = Column(DateTime, nullable=False, default=datetime.utcnow)
+    date = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
     notes = Column(Text, nullable=True)
 
-    feed = relationship("Feed", back_populates="stocktakes")
\ No newline at end of file
+    # filled by backend.services.stock_reconcile
+    book_stock = Column(Float, nullable=True)   # ledger balance at `date`
+    variance = Column(Float, nullable=True)     # recorded_stock - book_stock
+    adjustment_posted = Column(Boolean, nullable=False, default=False)
+
+    feed = relationship("Feed", back_populates="stocktakes")
+
+class FeedRecipe(Base):
+    """A saved mix: one batch consumes the components and yields output_amount of output_feed."""
+    __tablename__ = "feed_recipes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), unique=True, nullable=False)
+    output_feed_id = Column(Integer, ForeignKey("feeds.id", ondelete="CASCADE"), nullable=False, index=True)
+    output_amount = Column(Float, nullable=False)  # per batch, in the output feed's unit
+    notes = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    components = relationship(
+        "FeedRecipeComponent", back_populates="recipe", cascade="all, delete-orphan", order_by="FeedRecipeComponent.id"
+    )
+
+
+class FeedRecipeComponent(Base):
+    __tablename__ = "feed_recipe_components"
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipe_id = Column(Integer, ForeignKey("feed_recipes.id", ondelete="CASCADE"), nullable=False, index=True)
+    feed_id = Column(Integer, ForeignKey("feeds.id", ondelete="CASCADE"), nullable=False)
+    amount = Column(Float, nullable=False)  # per batch, in the component feed's unit
+
+    recipe = relationship("FeedRecipe", back_populates="components")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean
 from backend.db import Base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -29,7 +29,12 @@ class FertiliserStocktakeEvent(Base):
     id = Column(Integer, primary_key=True, index=True)
     fertiliser_id = Column(Integer, ForeignKey("fertilisers.id", ondelete="CASCADE"), nullable=False, index=True)
     recorded_stock = Column(Float, nullable=False)  # The manually counted stock
-    date = Column(DateTime, nullable=False, default=datetime.utcnow)
+    date = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
     notes = Column(Text, nullable=True)
 
+    # filled by backend.services.stock_reconcile
+    book_stock = Column(Float, nullable=True)   # ledger balance at `date`
+    variance = Column(Float, nullable=True)     # recorded_stock - book_stock
+    adjustment_posted = Column(Boolean, nullable=False, default=False)
+
     fertiliser = relationship("Fertiliser", back_populates="stocktakes")
\ No newline at end of file
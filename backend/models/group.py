@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from backend.db import Base
 
@@ -8,7 +8,7 @@ class Group(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, index=True)
-    camp_id = Column(Integer, ForeignKey("camps.id"), nullable=True)
+    camp_id = Column(Integer, ForeignKey("camps.id"), nullable=True, index=True)
     notes = Column(Text, nullable=True)
 
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -23,6 +23,9 @@ class Group(Base):
 
 class GroupMovementEvent(Base):
     __tablename__ = "group_movement_events"
+    __table_args__ = (
+        Index("ix_group_movement_events_group_date", "group_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     group_id = Column(Integer, ForeignKey("groups.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -30,3 +33,21 @@ class GroupMovementEvent(Base):
     to_camp_id = Column(Integer, ForeignKey("camps.id"), nullable=False)
     date = Column(DateTime, nullable=False, default=datetime.utcnow)
     reason = Column(Text, nullable=True)
+
+class CampOccupancy(Base):
+    """
+    Derived from GroupMovementEvent by backend.services.occupancy: group was in
+    camp from start_at until end_at (NULL while it is still there).
+    """
+    __tablename__ = "camp_occupancy"
+    __table_args__ = (
+        Index("ix_camp_occupancy_camp_interval", "camp_id", "start_at", "end_at"),
+        Index("ix_camp_occupancy_group_interval", "group_id", "start_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    group_id = Column(Integer, ForeignKey("groups.id", ondelete="CASCADE"), nullable=False)
+    camp_id = Column(Integer, ForeignKey("camps.id", ondelete="CASCADE"), nullable=False)
+    start_at = Column(DateTime, nullable=False)
+    end_at = Column(DateTime, nullable=True)
+    movement_id = Column(Integer, ForeignKey("group_movement_events.id", ondelete="SET NULL"), nullable=True)
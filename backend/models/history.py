@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from backend.db import Base
 
 class AnimalHistory(Base):
     __tablename__ = "animal_history"
+    __table_args__ = (
+        Index("ix_animal_history_animal_date", "animal_id", "event_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     animal_id = Column(Integer, ForeignKey("animals.id"), nullable=False)
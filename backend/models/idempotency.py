@@ -0,0 +1,21 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, LargeBinary
+from backend.db import Base
+
+class IdempotencyKey(Base):
+    """
+    One client-supplied Idempotency-Key and the response it produced, kept by
+    backend.middleware.idempotency so retried POSTs replay instead of re-running.
+    """
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(128), unique=True, nullable=False)
+    request_hash = Column(String(64), nullable=False)  # sha256 of method, path, query and body
+
+    completed = Column(Boolean, nullable=False, default=False)
+    status_code = Column(Integer, nullable=True)
+    headers = Column(Text, nullable=True)       # JSON list of [name, value]
+    body = Column(LargeBinary, nullable=True)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
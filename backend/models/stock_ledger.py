@@ -1,29 +1,54 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, Index, UniqueConstraint
 from backend.db import Base
 
 class StockLedger(Base):
     """
-    Optional stock movement log for vaccines.
-    Records every increment/decrement so you can audit stock.
+    Stock movement log for every stock category ("vaccine", "feed", "fertiliser", "fuel").
+    One row per change to an item's current_stock, written by backend.services.stock,
+    so an item's movement history is a range scan on (category, item_id, id).
     """
     __tablename__ = "stock_ledger"
+    __table_args__ = (
+        Index("ix_stock_ledger_item", "category", "item_id", "id"),
+        Index("ix_stock_ledger_item_date", "category", "item_id", "event_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    vaccine_id = Column(Integer, ForeignKey("vaccines.id", ondelete="CASCADE"), nullable=False, index=True)
+    category = Column(String(16), nullable=False)
+    item_id = Column(Integer, nullable=False)
 
     # +ve for additions, -ve for consumption
     delta = Column(Float, nullable=False)
 
     reason = Column(String(255), nullable=True)   # e.g., "group vaccination", "manual", "adjustment"
-    ref_type = Column(String(32), nullable=True)  # e.g., "vaccination_group", "vaccination_animal", "adjustment"
-    ref_id = Column(Integer, nullable=True)       # optional external id
+    ref_type = Column(String(32), nullable=True)  # e.g., "feed_event", "vaccination_group", "opening"
+    ref_id = Column(Integer, nullable=True)       # id of the source row (event, vaccination, group)
 
+    event_date = Column(DateTime, nullable=False, default=datetime.utcnow)  # business date of the movement
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
-    # optional running totals
+    # item balance right after this movement
     balance_after = Column(Float, nullable=True)
 
-    # relationships
-    vaccine = relationship("Vaccine", back_populates="stock_movements")
+
+class StockCheckpoint(Base):
+    """
+    Balance of one stock item at the end of a day, written by
+    backend.services.stock_checkpoints. Balance "as of" any date is the nearest
+    checkpoint plus the ledger movements after it.
+    """
+    __tablename__ = "stock_checkpoints"
+    __table_args__ = (
+        UniqueConstraint("category", "item_id", "cutoff", name="uq_stock_checkpoints_item_cutoff"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    category = Column(String(16), nullable=False)
+    item_id = Column(Integer, nullable=False)
+
+    as_of = Column(Date, nullable=False)        # balance at the end of this day
+    cutoff = Column(DateTime, nullable=False, index=True)   # as_of + 1 day: movements before this are included
+    balance = Column(Float, nullable=False)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
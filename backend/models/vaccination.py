@@ -1,10 +1,14 @@
 from datetime import date, datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Date, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Date, Text, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from backend.db import Base
 
 class Vaccination(Base):
     __tablename__ = "vaccinations"
+    __table_args__ = (
+        # latest dose per (animal, vaccine): coverage and the due-date schedule
+        Index("ix_vaccinations_animal_vaccine_date", "animal_id", "vaccine_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -12,7 +16,7 @@ class Vaccination(Base):
     vaccine_id = Column(Integer, ForeignKey("vaccines.id", ondelete="CASCADE"), nullable=False, index=True)
     group_id = Column(Integer, ForeignKey("groups.id", ondelete="SET NULL"), nullable=True, index=True)  # Optional: for group vaccinations
 
-    date = Column(Date, nullable=False)
+    date = Column(Date, nullable=False, index=True)
     dose = Column(Float, nullable=False)        # amount administered to this animal
     method = Column(String(64), nullable=True)  # e.g., "IM", "SC", "oral"
     source = Column(String(16), nullable=True)  # "group" | "manual"
@@ -23,4 +27,24 @@ class Vaccination(Base):
     # relationships
     animal = relationship("Animal")  # add back_populates on Animal if you want reverse access
     vaccine = relationship("Vaccine", back_populates="vaccinations")
-    group = relationship("Group")    # Optional: for group vaccinations
\ No newline at end of file
+    group = relationship("Group")    # Optional: for group vaccinations
+
+class VaccinationDue(Base):
+    """
+    Next due date per (animal, vaccine), maintained by
+    backend.services.vaccination_schedule whenever vaccinations are recorded.
+    """
+    __tablename__ = "vaccination_due"
+    __table_args__ = (
+        UniqueConstraint("animal_id", "vaccine_id", name="uq_vaccination_due_animal_vaccine"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    animal_id = Column(Integer, ForeignKey("animals.id", ondelete="CASCADE"), nullable=False)
+    vaccine_id = Column(Integer, ForeignKey("vaccines.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    last_date = Column(Date, nullable=True)   # latest vaccination, None if never vaccinated
+    due_date = Column(Date, nullable=False, index=True)
+    kind = Column(String(16), nullable=False)  # "first_dose" | "booster"
+
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
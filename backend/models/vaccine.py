@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean
 from backend.db import Base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -12,7 +12,11 @@ class Vaccine(Base):
     unit = Column(String(20), nullable=False)  # e.g. mL, dose
     methods = Column(Text, nullable=True)      # store as JSON string
     current_stock = Column(Float, default=0.0)
-    stock_movements = relationship("StockLedger", back_populates="vaccine", cascade="all, delete-orphan")
+
+    # Scheduling rules (used by the vaccination due-date engine)
+    first_dose_age_days = Column(Integer, nullable=True)    # age at first dose, e.g. 90
+    booster_interval_days = Column(Integer, nullable=True)  # days between boosters, e.g. 365
+
     vaccinations = relationship("Vaccination", back_populates="vaccine", cascade="all, delete-orphan")
     events = relationship("VaccineEvent", back_populates="vaccine", cascade="all, delete-orphan")
     notes = Column(Text, nullable=True)
@@ -45,7 +49,12 @@ class VaccineStocktakeEvent(Base):
     id = Column(Integer, primary_key=True, index=True)
     vaccine_id = Column(Integer, ForeignKey("vaccines.id", ondelete="CASCADE"), nullable=False, index=True)
     recorded_stock = Column(Float, nullable=False)  # The manually counted stock
-    date = Column(DateTime, nullable=False, default=datetime.utcnow)
+    date = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
     notes = Column(Text, nullable=True)
 
+    # filled by backend.services.stock_reconcile
+    book_stock = Column(Float, nullable=True)   # ledger balance at `date`
+    variance = Column(Float, nullable=True)     # recorded_stock - book_stock
+    adjustment_posted = Column(Boolean, nullable=False, default=False)
+
     vaccine = relationship("Vaccine", back_populates="stocktakes")
\ No newline at end of file
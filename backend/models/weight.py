@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from backend.db import Base
 
 class Weight(Base):
     __tablename__ = "weights"
+    __table_args__ = (
+        Index("ix_weights_animal_date", "animal_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True)
     animal_id = Column(Integer, ForeignKey("animals.id"), nullable=False)
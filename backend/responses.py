@@ -0,0 +1,81 @@
+"""
+Fast JSON for the large list endpoints.
+
+A dict or list returned from an endpoint without a response_model goes
+through jsonable_encoder before it is rendered, which walks every value in
+Python and dominates the cost of a long listing. Endpoints that return
+FastJSONResponse skip that step:
+
+- rows are selected as column tuples, not ORM objects
+- `row_encoder(keys)` turns them into dicts with one dict(zip()) per row
+- orjson renders the result, writing dates and datetimes natively
+  (ISO 8601, as jsonable_encoder did)
+
+orjson is optional: without it the stdlib json module renders the same
+output, more slowly. Endpoints with a response_model are left as they
+are, because FastAPI already dumps those to bytes through Pydantic. A global
+default_response_class would switch that fast path off.
+"""
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable, Iterable, List, Sequence, Tuple
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def _default(o: Any):
+    if isinstance(o, (date, datetime, time)):
+        return o.isoformat()
+    if isinstance(o, Decimal):
+        return float(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson (stdlib json without it); content must already be plain data."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def row_encoder(keys: Sequence[str], **convert: Callable[[Any], Any]) -> Callable[[Iterable[Sequence]], List[dict]]:
+    """
+    encode(rows) -> list of dicts keyed by `keys`, for rows selected in that column order.
+    `convert` maps a key to a function applied to its value (e.g. to decode a JSON text column).
+    """
+    keys = tuple(keys)
+    if not convert:
+        def encode(rows):
+            return [dict(zip(keys, row)) for row in rows]
+        return encode
+
+    fixes = tuple(convert.items())
+
+    def encode(rows):
+        out = []
+        for row in rows:
+            d = dict(zip(keys, row))
+            for key, fn in fixes:
+                d[key] = fn(d[key])
+            out.append(d)
+        return out
+    return encode
+
+
+def table_columns(model) -> Tuple[Tuple[str, ...], tuple]:
+    """(keys, column attributes) for every column of `model` in table order, the fields a returned ORM object had."""
+    keys = tuple(c.key for c in model.__table__.columns)
+    return keys, tuple(getattr(model, k) for k in keys)
@@ -0,0 +1,33 @@
+# backend/routers/analytics.py
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from backend.db import get_db
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+# ---------- Routes ----------
+@router.get("/growth")
+def growth(
+    db: Session = Depends(get_db),
+    group_id: Optional[int] = Query(None),
+    camp_id: Optional[int] = Query(None),
+    model: str = Query("linear", pattern="^(linear|gompertz)$"),
+    target_date: Optional[str] = Query(None),  # 'YYYY-MM-DD', e.g. planned sale date
+):
+    """
+    Average daily gain per animal / group / camp for live animals, with optional
+    projected weights at `target_date`. Results are cached per group (in each
+    worker process) and dropped when that group's weights, members or camp change.
+    """
+    target = None
+    if target_date:
+        try:
+            target = datetime.strptime(target_date, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="target_date must be YYYY-MM-DD")
+    from backend.services.growth import cached_growth   # NumPy; imported on first use to keep startup fast
+    return cached_growth(db, group_id=group_id, camp_id=camp_id, model=model, target_date=target)
@@ -3,28 +3,24 @@ from datetime import datetime
 import os
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
 from pydantic import BaseModel, Field, ConfigDict, field_validator
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import exists, func, select, type_coerce
 
-from backend.db import SessionLocal             # ✅ correct import
+from backend.db import get_async_db, get_db             # ✅ correct import
 from backend.models.animal import Animal
 from backend.models.history import AnimalHistory
+from backend.responses import FastJSONResponse, row_encoder
+from backend.services.growth_cache import invalidate_groups
+from backend.services.vaccination_schedule import refresh_due_dates
 
-MEDIA_PHOTOS_DIR = "backend/media/photos"
-os.makedirs(MEDIA_PHOTOS_DIR, exist_ok=True)
+MEDIA_PHOTOS_DIR = "backend/media/photos"   # created on startup (backend.startup.ensure_media_dirs)
 
 router = APIRouter(prefix="/animals", tags=["animals"])
 
-# ---------- DB dependency ----------
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # ---------- Schemas ----------
 class AnimalIn(BaseModel):
     tag_number: Optional[str] = None
@@ -161,6 +157,14 @@ def _link_mother_to_calves(db: Session, mother: Animal):
         calf.mother_id = mother.id
         calf.touch()
 
+def _has_calf_tag(db: Session | AsyncSession, tag: str):
+    """WHERE clause: the animal's calves_tags list contains `tag`."""
+    if db.get_bind().dialect.name == "postgresql":
+        # JSONB containment, served by ix_animals_calves_tags_gin
+        return type_coerce(Animal.calves_tags, JSONB).contains([tag])
+    tags = func.json_each(Animal.calves_tags).table_valued("value")
+    return exists(select(1).select_from(tags).where(tags.c.value == tag))
+
 def _serialize(a: Animal) -> dict:
     """Return plain JSON-safe dict for frontend."""
     return {
@@ -190,17 +194,35 @@ def _serialize(a: Animal) -> dict:
         "pregnancy_date": a.pregnancy_date.isoformat() if a.pregnancy_date else None,
     }
 
+# list_animals reads these columns as tuples instead of loading Animal objects; same keys as _serialize
+ANIMAL_LIST_KEYS = (
+    "id", "tag_number", "name", "sex", "birth_date", "pregnancy_status", "camp_id", "group_id",
+    "notes", "photo_path", "deceased", "killed", "death_reason", "has_calved", "calves_count",
+    "calves_tags", "mother_id", "created_at", "updated_at", "current_weight", "weight_date",
+    "pregnant", "pregnancy_duration", "pregnancy_date",
+)
+_animal_list_columns = tuple(getattr(Animal, k) for k in ANIMAL_LIST_KEYS)
+_encode_animals = row_encoder(ANIMAL_LIST_KEYS)
+
 # ---------- Routes ----------
 @router.get("/")
-def list_animals(db: Session = Depends(get_db)):
-    rows = db.execute(select(Animal).order_by(Animal.id.desc())).scalars().all()
-    return [_serialize(a) for a in rows]
+async def list_animals(
+    calf_tag: Optional[str] = Query(None, description="Only animals whose calves_tags include this tag"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    q = select(*_animal_list_columns)
+    if calf_tag:
+        q = q.where(_has_calf_tag(db, calf_tag.strip()))
+    rows = (await db.execute(q.order_by(Animal.id.desc()))).all()
+    return FastJSONResponse(_encode_animals(rows))
 
 @router.post("/", response_model=AnimalOut, status_code=status.HTTP_201_CREATED)
 def create_animal(payload: AnimalIn, db: Session = Depends(get_db)):
     a = Animal()
     _apply_incoming(a, payload)
     db.add(a)
+    db.flush()
+    refresh_due_dates(db, animal_ids=[a.id])
     db.commit()
     db.refresh(a)
 
@@ -210,16 +232,18 @@ def create_animal(payload: AnimalIn, db: Session = Depends(get_db)):
         db.commit()
         db.refresh(a)
 
-    # Pydantic v2 friendly serialization
-    out = AnimalOut.model_validate(_serialize(a))
-    return out
+    return _serialize(a)   # validated and dumped once, by response_model
 
 @router.patch("/{animal_id}", response_model=AnimalOut)
 def update_animal(animal_id: int, payload: AnimalIn, db: Session = Depends(get_db)):
     a = db.get(Animal, animal_id)
     if not a:
         raise HTTPException(status_code=404, detail="Animal not found")
+    old_group = a.group_id
     _apply_incoming(a, payload)
+    if payload.birth_date is not None:
+        db.flush()
+        refresh_due_dates(db, animal_ids=[a.id])
     db.commit()
     db.refresh(a)
 
@@ -228,8 +252,8 @@ def update_animal(animal_id: int, payload: AnimalIn, db: Session = Depends(get_d
         db.commit()
         db.refresh(a)
 
-    out = AnimalOut.model_validate(_serialize(a))
-    return out
+    invalidate_groups([old_group, a.group_id])
+    return _serialize(a)
 
 @router.post("/{animal_id}/deceased", status_code=200)
 def mark_deceased(animal_id: int, payload: DeceasedIn, db: Session = Depends(get_db)):
@@ -258,6 +282,7 @@ def mark_deceased(animal_id: int, payload: DeceasedIn, db: Session = Depends(get
     )
     db.add(history)
     db.commit()
+    invalidate_groups([a.group_id])
     return {"ok": True}
 
 @router.delete("/{animal_id}")
@@ -270,8 +295,10 @@ def delete_animal(animal_id: int, hard: bool = False, db: Session = Depends(get_
             status_code=400,
             detail="Use POST /animals/{id}/deceased or set ?hard=true to permanently delete",
         )
+    group_id = a.group_id
     db.delete(a)
     db.commit()
+    invalidate_groups([group_id])
     return {"ok": True}
 
 @router.post("/{animal_id}/upload-photo")
@@ -294,10 +321,10 @@ def upload_photo(animal_id: int, file: UploadFile = File(...), db: Session = Dep
     return {"photo_path": a.photo_path}
 
 @router.get("/{animal_id}/history")
-def get_animal_history(animal_id: int, db: Session = Depends(get_db)):
-    rows = db.execute(
+async def get_animal_history(animal_id: int, db: AsyncSession = Depends(get_async_db)):
+    rows = (await db.execute(
         select(AnimalHistory).where(AnimalHistory.animal_id == animal_id).order_by(AnimalHistory.event_date.desc())
-    ).scalars().all()
+    )).scalars().all()
     return [
         {
             "event_type": h.event_type,
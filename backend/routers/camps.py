@@ -1,25 +1,21 @@
-from typing import Optional
-from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+import json
+from datetime import date, datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from backend.db import SessionLocal
+from backend.db import get_async_db, get_db
 from backend.models.camp import Camp
 from backend.models.animal import Animal
+from backend.services.occupancy import camp_occupancy, rebuild as rebuild_occupancy
+# rotation and camp_geo (NumPy) are imported in the endpoints that use them, to keep startup fast
 
 router = APIRouter(prefix="/camps", tags=["camps"])
 
-# ---------- DB dependency ----------
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # ---------- Schemas ----------
 class CampIn(BaseModel):
     name: Optional[str] = None
@@ -31,6 +27,7 @@ class CampIn(BaseModel):
     fertilised_amount: Optional[float] = None
     grazed_status: Optional[str] = "N"
     grazed_out_date: Optional[str] = None
+    area_ha: Optional[float] = None
     notes: Optional[str] = None
 
 class CampOut(BaseModel):
@@ -45,6 +42,7 @@ class CampOut(BaseModel):
     fertilised_amount: Optional[float] = None
     grazed_status: Optional[str] = "N"
     grazed_out_date: Optional[str] = None
+    area_ha: Optional[float] = None
     animal_count: int = 0
     notes: Optional[str] = None
 
@@ -83,21 +81,22 @@ def _out(db: Session, c: Camp) -> CampOut:
         fertilised_amount=getattr(c, "fertilised_amount", None),
         grazed_status=getattr(c, "grazed_status", "N"),
         grazed_out_date=str(getattr(c, "grazed_out_date", "")) if getattr(c, "grazed_out_date", None) else None,
+        area_ha=getattr(c, "area_ha", None),
         animal_count=_count_animals_in_camp(db, c.id),
         notes=getattr(c, "notes", None)
     )
 
 # ---------- Routes ----------
 @router.get("/")
-def list_camps(db: Session = Depends(get_db)):
+async def list_camps(db: AsyncSession = Depends(get_async_db)):
     counts = dict(
-        db.execute(
+        (await db.execute(
             select(Animal.camp_id, func.count(Animal.id))
             .where(Animal.deceased == False)
             .group_by(Animal.camp_id)
-        ).all()
+        )).all()
     )
-    camps = db.execute(select(Camp).order_by(Camp.name)).scalars().all()
+    camps = (await db.execute(select(Camp).order_by(Camp.name))).scalars().all()
     return [
         {
             "id": c.id,
@@ -110,6 +109,7 @@ def list_camps(db: Session = Depends(get_db)):
             "fertilised_amount": getattr(c, "fertilised_amount", None),
             "grazed_status": getattr(c, "grazed_status", "N"),
             "grazed_out_date": str(getattr(c, "grazed_out_date", "")) if getattr(c, "grazed_out_date", None) else None,
+            "area_ha": getattr(c, "area_ha", None),
             "animal_count": int(counts.get(c.id, 0)),
             "notes": getattr(c, "notes", None),
         }
@@ -131,6 +131,7 @@ def create_camp(payload: CampIn, db: Session = Depends(get_db)):
         fertilised_amount=payload.fertilised_amount,
         grazed_status=payload.grazed_status,
         grazed_out_date=_parse_date(payload.grazed_out_date),
+        area_ha=payload.area_ha,
         notes=payload.notes,
     )
     db.add(c)
@@ -163,6 +164,8 @@ def update_camp(camp_id: int, payload: CampIn, db: Session = Depends(get_db)):
         c.grazed_status = payload.grazed_status
     if payload.grazed_out_date is not None:
         c.grazed_out_date = _parse_date(payload.grazed_out_date)
+    if payload.area_ha is not None:
+        c.area_ha = payload.area_ha
     if payload.notes is not None:
         c.notes = payload.notes
     db.commit()
@@ -174,6 +177,92 @@ def delete_camp(camp_id: int, db: Session = Depends(get_db)):
     c = db.get(Camp, camp_id)
     if not c:
         raise HTTPException(status_code=404, detail="Camp not found")
+    from backend.services.camp_geo import drop_boundary
+    drop_boundary(db, c.id)
     db.delete(c)
     db.commit()
-    return {"ok": True}
\ No newline at end of file
+    return {"ok": True}
+
+# ---------- Occupancy ----------
+@router.get("/{camp_id}/occupancy")
+async def get_camp_occupancy(
+    camp_id: int,
+    from_: Optional[date] = Query(None, alias="from"),
+    to: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Groups that were in the camp between `from` and `to` (default: the last 365 days) and the grazing days."""
+    if not await db.get(Camp, camp_id):
+        raise HTTPException(status_code=404, detail="Camp not found")
+    to = to or date.today()
+    from_ = from_ or (to - timedelta(days=365))
+    if from_ > to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    return await db.run_sync(camp_occupancy, camp_id, from_, to)
+
+@router.post("/occupancy/rebuild")
+def rebuild_camp_occupancy(db: Session = Depends(get_db)):
+    """Recreate all occupancy intervals from the group movement events."""
+    n = rebuild_occupancy(db)
+    db.commit()
+    return {"ok": True, "intervals": n}
+
+# ---------- Rotation planning ----------
+@router.get("/rotation-plan")
+def get_rotation_plan(
+    days: Optional[int] = Query(None, ge=1, le=365),   # default: rotation.HORIZON_DAYS
+    include_series: bool = False,
+    db: Session = Depends(get_db),
+):
+    """Simulated pasture cover for every camp and a proposed move schedule for the groups."""
+    from backend.services.rotation import HORIZON_DAYS, load_inputs, plan_rotation
+    return plan_rotation(load_inputs(db), horizon=days or HORIZON_DAYS, include_series=include_series)
+
+# ---------- Boundaries & GPS lookup ----------
+MAX_LOCATE_POINTS = 50000
+
+class LocateIn(BaseModel):
+    points: List[List[float]]  # [[lon, lat], ...]
+
+@router.get("/{camp_id}/boundary")
+async def get_camp_boundary(camp_id: int, db: AsyncSession = Depends(get_async_db)):
+    c = await db.get(Camp, camp_id)
+    if not c:
+        raise HTTPException(status_code=404, detail="Camp not found")
+    if not c.boundary:
+        raise HTTPException(status_code=404, detail="Camp has no boundary")
+    return json.loads(c.boundary)
+
+@router.put("/{camp_id}/boundary")
+def put_camp_boundary(camp_id: int, geojson: Dict[str, Any] = Body(...), db: Session = Depends(get_db)):
+    """Set the camp boundary from a GeoJSON Polygon/MultiPolygon (or a Feature wrapping one), in lon/lat."""
+    c = db.get(Camp, camp_id)
+    if not c:
+        raise HTTPException(status_code=404, detail="Camp not found")
+    from backend.services.camp_geo import set_boundary
+    try:
+        set_boundary(db, c, geojson)
+    except (ValueError, TypeError, IndexError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid boundary: {e}")
+    db.commit()
+    return {"ok": True, "bbox": [c.min_lon, c.min_lat, c.max_lon, c.max_lat]}
+
+@router.delete("/{camp_id}/boundary")
+def delete_camp_boundary(camp_id: int, db: Session = Depends(get_db)):
+    c = db.get(Camp, camp_id)
+    if not c:
+        raise HTTPException(status_code=404, detail="Camp not found")
+    from backend.services.camp_geo import set_boundary
+    set_boundary(db, c, None)
+    db.commit()
+    return {"ok": True}
+
+@router.post("/locate")
+def locate_points(payload: LocateIn, db: Session = Depends(get_db)):
+    """Camp id for each [lon, lat] point (null when the point is in no camp)."""
+    if len(payload.points) > MAX_LOCATE_POINTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_LOCATE_POINTS} points per request")
+    if any(len(p) != 2 for p in payload.points):
+        raise HTTPException(status_code=400, detail="Each point must be [lon, lat]")
+    from backend.services.camp_geo import locate
+    return {"camp_ids": locate(db, payload.points)}
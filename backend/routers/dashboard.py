@@ -6,21 +6,13 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy import select, func
 
-from backend.db import SessionLocal
+from backend.db import get_db
 from backend.models.animal import Animal
 from backend.models.camp import Camp
 from backend.models.vaccine import Vaccine
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
-# ---------- DB dependency ----------
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # ---------- helpers ----------
 def age_months(d: date | None) -> int:
     if not d:
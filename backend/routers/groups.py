@@ -5,26 +5,22 @@ from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from backend.db import SessionLocal                     # ✅ correct import
+from backend.db import get_async_db, get_db                     # ✅ correct import
 from backend.models.group import Group
 from backend.models.animal import Animal
 from backend.models.camp import Camp
 from backend.schemas.group import GroupMovementEventIn
 from backend.models.group import GroupMovementEvent
 from backend.models.history import AnimalHistory
+from backend.responses import FastJSONResponse, row_encoder
+from backend.services.growth_cache import invalidate_animals, invalidate_groups
+from backend.services.occupancy import record_move
 
 router = APIRouter(prefix="/groups", tags=["groups"])
 
-# ---------- DB dependency ----------
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # ---------- Schemas ----------
 class MoveCampIn(BaseModel):
     camp_id: int
@@ -56,36 +52,34 @@ def _count_members(db: Session, group_id: int) -> int:
 def _group_out(db: Session, g: Group) -> GroupOut:
     return GroupOut(id=g.id, name=g.name, camp_id=g.camp_id, animal_count=_count_members(db, g.id), notes=g.notes)
 
+# members listed per group by list_groups, read as column tuples
+MEMBER_KEYS = ("id", "tag_number", "sex", "current_weight", "pregnant", "pregnancy_duration", "pregnancy_date", "deceased")
+_member_columns = tuple(getattr(Animal, k) for k in MEMBER_KEYS)
+_encode_members = row_encoder(MEMBER_KEYS)
+
 # ---------- Routes ----------
 @router.get("/")
-def list_groups(db: Session = Depends(get_db)):
+async def list_groups(db: AsyncSession = Depends(get_async_db)):
     counts = dict(
-        db.execute(
+        (await db.execute(
             select(Animal.group_id, func.count(Animal.id))
             .where(Animal.deceased == False)
             .group_by(Animal.group_id)
-        ).all()
+        )).all()
     )
-    rows = db.execute(select(Group).order_by(Group.name)).scalars().all()
-    # Get all animals in one query
-    all_animals = db.execute(select(Animal)).scalars().all()
+    rows = (await db.execute(select(Group).order_by(Group.name))).scalars().all()
+    # Get all live members in one query
+    members = (await db.execute(
+        select(Animal.group_id, *_member_columns)
+        .where(Animal.deceased == False)  # noqa: E712
+        .order_by(Animal.id)
+    )).all()
     group_animals_map = {}
-    for a in all_animals:
-        if a.group_id not in group_animals_map:
-            group_animals_map[a.group_id] = []
-        group_animals_map[a.group_id].append({
-            "id": a.id,
-            "tag_number": a.tag_number,
-            "sex": a.sex,
-            "current_weight": a.current_weight,
-            "pregnant": a.pregnant,
-            "pregnancy_duration": a.pregnancy_duration,
-            "pregnancy_date": a.pregnancy_date.isoformat() if a.pregnancy_date else None,
-            "deceased": a.deceased,
-        })
+    for row in members:
+        group_animals_map.setdefault(row[0], []).append(row[1:])
     result = []
     for g in rows:
-        animals = [a for a in group_animals_map.get(g.id, []) if not a["deceased"]]
+        animals = _encode_members(group_animals_map.get(g.id, ()))
         weights = [a["current_weight"] for a in animals if a["current_weight"] is not None]
         avg_weight = round(sum(weights) / len(weights), 1) if weights else None
         result.append({
@@ -99,7 +93,7 @@ def list_groups(db: Session = Depends(get_db)):
             "animals": animals,
             "avg_weight": avg_weight,
         })
-    return result
+    return FastJSONResponse(result)
 
 @router.post("/", response_model=GroupOut, status_code=status.HTTP_201_CREATED)
 def create_group(payload: GroupIn, db: Session = Depends(get_db)):
@@ -118,10 +112,12 @@ def create_group(payload: GroupIn, db: Session = Depends(get_db)):
 
     # assign members if provided (ignore empty list vs None distinction)
     if payload.animal_ids:
+        invalidate_animals(db, payload.animal_ids)
         db.query(Animal).filter(Animal.id.in_(payload.animal_ids)).update(
             {Animal.group_id: g.id}, synchronize_session=False
         )
         db.commit()
+        invalidate_groups([g.id])
 
     return _group_out(db, g)
 
@@ -129,6 +125,8 @@ def create_group(payload: GroupIn, db: Session = Depends(get_db)):
 def record_group_movement(event: GroupMovementEventIn, db: Session = Depends(get_db)):
     movement = GroupMovementEvent(**event.dict())
     db.add(movement)
+    db.flush()
+    record_move(db, movement)
     db.commit()
     db.refresh(movement)
     # Optionally update the group's camp_id
@@ -136,6 +134,7 @@ def record_group_movement(event: GroupMovementEventIn, db: Session = Depends(get
     if group:
         group.camp_id = event.to_camp_id
         db.commit()
+    invalidate_groups([event.group_id])
     return movement
 
 @router.post("/{group_id}/move-camp")
@@ -157,6 +156,8 @@ def move_group_camp(group_id: int, payload: MoveCampIn, db: Session = Depends(ge
         reason="Moved via move-camp endpoint"
     )
     db.add(movement)
+    db.flush()
+    record_move(db, movement)
 
     # update group and all member animals
     g.camp_id = payload.camp_id
@@ -164,6 +165,7 @@ def move_group_camp(group_id: int, payload: MoveCampIn, db: Session = Depends(ge
         {Animal.camp_id: payload.camp_id}, synchronize_session=False
     )
     db.commit()
+    invalidate_groups([group_id])
     return {"ok": True}
 
 @router.patch("/{group_id}", response_model=GroupOut)
@@ -191,6 +193,7 @@ def update_group(group_id: int, payload: GroupIn, db: Session = Depends(get_db))
     # Membership sync if provided (None means "don't touch")
     if payload.animal_ids is not None:
         ids_set = set(payload.animal_ids or [])
+        invalidate_animals(db, ids_set)     # the groups new members come from
         if ids_set:
             # Clear members no longer in the set
             db.query(Animal).filter(
@@ -207,6 +210,7 @@ def update_group(group_id: int, payload: GroupIn, db: Session = Depends(get_db))
                 {Animal.group_id: None}, synchronize_session=False
             )
         db.commit()
+        invalidate_groups([g.id, None])
 
     return _group_out(db, g)
 
@@ -222,22 +226,23 @@ def delete_group(group_id: int, db: Session = Depends(get_db)):
     )
     db.delete(g)
     db.commit()
+    invalidate_groups([group_id, None])
     return {"ok": True}
 
 @router.get("/{group_id}/weight-history")
-def group_weight_history(group_id: int, db: Session = Depends(get_db)):
+async def group_weight_history(group_id: int, db: AsyncSession = Depends(get_async_db)):
     # Get all weights for animals in the group
-    animals = db.execute(select(Animal).where(Animal.group_id == group_id, Animal.deceased == False)).scalars().all()
+    animals = (await db.execute(select(Animal).where(Animal.group_id == group_id, Animal.deceased == False))).scalars().all()
     animal_ids = [a.id for a in animals]
     if not animal_ids:
         return []
     from backend.models.weight import Weight
-    weights = db.execute(
+    weights = (await db.execute(
         select(Weight.date, func.avg(Weight.weight))
         .where(Weight.animal_id.in_(animal_ids))
         .group_by(Weight.date)
         .order_by(Weight.date.desc())
-    ).all()
+    )).all()
     return [{"date": d.isoformat(), "avg_weight": round(avg, 1) if avg else None} for d, avg in weights]
 
 @router.post("/{group_id}/slaughter")
@@ -270,4 +275,5 @@ def group_slaughter(group_id: int, payload: dict, db: Session = Depends(get_db))
         )
         db.add(history)
         db.commit()
+    invalidate_groups([group_id])
     return {"ok": True, "count": len(animals)}
\ No newline at end of file
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from backend.db import SessionLocal
+from backend.db import get_async_db
 from backend.models.vaccine import VaccineEvent, VaccineWasteEvent, Vaccine, VaccineStocktakeEvent
 from backend.models.feed import FeedEvent, Feed, FeedStocktakeEvent
 from backend.models.fertiliser import FertiliserEvent, Fertiliser, FertiliserStocktakeEvent
@@ -8,20 +9,13 @@ from backend.models.fuel import FuelEvent, Fuel, FuelStocktakeEvent
 from backend.models.group import GroupMovementEvent, Group
 from backend.models.camp import Camp
 from backend.models.history import AnimalHistory
+from backend.responses import FastJSONResponse
 from datetime import date, datetime
 # import AnimalEvent if you have one
 
 router = APIRouter(prefix="/history", tags=["history"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-@router.get("/")
-def get_all_events(db: Session = Depends(get_db)):
+def _all_events(db: Session):
     events = []
     # Group movement events (Animal filter)
     for e in db.query(GroupMovementEvent).all():
@@ -75,7 +69,8 @@ def get_all_events(db: Session = Depends(get_db)):
             "type": "vaccine_stocktake",
             "event_type": "stocktake",
             "amount": e.recorded_stock,
-            "current_stock": vaccine.current_stock,
+            "book_stock": e.book_stock,
+            "variance": e.variance,
             "unit": vaccine.unit if vaccine else "",
             "date": e.date,
             "reason": e.notes,
@@ -86,14 +81,17 @@ def get_all_events(db: Session = Depends(get_db)):
     for e in db.query(FeedEvent).all():
         feed = db.get(Feed, e.feed_id)
         reason = e.reason
-        if reason and reason.startswith("Used in mix for feed "):
+        target_id = e.output_feed_id
+        if target_id is None and reason and reason.startswith("Used in mix for feed "):
+            # rows written before mix events carried output_feed_id
             try:
                 target_id = int(reason.split("Used in mix for feed ")[1])
-                target_feed = db.get(Feed, target_id)
-                if target_feed:
-                    reason = f"Used in mix for {target_feed.name}"
-            except Exception:
+            except ValueError:
                 pass
+        if e.event_type == "mix" and target_id is not None:
+            target_feed = db.get(Feed, target_id)
+            if target_feed:
+                reason = f"Used in mix for {target_feed.name}"
         events.append({
             "id": e.id,
             "type": "feed",
@@ -104,6 +102,7 @@ def get_all_events(db: Session = Depends(get_db)):
             "reason": reason,
             "item_id": e.feed_id,
             "name": feed.name,
+            "output_feed_id": target_id,
         })
     # Feed stocktake events
     for e in db.query(FeedStocktakeEvent).all():
@@ -113,7 +112,8 @@ def get_all_events(db: Session = Depends(get_db)):
             "type": "feed_stocktake",
             "event_type": "stocktake",
             "amount": e.recorded_stock,
-            "current_stock": feed.current_stock,
+            "book_stock": e.book_stock,
+            "variance": e.variance,
             "unit": feed.unit if feed else "",
             "date": e.date,
             "reason": e.notes,
@@ -142,7 +142,8 @@ def get_all_events(db: Session = Depends(get_db)):
             "type": "fertiliser_stocktake",
             "event_type": "stocktake",
             "amount": e.recorded_stock,
-            "current_stock": fertiliser.current_stock,
+            "book_stock": e.book_stock,
+            "variance": e.variance,
             "unit": fertiliser.unit if fertiliser else "",
             "date": e.date,
             "reason": e.notes,
@@ -171,7 +172,8 @@ def get_all_events(db: Session = Depends(get_db)):
             "type": "fuel_stocktake",
             "event_type": "stocktake",
             "amount": e.recorded_stock,
-            "current_stock": fuel.current_stock,
+            "book_stock": e.book_stock,
+            "variance": e.variance,
             "unit": fuel.unit if fuel else "",
             "date": e.date,
             "reason": e.notes,
@@ -196,6 +198,11 @@ def get_all_events(db: Session = Depends(get_db)):
     events.sort(key=lambda x: x["date"], reverse=True)
     return events
 
+@router.get("/")
+async def get_all_events(db: AsyncSession = Depends(get_async_db)):
+    # the event assembly is plain sync ORM code; run it on the async session's connection
+    return FastJSONResponse(await db.run_sync(_all_events))
+
 @router.get("")
-def get_all_events_no_slash(db: Session = Depends(get_db)):
-    return get_all_events(db)
\ No newline at end of file
+async def get_all_events_no_slash(db: AsyncSession = Depends(get_async_db)):
+    return FastJSONResponse(await db.run_sync(_all_events))
\ No newline at end of file
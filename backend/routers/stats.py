@@ -1,8 +1,8 @@
 # backend/routers/stats.py
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
-from backend.db import SessionLocal
+from backend.db import get_async_db
 from backend.models.animal import Animal
 from backend.models.camp import Camp
 from backend.models.vaccine import Vaccine
@@ -11,13 +11,6 @@ from datetime import date, datetime
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 def age_months(d: date) -> int:
     if not d:
         return 0
@@ -30,7 +23,7 @@ def age_months(d: date) -> int:
     return max(0, total)
 
 @router.get("/herd-summary")
-def herd_summary(db: Session = Depends(get_db)):
+async def herd_summary(db: AsyncSession = Depends(get_async_db)):
     """
     Counts exclude deceased animals.
     Parity rule for females:
@@ -40,9 +33,9 @@ def herd_summary(db: Session = Depends(get_db)):
     Bulls: sex M and not a calf.
     Unknown: everything else not in the above buckets (e.g., missing sex).
     """
-    animals = db.execute(
+    animals = (await db.execute(
         select(Animal).where(Animal.deceased == False)  # noqa: E712
-    ).scalars().all()
+    )).scalars().all()
     total = len(animals)
 
     calves = cows = heifers = bulls = unknown = 0
@@ -74,17 +67,17 @@ def herd_summary(db: Session = Depends(get_db)):
     }
 
 @router.get("/camps-summary")
-def camps_summary(db: Session = Depends(get_db)):
+async def camps_summary(db: AsyncSession = Depends(get_async_db)):
     # Count non-deceased animals per camp
     counts = dict(
-        db.execute(
+        (await db.execute(
             select(Animal.camp_id, func.count(Animal.id))
             .where(Animal.deceased == False)  # noqa: E712
             .group_by(Animal.camp_id)
-        ).all()
+        )).all()
     )
-    rows = db.execute(select(Camp).order_by(Camp.name)).scalars().all()
-    groups = db.execute(select(Group)).scalars().all()
+    rows = (await db.execute(select(Camp).order_by(Camp.name))).scalars().all()
+    groups = (await db.execute(select(Group))).scalars().all()
     camp_to_group = {g.camp_id: g.name for g in groups if g.camp_id is not None}
     return [
         {"id": c.id, "name": c.name, "animal_count": int(counts.get(c.id, 0)), "group_name": camp_to_group.get(c.id, ""), "notes": c.notes}
@@ -92,9 +85,9 @@ def camps_summary(db: Session = Depends(get_db)):
     ]
 
 @router.get("/stocks-summary")
-def stocks_summary(db: Session = Depends(get_db)):
+async def stocks_summary(db: AsyncSession = Depends(get_async_db)):
     # Minimal summary based on vaccines; extend if you track more stock categories
-    total_items = db.execute(select(func.count(Vaccine.id))).scalar() or 0
+    total_items = (await db.execute(select(func.count(Vaccine.id)))).scalar() or 0
     totals_by_category = {"Vaccines": int(total_items)}
     low_stock = []  # add threshold logic if/when you add a min field
     return {
@@ -1,18 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from datetime import datetime
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+from datetime import date, datetime
 import json
 from pydantic import BaseModel
-from typing import Dict
+from typing import Dict, List, Literal, Optional
 
 
-from backend.db import SessionLocal
-from backend.models.vaccine import Vaccine, VaccineWasteEvent
-from backend.models.feed import Feed, FeedEvent
+from backend.db import SessionLocal, get_db
+from backend.models.vaccine import Vaccine, VaccineEvent, VaccineWasteEvent
+from backend.models.feed import Feed, FeedEvent, FeedRecipe, FeedRecipeComponent
 from backend.models.fertiliser import Fertiliser, FertiliserEvent
 from backend.models.fuel import Fuel, FuelEvent
 from backend.schemas.vaccine import VaccineCreate, VaccineEventIn, VaccineWasteEventIn
-from backend.schemas.feed import FeedCreate, FeedUpdate
+from backend.schemas.feed import FeedCreate, FeedUpdate, FeedRecipeCreate, FeedRecipeOut, FeedRecipeRunIn
 from backend.schemas.fertiliser import FertiliserCreate, FertiliserUpdate
 from backend.schemas.fuel import FuelCreate, FuelUpdate
 from backend.models.vaccine import VaccineStocktakeEvent
@@ -24,23 +25,33 @@ from backend.schemas.feed import FeedStocktakeEventIn
 from backend.schemas.fertiliser import FertiliserStocktakeEventIn
 from backend.schemas.fuel import FuelStocktakeEventIn
 from backend.schemas.vaccine import VaccineUpdate
+from backend.services.vaccination_schedule import refresh_due_dates
+from backend.services.stock import (
+    CATEGORIES, PLURALS, drop_item_ledger, item_ledger, open_item, post_movement, set_balance,
+)
+from backend.services.stock_checkpoints import balances_as_of, run_checkpoint_job
+from backend.services.stock_reconcile import reconcile
+from backend.services.feed_mix import Mix, MixError, execute_mixes, mix_from_recipe
+from backend.services.stock_batch import BatchError, apply_events
+from backend.responses import FastJSONResponse, row_encoder, table_columns
 
 router = APIRouter(prefix="/stocks", tags=["stocks"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# item lists are read as column tuples and encoded without ORM objects
+_VACCINE_KEYS, _vaccine_columns = table_columns(Vaccine)
+_encode_vaccines = row_encoder(_VACCINE_KEYS, methods=lambda m: json.loads(m) if m else [])
+_FEED_KEYS, _feed_columns = table_columns(Feed)
+_encode_feeds = row_encoder(_FEED_KEYS)
+_FERTILISER_KEYS, _fertiliser_columns = table_columns(Fertiliser)
+_encode_fertilisers = row_encoder(_FERTILISER_KEYS)
+_FUEL_KEYS, _fuel_columns = table_columns(Fuel)
+_encode_fuels = row_encoder(_FUEL_KEYS)
 
 # --- Vaccines ---
 @router.get("/vaccines")
 def list_vaccines(db: Session = Depends(get_db)):
-    vaccines = db.query(Vaccine).order_by(Vaccine.name).all()
-    for v in vaccines:
-        v.methods = json.loads(v.methods) if v.methods else []
-    return vaccines
+    rows = db.execute(select(*_vaccine_columns).order_by(Vaccine.name)).all()
+    return FastJSONResponse(_encode_vaccines(rows))
 
 @router.post("/vaccines")
 def create_vaccine(vaccine: VaccineCreate, db: Session = Depends(get_db)):
@@ -48,6 +59,9 @@ def create_vaccine(vaccine: VaccineCreate, db: Session = Depends(get_db)):
     data["methods"] = json.dumps(data["methods"])  # Serialize list to JSON string
     obj = Vaccine(**data)
     db.add(obj)
+    db.flush()
+    open_item(db, category="vaccine", item=obj, opening_stock=data.get("current_stock"))
+    refresh_due_dates(db, vaccine_ids=[obj.id])
     db.commit()
     db.refresh(obj)
     # Deserialize methods for output
@@ -59,12 +73,17 @@ def record_vaccine_event(vaccine_id: int, event: VaccineEventIn, db: Session = D
     vaccine = db.get(Vaccine, vaccine_id)
     if not vaccine:
         raise HTTPException(status_code=404, detail="Vaccine not found")
-    obj = VaccineEvent(**event.dict())
-    if event.event_type == "in":
-        vaccine.current_stock += event.amount
-    elif event.event_type == "out":
-        vaccine.current_stock -= event.amount
+    data = event.dict()
+    data["vaccine_id"] = vaccine_id
+    obj = VaccineEvent(**data)
     db.add(obj)
+    db.flush()
+    if event.event_type in ("in", "out"):
+        post_movement(
+            db, category="vaccine", item=vaccine,
+            delta=event.amount if event.event_type == "in" else -event.amount,
+            event_date=event.date, reason=event.reason, ref_type="vaccine_event", ref_id=obj.id,
+        )
     db.commit()
     db.refresh(vaccine)
     return {"ok": True, "current_stock": vaccine.current_stock}
@@ -80,8 +99,12 @@ def record_vaccine_waste(event: VaccineWasteEventIn, db: Session = Depends(get_d
         date=event.date,
         reason=event.reason or ""
     )
-    vaccine.current_stock -= event.amount
     db.add(waste_event)
+    db.flush()
+    post_movement(
+        db, category="vaccine", item=vaccine, delta=-event.amount,
+        event_date=event.date, reason=waste_event.reason or "Waste", ref_type="vaccine_waste", ref_id=waste_event.id,
+    )
     db.commit()
     db.refresh(vaccine)
     return {"ok": True, "current_stock": vaccine.current_stock}
@@ -91,6 +114,7 @@ def delete_vaccine(vaccine_id: int, db: Session = Depends(get_db)):
     obj = db.get(Vaccine, vaccine_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Vaccine not found")
+    drop_item_ledger(db, category="vaccine", item_id=obj.id)
     db.delete(obj)
     db.commit()
     return {"ok": True}
@@ -104,8 +128,14 @@ def update_vaccine(vaccine_id: int, payload: VaccineUpdate, db: Session = Depend
     # Handle methods field: serialize to JSON string if present
     if "methods" in update_data and isinstance(update_data["methods"], list):
         update_data["methods"] = json.dumps(update_data["methods"])
+    if update_data.get("current_stock") is not None:
+        set_balance(db, category="vaccine", item=vaccine, balance=update_data["current_stock"])
+    update_data.pop("current_stock", None)
     for field, value in update_data.items():
         setattr(vaccine, field, value)
+    if {"first_dose_age_days", "booster_interval_days"} & update_data.keys():
+        db.flush()
+        refresh_due_dates(db, vaccine_ids=[vaccine.id])
     db.commit()
     db.refresh(vaccine)
     # Deserialize methods for output
@@ -122,12 +152,14 @@ class FeedMixIn(BaseModel):
 
 @router.get("/feeds")
 def list_feeds(db: Session = Depends(get_db)):
-    return db.query(Feed).order_by(Feed.name).all()
+    return FastJSONResponse(_encode_feeds(db.execute(select(*_feed_columns).order_by(Feed.name)).all()))
 
 @router.post("/feeds", response_model=None)
 def create_feed(feed: FeedCreate, db: Session = Depends(get_db)):
     obj = Feed(**feed.dict())
     db.add(obj)
+    db.flush()
+    open_item(db, category="feed", item=obj, opening_stock=feed.current_stock)
     db.commit()
     db.refresh(obj)
     return obj
@@ -137,7 +169,11 @@ def update_feed(feed_id: int, feed: FeedUpdate, db: Session = Depends(get_db)):
     obj = db.get(Feed, feed_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Feed not found")
-    for k, v in feed.dict(exclude_unset=True).items():
+    data = feed.dict(exclude_unset=True)
+    if data.get("current_stock") is not None:
+        set_balance(db, category="feed", item=obj, balance=data["current_stock"])
+    data.pop("current_stock", None)
+    for k, v in data.items():
         setattr(obj, k, v)
     db.commit()
     db.refresh(obj)
@@ -155,56 +191,122 @@ def record_feed_event(feed_id: int, event_type: str, amount: float, date: str, r
         date=datetime.strptime(date, "%Y-%m-%d"),
         reason=reason
     )
-    if event_type == "in":
-        feed.current_stock += amount
-    elif event_type == "out":
-        feed.current_stock -= amount
     db.add(event)
+    db.flush()
+    if event_type in ("in", "out"):
+        post_movement(
+            db, category="feed", item=feed, delta=amount if event_type == "in" else -amount,
+            event_date=event.date, reason=reason, ref_type="feed_event", ref_id=event.id,
+        )
     db.commit()
     db.refresh(feed)
     return {"ok": True, "current_stock": feed.current_stock}
 
 @router.post("/feeds/mix")
 def mix_feeds(mix: FeedMixIn, db: Session = Depends(get_db)):
-    components = mix.components
-    output_feed_id = mix.output_feed_id
-    output_amount = mix.output_amount
-    date = mix.date
-    reason = mix.reason
-    for fid, amt in components.items():
-        feed = db.get(Feed, fid)
-        if not feed:
-            raise HTTPException(status_code=404, detail=f"Feed {fid} not found")
-        feed.current_stock -= amt
-        event = FeedEvent(
-            feed_id=fid,
-            event_type="mix",
-            amount=amt,
-            date=datetime.strptime(date, "%Y-%m-%d"),
-            reason=f"Used in mix for feed {output_feed_id}"
-        )
-        db.add(event)
-    output_feed = db.get(Feed, output_feed_id)
-    if not output_feed:
-        raise HTTPException(status_code=404, detail="Output feed not found")
-    output_feed.current_stock += output_amount
-    mix_event = FeedEvent(
-        feed_id=output_feed_id,
-        event_type="in",
-        amount=output_amount,
-        date=datetime.strptime(date, "%Y-%m-%d"),
-        reason=reason or "Feed mix"
+    """One-off mix; allowed to take components below zero, as before."""
+    m = Mix(
+        output_feed_id=mix.output_feed_id,
+        output_amount=mix.output_amount,
+        components=mix.components,
+        date=datetime.strptime(mix.date, "%Y-%m-%d"),
+        reason=mix.reason,
     )
-    db.add(mix_event)
+    try:
+        feeds = execute_mixes(db, [m], allow_negative=True)
+    except MixError as e:
+        db.rollback()
+        raise HTTPException(status_code=e.status, detail=e.detail)
+    db.commit()
+    return {"ok": True, "output_stock": feeds[mix.output_feed_id].current_stock}
+
+# --- Feed recipes ---
+@router.get("/feeds/recipes", response_model=List[FeedRecipeOut])
+def list_feed_recipes(db: Session = Depends(get_db)):
+    return (
+        db.query(FeedRecipe)
+        .options(selectinload(FeedRecipe.components))
+        .order_by(FeedRecipe.name)
+        .all()
+    )
+
+@router.post("/feeds/recipes", response_model=FeedRecipeOut)
+def create_feed_recipe(payload: FeedRecipeCreate, db: Session = Depends(get_db)):
+    if not payload.components:
+        raise HTTPException(status_code=400, detail="A recipe needs at least one component")
+    ids = {payload.output_feed_id} | {c.feed_id for c in payload.components}
+    found = {fid for (fid,) in db.query(Feed.id).filter(Feed.id.in_(ids))}
+    if ids - found:
+        raise HTTPException(status_code=404, detail=f"Feed(s) not found: {', '.join(map(str, sorted(ids - found)))}")
+    if payload.output_feed_id in {c.feed_id for c in payload.components}:
+        raise HTTPException(status_code=400, detail="The output feed cannot also be a component")
+    if db.query(FeedRecipe.id).filter(FeedRecipe.name == payload.name).first():
+        raise HTTPException(status_code=400, detail="A recipe with this name already exists")
+    recipe = FeedRecipe(
+        name=payload.name,
+        output_feed_id=payload.output_feed_id,
+        output_amount=payload.output_amount,
+        notes=payload.notes,
+        components=[FeedRecipeComponent(feed_id=c.feed_id, amount=c.amount) for c in payload.components],
+    )
+    db.add(recipe)
+    db.commit()
+    db.refresh(recipe)
+    return recipe
+
+@router.delete("/feeds/recipes/{recipe_id}")
+def delete_feed_recipe(recipe_id: int, db: Session = Depends(get_db)):
+    recipe = db.get(FeedRecipe, recipe_id)
+    if not recipe:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    db.delete(recipe)
     db.commit()
-    db.refresh(output_feed)
-    return {"ok": True, "output_stock": output_feed.current_stock}
+    return {"ok": True}
+
+@router.post("/feeds/recipes/execute")
+def execute_feed_recipes(runs: List[FeedRecipeRunIn], db: Session = Depends(get_db)):
+    """Run several recipe batches in one transaction; all or nothing."""
+    if not runs:
+        raise HTTPException(status_code=400, detail="Nothing to execute")
+    recipe_ids = {r.recipe_id for r in runs}
+    recipes = {
+        r.id: r for r in db.query(FeedRecipe)
+        .options(selectinload(FeedRecipe.components))
+        .filter(FeedRecipe.id.in_(recipe_ids))
+    }
+    if recipe_ids - recipes.keys():
+        raise HTTPException(status_code=404, detail=f"Recipe(s) not found: {', '.join(map(str, sorted(recipe_ids - recipes.keys())))}")
+
+    dates = {}
+    mixes = []
+    for run in runs:
+        if run.batches <= 0:
+            raise HTTPException(status_code=400, detail="batches must be positive")
+        if run.date not in dates:
+            try:
+                dates[run.date] = datetime.strptime(run.date, "%Y-%m-%d")
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid date '{run.date}'")
+        mixes.append(mix_from_recipe(recipes[run.recipe_id], batches=run.batches, date=dates[run.date], reason=run.reason))
+    try:
+        feeds = execute_mixes(db, mixes)
+    except MixError as e:
+        db.rollback()
+        raise HTTPException(status_code=e.status, detail=e.detail)
+    db.commit()
+    touched = {fid for m in mixes for fid in (m.output_feed_id, *m.components)}
+    return {
+        "ok": True,
+        "mixes": len(mixes),
+        "stock": {fid: feeds[fid].current_stock for fid in sorted(touched)},
+    }
 
 @router.delete("/feeds/{feed_id}")
 def delete_feed(feed_id: int, db: Session = Depends(get_db)):
     obj = db.get(Feed, feed_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Feed not found")
+    drop_item_ledger(db, category="feed", item_id=obj.id)
     db.delete(obj)
     db.commit()
     return {"ok": True}
@@ -212,12 +314,16 @@ def delete_feed(feed_id: int, db: Session = Depends(get_db)):
 # --- Fertiliser ---
 @router.get("/fertilisers")
 def list_fertilisers(db: Session = Depends(get_db)):
-    return db.query(Fertiliser).order_by(Fertiliser.name).all()
+    return FastJSONResponse(_encode_fertilisers(
+        db.execute(select(*_fertiliser_columns).order_by(Fertiliser.name)).all()
+    ))
 
 @router.post("/fertilisers", response_model=None)
 def create_fertiliser(fert: FertiliserCreate, db: Session = Depends(get_db)):
     obj = Fertiliser(**fert.dict())
     db.add(obj)
+    db.flush()
+    open_item(db, category="fertiliser", item=obj, opening_stock=fert.current_stock)
     db.commit()
     db.refresh(obj)
     return obj
@@ -227,7 +333,11 @@ def update_fertiliser(fertiliser_id: int, fert: FertiliserUpdate, db: Session =
     obj = db.get(Fertiliser, fertiliser_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Fertiliser not found")
-    for k, v in fert.dict(exclude_unset=True).items():
+    data = fert.dict(exclude_unset=True)
+    if data.get("current_stock") is not None:
+        set_balance(db, category="fertiliser", item=obj, balance=data["current_stock"])
+    data.pop("current_stock", None)
+    for k, v in data.items():
         setattr(obj, k, v)
     db.commit()
     db.refresh(obj)
@@ -245,11 +355,13 @@ def record_fertiliser_event(fertiliser_id: int, event_type: str, amount: float,
         date=datetime.strptime(date, "%Y-%m-%d"),
         reason=reason
     )
-    if event_type == "in":
-        fert.current_stock += amount
-    elif event_type == "out":
-        fert.current_stock -= amount
     db.add(event)
+    db.flush()
+    if event_type in ("in", "out"):
+        post_movement(
+            db, category="fertiliser", item=fert, delta=amount if event_type == "in" else -amount,
+            event_date=event.date, reason=reason, ref_type="fertiliser_event", ref_id=event.id,
+        )
     db.commit()
     db.refresh(fert)
     return {"ok": True, "current_stock": fert.current_stock}
@@ -259,6 +371,7 @@ def delete_fertiliser(fertiliser_id: int, db: Session = Depends(get_db)):
     obj = db.get(Fertiliser, fertiliser_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Fertiliser not found")
+    drop_item_ledger(db, category="fertiliser", item_id=obj.id)
     db.delete(obj)
     db.commit()
     return {"ok": True}
@@ -266,12 +379,14 @@ def delete_fertiliser(fertiliser_id: int, db: Session = Depends(get_db)):
 # --- Fuel ---
 @router.get("/fuels")
 def list_fuels(db: Session = Depends(get_db)):
-    return db.query(Fuel).order_by(Fuel.type).all()
+    return FastJSONResponse(_encode_fuels(db.execute(select(*_fuel_columns).order_by(Fuel.type)).all()))
 
 @router.post("/fuels", response_model=None)
 def create_fuel(fuel: FuelCreate, db: Session = Depends(get_db)):
     obj = Fuel(**fuel.dict())
     db.add(obj)
+    db.flush()
+    open_item(db, category="fuel", item=obj, opening_stock=fuel.current_stock)
     db.commit()
     db.refresh(obj)
     return obj
@@ -281,7 +396,11 @@ def update_fuel(fuel_id: int, fuel: FuelUpdate, db: Session = Depends(get_db)):
     obj = db.get(Fuel, fuel_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Fuel not found")
-    for k, v in fuel.dict(exclude_unset=True).items():
+    data = fuel.dict(exclude_unset=True)
+    if data.get("current_stock") is not None:
+        set_balance(db, category="fuel", item=obj, balance=data["current_stock"])
+    data.pop("current_stock", None)
+    for k, v in data.items():
         setattr(obj, k, v)
     db.commit()
     db.refresh(obj)
@@ -299,11 +418,13 @@ def record_fuel_event(fuel_id: int, event_type: str, amount: float, date: str, r
         date=datetime.strptime(date, "%Y-%m-%d"),
         reason=reason
     )
-    if event_type == "in":
-        fuel.current_stock += amount
-    elif event_type == "out":
-        fuel.current_stock -= amount
     db.add(event)
+    db.flush()
+    if event_type in ("in", "out"):
+        post_movement(
+            db, category="fuel", item=fuel, delta=amount if event_type == "in" else -amount,
+            event_date=event.date, reason=reason, ref_type="fuel_event", ref_id=event.id,
+        )
     db.commit()
     db.refresh(fuel)
     return {"ok": True, "current_stock": fuel.current_stock}
@@ -313,11 +434,131 @@ def delete_fuel(fuel_id: int, db: Session = Depends(get_db)):
     obj = db.get(Fuel, fuel_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Fuel not found")
+    drop_item_ledger(db, category="fuel", item_id=obj.id)
     db.delete(obj)
     db.commit()
     return {"ok": True}
 
-    # --- Manual Stocktake endpoints ---
+# --- Ledger ---
+@router.get("/{category}/{item_id}/ledger")
+def get_item_ledger(category: str, item_id: int, limit: int = 100, before_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """Newest-first stock movements for one item; page with ?before_id=<last id seen>."""
+    cat = PLURALS.get(category)
+    if not cat:
+        raise HTTPException(status_code=404, detail="Unknown stock category")
+    if not db.get(CATEGORIES[cat], item_id):
+        raise HTTPException(status_code=404, detail="Item not found")
+    rows = item_ledger(db, category=cat, item_id=item_id, limit=max(1, min(limit, 1000)), before_id=before_id)
+    return [
+        {
+            "id": r.id,
+            "date": r.event_date,
+            "delta": r.delta,
+            "balance_after": r.balance_after,
+            "reason": r.reason,
+            "ref_type": r.ref_type,
+            "ref_id": r.ref_id,
+        }
+        for r in rows
+    ]
+
+# --- Batched events ---
+MAX_BATCH_EVENTS = 5000
+
+class StockEventIn(BaseModel):
+    category: Literal["vaccine", "feed", "fertiliser", "fuel"]
+    item_id: int
+    event_type: Literal["in", "out", "waste"]  # "waste" is vaccines only
+    amount: float
+    date: datetime
+    reason: Optional[str] = None
+
+@router.post("/events/batch")
+def record_events_batch(events: List[StockEventIn], db: Session = Depends(get_db)):
+    """Record many stock events across categories in one transaction; all or nothing."""
+    if not events:
+        raise HTTPException(status_code=400, detail="No events")
+    if len(events) > MAX_BATCH_EVENTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_EVENTS} events per batch")
+    try:
+        stock = apply_events(db, [e.model_dump() for e in events])
+    except BatchError as e:
+        raise HTTPException(status_code=422, detail=e.errors)
+    db.commit()
+    return {
+        "ok": True,
+        "events": len(events),
+        "stock": [
+            {"category": cat, "item_id": item_id, "current_stock": balance}
+            for (cat, item_id), balance in sorted(stock.items())
+        ],
+    }
+
+# --- Point-in-time balances ---
+@router.get("/balances")
+def get_balances(as_of: date, category: Optional[str] = None, db: Session = Depends(get_db)):
+    """Stock of every item at the end of `as_of`, from the nearest checkpoint plus later movements."""
+    cat = None
+    if category:
+        cat = PLURALS.get(category, category)
+        if cat not in CATEGORIES:
+            raise HTTPException(status_code=404, detail="Unknown stock category")
+    balances = balances_as_of(db, as_of=as_of, category=cat)
+
+    out = []
+    for name, model in CATEGORIES.items():
+        if cat and name != cat:
+            continue
+        label = model.type if model is Fuel else model.name
+        for item_id, item_name, unit in db.query(model.id, label, model.unit).order_by(label):
+            out.append({
+                "category": name,
+                "item_id": item_id,
+                "name": item_name,
+                "unit": unit,
+                "balance": round(balances.get((name, item_id), 0.0), 6),
+            })
+    return {"as_of": as_of, "items": out}
+
+
+def _checkpoint_job(period: str, until: Optional[date]) -> None:
+    db = SessionLocal()
+    try:
+        run_checkpoint_job(db, period=period, until=until)
+    finally:
+        db.close()
+
+
+@router.post("/checkpoints", status_code=202)
+def start_checkpoints(background: BackgroundTasks, period: str = "month", until: Optional[date] = None):
+    """Write any missing balance checkpoints in the background."""
+    if period not in ("day", "month"):
+        raise HTTPException(status_code=400, detail="period must be 'day' or 'month'")
+    background.add_task(_checkpoint_job, period, until)
+    return {"ok": True, "period": period, "until": until}
+
+# --- Manual Stocktake endpoints ---
+
+class ReconcileIn(BaseModel):
+    category: Optional[str] = None      # vaccines / feeds / fertilisers / fuels; all when omitted
+    since: Optional[datetime] = None
+    post_adjustments: bool = False
+
+@router.post("/reconcile")
+def reconcile_stocktakes(payload: ReconcileIn, db: Session = Depends(get_db)):
+    """Compare every stocktake with the book balance at its date; optionally post the variances."""
+    cat = None
+    if payload.category:
+        cat = PLURALS.get(payload.category, payload.category)
+        if cat not in CATEGORIES:
+            raise HTTPException(status_code=404, detail="Unknown stock category")
+    results = reconcile(db, category=cat, since=payload.since, post_adjustments=payload.post_adjustments)
+    db.commit()
+    return {
+        "reconciled": len(results),
+        "with_variance": sum(1 for r in results if r["variance"]),
+        "items": results,
+    }
 
 @router.post("/vaccines/{vaccine_id}/stocktake")
 def record_vaccine_stocktake(vaccine_id: int, payload: VaccineStocktakeEventIn, db: Session = Depends(get_db)):
@@ -331,8 +572,10 @@ def record_vaccine_stocktake(vaccine_id: int, payload: VaccineStocktakeEventIn,
         notes=payload.notes
     )
     db.add(event)
+    db.flush()
+    result = reconcile(db, category="vaccine", stocktake_ids=[event.id])[0]
     db.commit()
-    return {"ok": True}
+    return {"ok": True, "book_stock": result["book_stock"], "variance": result["variance"]}
 
 @router.post("/feeds/{feed_id}/stocktake")
 def record_feed_stocktake(feed_id: int, payload: FeedStocktakeEventIn, db: Session = Depends(get_db)):
@@ -346,8 +589,10 @@ def record_feed_stocktake(feed_id: int, payload: FeedStocktakeEventIn, db: Sessi
         notes=payload.notes
     )
     db.add(event)
+    db.flush()
+    result = reconcile(db, category="feed", stocktake_ids=[event.id])[0]
     db.commit()
-    return {"ok": True}
+    return {"ok": True, "book_stock": result["book_stock"], "variance": result["variance"]}
 
 @router.post("/fertilisers/{fertiliser_id}/stocktake")
 def record_fertiliser_stocktake(fertiliser_id: int, payload: FertiliserStocktakeEventIn, db: Session = Depends(get_db)):
@@ -361,8 +606,10 @@ def record_fertiliser_stocktake(fertiliser_id: int, payload: FertiliserStocktake
         notes=payload.notes
     )
     db.add(event)
+    db.flush()
+    result = reconcile(db, category="fertiliser", stocktake_ids=[event.id])[0]
     db.commit()
-    return {"ok": True}
+    return {"ok": True, "book_stock": result["book_stock"], "variance": result["variance"]}
 
 @router.post("/fuels/{fuel_id}/stocktake")
 def record_fuel_stocktake(fuel_id: int, payload: FuelStocktakeEventIn, db: Session = Depends(get_db)):
@@ -376,5 +623,7 @@ def record_fuel_stocktake(fuel_id: int, payload: FuelStocktakeEventIn, db: Sessi
         notes=payload.notes
     )
     db.add(event)
+    db.flush()
+    result = reconcile(db, category="fuel", stocktake_ids=[event.id])[0]
     db.commit()
-    return {"ok": True}
\ No newline at end of file
+    return {"ok": True, "book_stock": result["book_stock"], "variance": result["variance"]}
\ No newline at end of file
@@ -10,8 +10,7 @@ from fastapi import APIRouter, File, UploadFile, HTTPException, Form, status
 router = APIRouter(prefix="/animals", tags=["uploads"])
 
 MEDIA_BASE = Path("backend/media")
-GENERIC_UPLOADS_DIR = MEDIA_BASE / "uploads"
-GENERIC_UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+GENERIC_UPLOADS_DIR = MEDIA_BASE / "uploads"   # subdirectories are created per upload
 
 _filename_re = re.compile(r"[^A-Za-z0-9._-]+")
 
@@ -1,29 +1,28 @@
 # backend/routers/vaccinations.py
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from typing import List, Optional
 
+import base64
+
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, field_validator, ConfigDict
 from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from backend.db import SessionLocal
-from backend.models.vaccination import Vaccination
+from backend.db import get_async_db, get_db
+from backend.models.vaccination import Vaccination, VaccinationDue
 from backend.models.vaccine import Vaccine
 from backend.models.animal import Animal
 from backend.models.group import Group
 from backend.models.camp import Camp
+from backend.services.vaccination_schedule import refresh_due_dates
+from backend.services.vaccination_coverage import build_coverage, EPOCH, NEVER
+from backend.services.stock import post_movement
 
 router = APIRouter(tags=["vaccinations"])
 
-# ---------- DB dependency ----------
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # ---------- Schemas ----------
 class GroupVaccIn(BaseModel):
     group_id: int
@@ -73,15 +72,28 @@ class VaccinationOut(BaseModel):
     camp_id: Optional[int]
     camp_name: Optional[str]
 
+class VaccinationDueOut(BaseModel):
+    animal_id: int
+    animal_tag: Optional[str]
+    animal_name: Optional[str]
+    group_id: Optional[int]
+    vaccine_id: int
+    vaccine_name: str
+    kind: str
+    last_date: Optional[str]
+    due_date: str
+    days_until: int
+
 # ---------- Helpers ----------
 def _parse_date(s: str) -> date:
     return datetime.strptime(s, "%Y-%m-%d").date()
 
-def _dec_stock(vaccine: Vaccine, amount: float):
-    """Basic stock decrement; never below zero."""
-    cur = float(vaccine.current_stock or 0.0)
-    cur -= float(amount or 0.0)
-    vaccine.current_stock = cur if cur > 0 else 0.0
+def _dec_stock(db: Session, vaccine: Vaccine, amount: float, *, event_date, ref_type: str, ref_id: Optional[int] = None):
+    """Stock decrement through the stock ledger; never below zero."""
+    post_movement(
+        db, category="vaccine", item=vaccine, delta=-float(amount or 0.0), event_date=event_date,
+        reason="Vaccination", ref_type=ref_type, ref_id=ref_id, clamp=True,
+    )
 
 # ---------- Endpoints ----------
 @router.post("/group", status_code=status.HTTP_200_OK)
@@ -128,7 +140,9 @@ def vaccinate_group(payload: GroupVaccIn, db: Session = Depends(get_db)):
         float(payload.animal_doses[a.id]) if payload.animal_doses and a.id in payload.animal_doses else dose
         for a in members
     )
-    _dec_stock(vax, total_dose)
+    _dec_stock(db, vax, total_dose, event_date=vacc_date, ref_type="vaccination_group", ref_id=g.id)
+    db.flush()
+    refresh_due_dates(db, animal_ids=[a.id for a in members], vaccine_ids=[vax.id])
     db.commit()
     return {"ok": True, "applied": len(members), "stock": vax.current_stock}
 
@@ -158,8 +172,11 @@ def vaccinate_animal(payload: AnimalVaccIn, db: Session = Depends(get_db)):
 
     # decrement stock for manual entries; for 'group' we assume already decremented
     if (payload.source or "manual") == "manual":
-        _dec_stock(vax, dose)
+        db.flush()
+        _dec_stock(db, vax, dose, event_date=rec.date, ref_type="vaccination_animal", ref_id=rec.id)
 
+    db.flush()
+    refresh_due_dates(db, animal_ids=[a.id], vaccine_ids=[vax.id])
     db.commit()
     return {"ok": True, "stock": vax.current_stock}
 
@@ -168,13 +185,122 @@ def delete_vaccination(vaccination_id: int, db: Session = Depends(get_db)):
     rec = db.get(Vaccination, vaccination_id)
     if not rec:
         raise HTTPException(status_code=404, detail="Vaccination not found")
+    animal_id, vaccine_id = rec.animal_id, rec.vaccine_id
     db.delete(rec)
+    db.flush()
+    refresh_due_dates(db, animal_ids=[animal_id], vaccine_ids=[vaccine_id])
     db.commit()
     return {"ok": True}
 
+@router.get("/due", response_model=List[VaccinationDueOut])
+async def list_due(
+    db: AsyncSession = Depends(get_async_db),
+    within_days: int = Query(7, ge=0),
+    vaccine_id: Optional[int] = Query(None),
+    group_id: Optional[int] = Query(None),
+):
+    """
+    Live animals with a dose due within `within_days` from today (overdue doses included).
+    Served from the vaccination_due table; see POST /due/refresh for a full rebuild.
+    """
+    today = date.today()
+    q = (
+        select(VaccinationDue, Animal, Vaccine)
+        .join(Animal, VaccinationDue.animal_id == Animal.id)
+        .join(Vaccine, VaccinationDue.vaccine_id == Vaccine.id)
+        .where(
+            VaccinationDue.due_date <= today + timedelta(days=within_days),
+            Animal.deceased == False,  # noqa: E712
+        )
+    )
+    if vaccine_id is not None:
+        q = q.where(VaccinationDue.vaccine_id == vaccine_id)
+    if group_id is not None:
+        q = q.where(Animal.group_id == group_id)
+
+    rows = (await db.execute(q.order_by(VaccinationDue.due_date, Animal.tag_number))).all()
+    return [
+        VaccinationDueOut(
+            animal_id=a.id,
+            animal_tag=a.tag_number,
+            animal_name=a.name,
+            group_id=a.group_id,
+            vaccine_id=v.id,
+            vaccine_name=v.name,
+            kind=d.kind,
+            last_date=d.last_date.isoformat() if d.last_date else None,
+            due_date=d.due_date.isoformat(),
+            days_until=(d.due_date - today).days,
+        )
+        for d, a, v in rows
+    ]
+
+@router.post("/due/refresh", status_code=status.HTTP_200_OK)
+def refresh_due(db: Session = Depends(get_db)):
+    """Rebuild the whole due-date table (e.g. after importing historical records)."""
+    count = refresh_due_dates(db)
+    db.commit()
+    return {"ok": True, "due": count}
+
+@router.get("/coverage")
+async def coverage(
+    db: AsyncSession = Depends(get_async_db),
+    valid_days: int = Query(365, ge=0),
+    as_of: Optional[date] = Query(None),
+    vaccine_ids: Optional[List[int]] = Query(None),
+    group_id: Optional[int] = Query(None),
+    mode: str = Query("bitmap", pattern="^(bitmap|dates)$"),
+    format: str = Query("json", pattern="^(json|csv|binary)$"),
+):
+    """
+    Herd x vaccine coverage for live animals, column-oriented.
+    - mode=bitmap: a cell is 1 when the latest dose is within `valid_days` of `as_of`
+    - mode=dates:  a cell holds the latest dose date (days since 1970-01-01, -1 = never)
+    json returns base64 bitmap / flat int list (row-major, one row per animal),
+    csv streams one line per animal, binary returns the packed arrays
+    (see backend.services.vaccination_coverage.BINARY_HEADER).
+    """
+    m = await db.run_sync(
+        build_coverage,
+        as_of=as_of or date.today(),
+        valid_days=valid_days,
+        vaccine_ids=vaccine_ids,
+        group_id=group_id,
+    )
+    if format == "csv":
+        return StreamingResponse(
+            m.iter_csv(mode),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="coverage_{m.as_of.isoformat()}.csv"'},
+        )
+    if format == "binary":
+        return Response(
+            m.to_binary(mode),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="coverage_{m.as_of.isoformat()}.bin"'},
+        )
+
+    out = {
+        "as_of": m.as_of.isoformat(),
+        "valid_days": m.valid_days,
+        "shape": [len(m.animal_ids), len(m.vaccine_ids)],
+        "animal_ids": m.animal_ids,
+        "animal_tags": m.animal_tags,
+        "vaccine_ids": m.vaccine_ids,
+        "vaccine_names": m.vaccine_names,
+        "mode": mode,
+    }
+    if mode == "bitmap":
+        out["covered"] = base64.b64encode(m.bitmap()).decode("ascii")
+    else:
+        out["epoch"] = EPOCH.isoformat()
+        out["never"] = NEVER
+        out["last_dates"] = m.last_days.tolist()
+    return out
+
 @router.get("/", response_model=List[VaccinationOut])
-def list_vaccinations(
-    db: Session = Depends(get_db),
+async def list_vaccinations(
+    db: AsyncSession = Depends(get_async_db),
     group_id: Optional[int] = Query(None),
     vaccine_id: Optional[int] = Query(None),
     animal_id: Optional[int] = Query(None),
@@ -209,9 +335,9 @@ def list_vaccinations(
     if conditions:
         q_v = q_v.where(and_(*conditions))
 
-    rows = db.execute(
+    rows = (await db.execute(
         q_v.order_by(Vaccination.date.desc(), Vaccination.id.desc())
-    ).all()
+    )).all()
 
     out: List[VaccinationOut] = []
     for vrec, a, v, g, c in rows:
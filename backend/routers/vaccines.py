@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from backend.db.session import get_db
+from backend.db import get_db
 from backend.models.vaccine import Vaccine
 
 router = APIRouter(tags=["vaccines"])
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
 from sqlalchemy.orm import Session
 from backend.models.weight import Weight
 from backend.models.animal import Animal
-from backend.db.session import get_db
+from backend.db import get_db
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import date
+from datetime import date, datetime
 import sqlalchemy as sa
+from backend.services.growth_cache import invalidate_animals, invalidate_groups
+from backend.services.weight_import import import_weigh_session
+from backend.services.timeseries import lttb
 
 router = APIRouter(tags=["weights"])
 
@@ -22,11 +25,54 @@ class WeightOut(BaseModel):
     weight: float
     date: date
 
+MAX_SERIES_POINTS = 5000  # hard cap for a single series, whatever the query
+
+def _bucket_expr(db: Session, bucket: str):
+    """SQL expression for the first day of the day/week/month bucket of Weight.date."""
+    if bucket == "day":
+        return Weight.date
+    if db.get_bind().dialect.name == "postgresql":
+        return sa.cast(sa.func.date_trunc(bucket, Weight.date), sa.Date)
+    if bucket == "week":
+        # SQLite: Monday of the week
+        return sa.func.date(Weight.date, "weekday 0", "-6 days")
+    return sa.func.strftime("%Y-%m-01", Weight.date)
+
+def _bucketed(db: Session, animal_ids: List[int], bucket: str):
+    b = _bucket_expr(db, bucket).label("bucket")
+    rows = db.execute(
+        sa.select(
+            b,
+            sa.func.avg(Weight.weight),
+            sa.func.min(Weight.weight),
+            sa.func.max(Weight.weight),
+            sa.func.count(Weight.id),
+        )
+        .where(Weight.animal_id.in_(animal_ids))
+        .group_by(b)
+        .order_by(b.desc())
+        .limit(MAX_SERIES_POINTS)
+    ).all()
+    return [
+        {"date": d, "weight": round(avg, 1), "min": lo, "max": hi, "count": n}
+        for d, avg, lo, hi, n in rows
+    ]
+
+def _downsample(series: List[dict], points: int, key: str) -> List[dict]:
+    """LTTB over a newest-first series; returns newest-first."""
+    if len(series) <= points:
+        return series
+    asc = series[::-1]
+    xy = [(r["date"].toordinal(), float(r[key] or 0)) for r in asc]
+    return [asc[i] for i in reversed(lttb(xy, points))]
+
 @router.get("/")
 def get_weights(
     animal_id: Optional[int] = None,
     tag_number: Optional[str] = None,
     group_id: Optional[int] = None,
+    points: Optional[int] = Query(None, ge=3, le=MAX_SERIES_POINTS),  # LTTB target size
+    bucket: Optional[str] = Query(None, pattern="^(day|week|month)$"),  # aggregate in SQL
     db: Session = Depends(get_db)
 ):
     query = db.query(Weight)
@@ -34,17 +80,16 @@ def get_weights(
         animal = db.query(Animal).filter(Animal.tag_number == tag_number).first()
         if not animal:
             return []
-        query = query.filter(Weight.animal_id == animal.id)
-        return [
-            {"date": w.date, "weight": w.weight}
-            for w in query.order_by(Weight.date.desc()).all()
-        ]
-    elif animal_id is not None:
+        animal_id = animal.id
+    if animal_id is not None:
+        if bucket:
+            return _bucketed(db, [animal_id], bucket)
         query = query.filter(Weight.animal_id == animal_id)
-        return [
+        series = [
             {"date": w.date, "weight": w.weight}
-            for w in query.order_by(Weight.date.desc()).all()
+            for w in query.order_by(Weight.date.desc(), Weight.id.desc()).all()
         ]
+        return _downsample(series, points or MAX_SERIES_POINTS, "weight")
     elif group_id is not None:
         animal_ids = [
             a.id
@@ -52,6 +97,11 @@ def get_weights(
         ]
         if not animal_ids:
             return []
+        if bucket:
+            return [
+                {"date": r["date"], "avg_weight": r["weight"], "count": r["count"]}
+                for r in _bucketed(db, animal_ids, bucket)
+            ]
         results = (
             db.query(Weight.date, sa.func.avg(Weight.weight).label("avg_weight"))
             .filter(Weight.animal_id.in_(animal_ids))
@@ -59,10 +109,11 @@ def get_weights(
             .order_by(Weight.date.desc())
             .all()
         )
-        return [
+        series = [
             {"date": r.date, "avg_weight": round(r.avg_weight, 1) if r.avg_weight else None}
             for r in results
         ]
+        return _downsample(series, points or MAX_SERIES_POINTS, "avg_weight")
     else:
         return [
             {"date": w.date, "weight": w.weight}
@@ -85,9 +136,40 @@ def record_weight(payload: WeightIn, db: Session = Depends(get_db)):
     animal.weight_date = payload.date
     db.commit()
     db.refresh(weight)
+    invalidate_groups([animal.group_id])
     return {
         "id": weight.id,
         "animal_id": weight.animal_id,
         "weight": weight.weight,
         "date": weight.date
-    }
\ No newline at end of file
+    }
+
+@router.post("/bulk")
+def bulk_import_weights(
+    file: UploadFile = File(...),
+    date: Optional[str] = Form(None),     # default weigh date for rows without one (YYYY-MM-DD)
+    format: Optional[str] = Form(None),   # "csv" | "ndjson"; guessed from the filename if omitted
+    db: Session = Depends(get_db),
+):
+    """
+    Import a weigh session exported by the scale indicator.
+    Expects columns tag/tag_number/eid, weight/kg and optionally date.
+    Returns counts plus a reject report (unknown tags, unparseable rows).
+    """
+    fmt = (format or "").lower()
+    if not fmt:
+        name = (file.filename or "").lower()
+        fmt = "ndjson" if name.endswith((".ndjson", ".jsonl", ".json")) else "csv"
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'csv' or 'ndjson'")
+    default_date = None
+    if date:
+        try:
+            default_date = datetime.strptime(date, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+
+    report = import_weigh_session(db, stream=file.file, fmt=fmt, default_date=default_date)
+    db.commit()
+    invalidate_animals(db, report.pop("animal_ids", []))
+    return {"ok": True, **report}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from datetime import datetime
 
 class FeedBase(BaseModel):
@@ -46,4 +46,38 @@ class FeedStocktakeEventOut(FeedStocktakeEventIn):
     id: int
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+# --- Feed recipe schemas ---
+class FeedRecipeComponentIn(BaseModel):
+    feed_id: int
+    amount: float
+
+class FeedRecipeComponentOut(FeedRecipeComponentIn):
+    id: int
+
+    class Config:
+        orm_mode = True
+
+class FeedRecipeCreate(BaseModel):
+    name: str
+    output_feed_id: int
+    output_amount: float
+    notes: Optional[str] = None
+    components: List[FeedRecipeComponentIn]
+
+class FeedRecipeOut(BaseModel):
+    id: int
+    name: str
+    output_feed_id: int
+    output_amount: float
+    notes: Optional[str] = None
+    components: List[FeedRecipeComponentOut] = []
+
+    class Config:
+        orm_mode = True
+
+class FeedRecipeRunIn(BaseModel):
+    recipe_id: int
+    batches: float = 1
+    date: str
+    reason: Optional[str] = None
@@ -10,6 +10,8 @@ class VaccineBase(BaseModel):
     methods: Optional[List[str]] = None
     current_stock: Optional[float] = None
     notes: Optional[str] = None
+    first_dose_age_days: Optional[int] = None
+    booster_interval_days: Optional[int] = None
 
 class VaccineCreate(VaccineBase):
     name: str
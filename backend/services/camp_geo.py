@@ -0,0 +1,219 @@
+"""
+Camp boundaries and GPS point lookup.
+
+Camps store a GeoJSON Polygon/MultiPolygon in lon/lat plus its bounding box.
+locate() maps a batch of points to camps in two steps:
+  1. bounding-box filter: on SQLite the points go into a temp table that is
+     joined against the camp_rtree R-tree; elsewhere the boxes are compared in NumPy
+  2. exact even-odd point-in-polygon test, vectorised over all candidate
+     points x all edges of one camp at a time
+Where boundaries overlap, the smallest camp wins.
+"""
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from backend.models.camp import Camp
+
+RTREE = "camp_rtree"
+
+_lock = threading.Lock()
+_rtree_ready = set()                 # engine urls where camp_rtree is known to exist
+_parsed: Dict[int, Tuple[str, np.ndarray, float]] = {}   # camp id -> (boundary text, edges, area)
+
+
+# ---------- geometry ----------
+def _polygons(geojson) -> List[List[List[List[float]]]]:
+    """Polygons (each a list of rings, outer first) of a Polygon/MultiPolygon, Feature or bare geometry."""
+    if isinstance(geojson, str):
+        geojson = json.loads(geojson)
+    if not isinstance(geojson, dict):
+        raise ValueError("boundary must be a GeoJSON object")
+    if geojson.get("type") == "Feature":
+        geojson = geojson.get("geometry") or {}
+    kind, coords = geojson.get("type"), geojson.get("coordinates")
+    if kind == "Polygon":
+        polygons = [coords]
+    elif kind == "MultiPolygon":
+        polygons = coords
+    else:
+        raise ValueError("boundary must be a GeoJSON Polygon or MultiPolygon")
+    out = []
+    for poly in polygons or []:
+        rings = []
+        for ring in poly or []:
+            if len(ring) < 4:
+                raise ValueError("each polygon ring needs at least 4 positions")
+            rings.append([[float(p[0]), float(p[1])] for p in ring])
+        if rings:
+            out.append(rings)
+    if not out:
+        raise ValueError("boundary has no coordinates")
+    return out
+
+
+def _ring_area(r: np.ndarray) -> float:
+    nxt = np.roll(r, -1, axis=0)
+    return abs(float(np.sum(r[:, 0] * nxt[:, 1] - nxt[:, 0] * r[:, 1]))) / 2
+
+
+def _edges(polygons) -> Tuple[np.ndarray, float]:
+    """(E, 4) array of x1, y1, x2, y2 for every ring edge, and the enclosed area (holes subtracted)."""
+    parts = []
+    area = 0.0
+    for rings in polygons:
+        for k, ring in enumerate(rings):
+            r = np.asarray(ring, dtype=float)
+            parts.append(np.hstack([r, np.roll(r, -1, axis=0)]))
+            area += _ring_area(r) if k == 0 else -_ring_area(r)
+    return np.vstack(parts), area
+
+
+def _inside(edges: np.ndarray, pts: np.ndarray) -> np.ndarray:
+    """Even-odd rule for every point against all edges at once."""
+    x1, y1, x2, y2 = (edges[:, k][None, :] for k in range(4))
+    px, py = pts[:, 0][:, None], pts[:, 1][:, None]
+    crosses = (y1 > py) != (y2 > py)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_at = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+    return (np.count_nonzero(crosses & (px < x_at), axis=1) % 2) == 1
+
+
+def _geometry(camp_id: int, boundary: str) -> Tuple[np.ndarray, float]:
+    hit = _parsed.get(camp_id)
+    if hit is not None and hit[0] == boundary:
+        return hit[1], hit[2]
+    edges, area = _edges(_polygons(boundary))
+    _parsed[camp_id] = (boundary, edges, area)
+    return edges, area
+
+
+# ---------- R-tree ----------
+def _is_sqlite(db: Session) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def ensure_rtree(db: Session) -> None:
+    """
+    Create camp_rtree if missing (e.g. a database made by create_all) and fill it from camps.
+    This runs and commits on its own connection, so it neither depends on nor
+    commits the caller's session (a read-only request never commits its own).
+    """
+    if not _is_sqlite(db):
+        return
+    engine = db.get_bind()
+    url = str(engine.url)
+    if url in _rtree_ready:
+        return
+    with _lock:
+        if url in _rtree_ready:
+            return
+        with engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"), {"n": RTREE}
+            ).first()
+            if not exists:
+                conn.execute(text(f"CREATE VIRTUAL TABLE {RTREE} USING rtree(id, min_lon, max_lon, min_lat, max_lat)"))
+                conn.execute(text(
+                    f"INSERT INTO {RTREE} (id, min_lon, max_lon, min_lat, max_lat) "
+                    "SELECT id, min_lon, max_lon, min_lat, max_lat FROM camps WHERE boundary IS NOT NULL"
+                ))
+        _rtree_ready.add(url)
+
+
+def set_boundary(db: Session, camp: Camp, geojson) -> None:
+    """Validate and store a boundary (None clears it), keeping the bbox and R-tree in step. Does not commit."""
+    ensure_rtree(db)
+    if geojson is None:
+        camp.boundary = None
+        camp.min_lon = camp.min_lat = camp.max_lon = camp.max_lat = None
+        drop_boundary(db, camp.id)
+        return
+    polygons = _polygons(geojson)
+    pts = np.asarray([p for rings in polygons for ring in rings for p in ring])
+    lon_ok = (pts[:, 0] >= -180) & (pts[:, 0] <= 180)
+    lat_ok = (pts[:, 1] >= -90) & (pts[:, 1] <= 90)
+    if not (lon_ok & lat_ok).all():
+        raise ValueError("coordinates must be [lon, lat] in degrees")
+    camp.boundary = json.dumps(geojson if not isinstance(geojson, str) else json.loads(geojson))
+    camp.min_lon, camp.min_lat = (float(v) for v in pts.min(axis=0))
+    camp.max_lon, camp.max_lat = (float(v) for v in pts.max(axis=0))
+    if _is_sqlite(db):
+        db.execute(
+            text(f"INSERT OR REPLACE INTO {RTREE} (id, min_lon, max_lon, min_lat, max_lat) VALUES (:id, :a, :b, :c, :d)"),
+            {"id": camp.id, "a": camp.min_lon, "b": camp.max_lon, "c": camp.min_lat, "d": camp.max_lat},
+        )
+
+
+def drop_boundary(db: Session, camp_id: int) -> None:
+    """Remove a camp from the R-tree (on delete or when its boundary is cleared)."""
+    _parsed.pop(camp_id, None)
+    if _is_sqlite(db):
+        ensure_rtree(db)
+        db.execute(text(f"DELETE FROM {RTREE} WHERE id = :id"), {"id": camp_id})
+
+
+# ---------- lookup ----------
+def _candidates_rtree(db: Session, pts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(point index, camp id) pairs whose camp box contains the point, via a temp-table join on the R-tree."""
+    db.execute(text("CREATE TEMP TABLE IF NOT EXISTS locate_points (idx INTEGER PRIMARY KEY, lon REAL, lat REAL)"))
+    db.execute(text("DELETE FROM locate_points"))
+    db.execute(
+        text("INSERT INTO locate_points (idx, lon, lat) VALUES (:i, :x, :y)"),
+        [{"i": i, "x": float(x), "y": float(y)} for i, (x, y) in enumerate(pts)],
+    )
+    pairs = db.execute(text(
+        f"SELECT p.idx, r.id FROM locate_points p JOIN {RTREE} r "
+        "ON r.min_lon <= p.lon AND r.max_lon >= p.lon AND r.min_lat <= p.lat AND r.max_lat >= p.lat"
+    )).all()
+    db.execute(text("DELETE FROM locate_points"))
+    if not pairs:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    idx, ids = zip(*pairs)
+    return np.asarray(idx, dtype=int), np.asarray(ids, dtype=int)
+
+
+def _candidates_numpy(db: Session, pts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    rows = db.execute(
+        select(Camp.id, Camp.min_lon, Camp.max_lon, Camp.min_lat, Camp.max_lat).where(Camp.boundary.isnot(None))
+    ).all()
+    if not rows:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    ids, a, b, c, d = (np.asarray(col) for col in zip(*rows))
+    x, y = pts[:, 0][:, None], pts[:, 1][:, None]
+    p, k = np.nonzero((a <= x) & (x <= b) & (c <= y) & (y <= d))
+    return p, ids[k].astype(int)
+
+
+def locate(db: Session, points) -> List[Optional[int]]:
+    """Camp id containing each [lon, lat] point, or None."""
+    pts = np.asarray(points, dtype=float).reshape(-1, 2)
+    result = np.full(len(pts), -1, dtype=int)
+    if len(pts) == 0:
+        return []
+    if _is_sqlite(db):
+        ensure_rtree(db)
+        idx, ids = _candidates_rtree(db, pts)
+    else:
+        idx, ids = _candidates_numpy(db, pts)
+    if idx.size == 0:
+        return [None] * len(pts)
+
+    camp_ids = np.unique(ids)
+    boundaries = dict(db.execute(select(Camp.id, Camp.boundary).where(Camp.id.in_(camp_ids.tolist()))).all())
+    best_area = np.full(len(pts), np.inf)
+    for cid in camp_ids:
+        boundary = boundaries.get(int(cid))
+        if not boundary:
+            continue
+        edges, area = _geometry(int(cid), boundary)
+        cand = idx[ids == cid]
+        hit = cand[_inside(edges, pts[cand])]
+        better = hit[area < best_area[hit]]
+        result[better] = cid
+        best_area[better] = area
+    return [int(c) if c >= 0 else None for c in result]
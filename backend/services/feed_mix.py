@@ -0,0 +1,119 @@
+"""
+Feed mixing.
+
+execute_mixes() runs any number of mixes in one transaction: every feed
+involved is loaded (and row-locked where the database supports it) in a single
+query, stock is checked for the whole batch up front, and the component /
+output events are written with output_feed_id and components set, so nothing
+downstream has to parse the link back out of the reason text.
+"""
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.models.feed import Feed, FeedEvent, FeedRecipe
+from backend.services.stock import InsufficientStock, post_movement
+
+
+class MixError(ValueError):
+    """A mix cannot be executed; `status` is the HTTP status the router should answer with."""
+
+    def __init__(self, detail, status: int = 400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+@dataclass
+class Mix:
+    output_feed_id: int
+    output_amount: float
+    components: Dict[int, float]
+    date: datetime
+    reason: str = ""
+    recipe_id: Optional[int] = None
+    events: List[FeedEvent] = field(default_factory=list)
+
+
+def mix_from_recipe(recipe: FeedRecipe, *, batches: float, date: datetime, reason: Optional[str] = None) -> Mix:
+    components: Dict[int, float] = {}
+    for c in recipe.components:
+        components[c.feed_id] = components.get(c.feed_id, 0.0) + c.amount * batches
+    return Mix(
+        output_feed_id=recipe.output_feed_id,
+        output_amount=recipe.output_amount * batches,
+        components=components,
+        date=date,
+        reason=reason or f"{recipe.name} x{batches:g}",
+        recipe_id=recipe.id,
+    )
+
+
+def execute_mixes(db: Session, mixes: List[Mix], *, allow_negative: bool = False) -> Dict[int, Feed]:
+    """
+    Apply `mixes` in order. Raises MixError if a feed is missing or, unless
+    allow_negative, a component would go below zero at its point in the batch;
+    the caller rolls back, as events may already be flushed. Returns the loaded
+    feeds by id. Does not commit.
+    """
+    if not mixes:
+        return {}
+    ids = set()
+    for m in mixes:
+        if not m.components:
+            raise MixError("A mix needs at least one component")
+        if m.output_feed_id in m.components:
+            raise MixError(f"Feed {m.output_feed_id} cannot be both a component and the output of a mix")
+        ids.add(m.output_feed_id)
+        ids.update(m.components)
+
+    feeds = {f.id: f for f in db.execute(select(Feed).where(Feed.id.in_(ids)).with_for_update()).scalars()}
+    missing = sorted(ids - feeds.keys())
+    if missing:
+        raise MixError(f"Feed(s) not found: {', '.join(map(str, missing))}", status=404)
+
+    # check the whole batch before writing anything; outputs of earlier mixes can feed later ones
+    available = {fid: float(f.current_stock or 0.0) for fid, f in feeds.items()}
+    short = []
+    for m in mixes:
+        for fid, amount in m.components.items():
+            available[fid] -= amount
+            if available[fid] < 0 and not allow_negative:
+                short.append({"feed_id": fid, "name": feeds[fid].name, "short_by": round(-available[fid], 6)})
+        available[m.output_feed_id] += m.output_amount
+    if short:
+        raise MixError({"message": "Insufficient stock", "items": short})
+
+    for m in mixes:
+        payload = json.dumps({str(fid): amount for fid, amount in m.components.items()})
+        output = feeds[m.output_feed_id]
+        for fid, amount in m.components.items():
+            m.events.append(FeedEvent(
+                feed_id=fid, event_type="mix", amount=amount, date=m.date,
+                reason=f"Used in mix for {output.name}",
+                output_feed_id=m.output_feed_id, components=payload,
+            ))
+        m.events.append(FeedEvent(
+            feed_id=m.output_feed_id, event_type="in", amount=m.output_amount, date=m.date,
+            reason=m.reason or "Feed mix", components=payload,
+        ))
+        db.add_all(m.events)
+    db.flush()
+
+    # the guard repeats the check inside each UPDATE, so a concurrent draw cannot slip in between
+    for m in mixes:
+        for e in m.events:
+            delta = e.amount if e.event_type == "in" else -e.amount
+            try:
+                post_movement(
+                    db, category="feed", item=feeds[e.feed_id], delta=delta, event_date=e.date,
+                    reason=e.reason, ref_type="feed_event", ref_id=e.id,
+                    reject_negative=not allow_negative,
+                )
+            except InsufficientStock:
+                raise MixError({"message": "Insufficient stock", "items": [{"feed_id": e.feed_id, "name": feeds[e.feed_id].name}]})
+    return feeds
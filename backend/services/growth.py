@@ -0,0 +1,278 @@
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from backend.models.animal import Animal
+from backend.models.weight import Weight
+from backend.services import growth_cache
+
+GOMPERTZ_MIN_POINTS = 4     # fewer readings than this fall back to the linear fit
+GOMPERTZ_BATCH = 2048       # animals per vectorised Levenberg-Marquardt batch
+GOMPERTZ_ITERATIONS = 30
+
+
+# ---------- loading ----------
+def _day_number(dialect: str):
+    """SQL expression returning Weight.date as a proleptic ordinal (date.toordinal())."""
+    if dialect == "sqlite":
+        return sa.func.julianday(Weight.date) - 1721424.5
+    if dialect == "postgresql":
+        return sa.cast(Weight.date - sa.cast(sa.literal("0001-01-01"), sa.Date), sa.Integer) + 1
+    return None
+
+
+def load_series(
+    db: Session,
+    *,
+    group_id: Optional[int] = None,
+    camp_id: Optional[int] = None,
+    animal_ids: Optional[Iterable[int]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Loads weight readings for live animals column-wise, sorted by (animal, day).
+    Dates are converted in SQL so the rows are plain numbers and go straight into NumPy.
+    Returns arrays: animal_id, day (ordinal), weight, group_id, camp_id (-1 = none).
+    """
+    day = _day_number(db.get_bind().dialect.name)
+    q = (
+        sa.select(
+            Weight.animal_id,
+            day if day is not None else Weight.date,
+            Weight.weight,
+            sa.func.coalesce(Animal.group_id, -1),
+            sa.func.coalesce(Animal.camp_id, -1),
+        )
+        .join(Animal, Weight.animal_id == Animal.id)
+        .where(Animal.deceased == False)  # noqa: E712
+        .order_by(Weight.animal_id, Weight.date, Weight.id)
+    )
+    if group_id is not None:
+        q = q.where(Animal.group_id == group_id)
+    if camp_id is not None:
+        q = q.where(Animal.camp_id == camp_id)
+    if animal_ids is not None:
+        q = q.where(Weight.animal_id.in_(list(animal_ids)))
+
+    rows = db.execute(q).all()
+    # transpose to columns first: np.array() over Row objects is ~30x slower
+    cols = list(zip(*rows)) or [()] * 5
+    days = cols[1] if day is not None else [d.toordinal() for d in cols[1]]
+    return {
+        "animal_id": np.asarray(cols[0], dtype=np.int64),
+        "day": np.asarray(days, dtype=np.float64),
+        "weight": np.asarray(cols[2], dtype=np.float64),
+        "group_id": np.asarray(cols[3], dtype=np.int64),
+        "camp_id": np.asarray(cols[4], dtype=np.int64),
+    }
+
+
+# ---------- fitting ----------
+def _segments(animal_id: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start offsets and lengths of each animal's run in a sorted animal_id array."""
+    if animal_id.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, animal_id[1:] != animal_id[:-1]])
+    counts = np.diff(np.r_[starts, animal_id.size])
+    return starts, counts
+
+
+def fit_linear(t: np.ndarray, y: np.ndarray, starts: np.ndarray, counts: np.ndarray):
+    """
+    Least-squares line per animal using segment sums (no Python loop).
+    `t` is days since each animal's first reading. Returns (slope, intercept);
+    slope is NaN for animals with a single reading or a single day.
+    """
+    n = counts.astype(np.float64)
+    sx = np.add.reduceat(t, starts)
+    sy = np.add.reduceat(y, starts)
+    sxx = np.add.reduceat(t * t, starts)
+    sxy = np.add.reduceat(t * y, starts)
+    denom = n * sxx - sx * sx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(denom > 0, (n * sxy - sx * sy) / denom, np.nan)
+        intercept = np.where(denom > 0, (sy - slope * sx) / n, sy / n)
+    return slope, intercept
+
+
+def _gompertz(params: np.ndarray, t: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    A, b, k = params[:, 0:1], params[:, 1:2], params[:, 2:3]
+    e = np.exp(-k * t)
+    return A * np.exp(-b * e), e
+
+
+def fit_gompertz(t: np.ndarray, y: np.ndarray, starts: np.ndarray, counts: np.ndarray, slope: np.ndarray):
+    """
+    W(t) = A * exp(-b * exp(-k t)), fitted per animal with a batched
+    Levenberg-Marquardt: animals are padded into (batch, max_points) matrices
+    and every iteration solves all 3x3 normal equations at once.
+    Returns an (n_animals, 3) array, NaN rows where the fit was not attempted.
+    """
+    out = np.full((counts.size, 3), np.nan)
+    eligible = np.flatnonzero(counts >= GOMPERTZ_MIN_POINTS)
+    # similar lengths in the same batch keep padding small
+    eligible = eligible[np.argsort(counts[eligible], kind="stable")]
+
+    for b0 in range(0, eligible.size, GOMPERTZ_BATCH):
+        idx = eligible[b0:b0 + GOMPERTZ_BATCH]
+        width = int(counts[idx].max())
+        cols = np.arange(width)
+        mask = cols[None, :] < counts[idx][:, None]
+        pos = np.minimum(starts[idx][:, None] + cols[None, :], t.size - 1)
+        T = np.where(mask, t[pos], 0.0)
+        Y = np.where(mask, y[pos], 0.0)
+
+        w0 = np.maximum(Y[:, 0], 1.0)
+        A = np.maximum(Y.max(axis=1) * 1.5, w0 * 1.1)
+        b = np.log(A / w0)
+        k = np.clip(np.nan_to_num(slope[idx], nan=0.1) / (w0 * b), 1e-4, 0.1)
+        p = np.stack([A, b, k], axis=1)
+        lam = np.full(idx.size, 1e-2)
+
+        def _sse(params):
+            f, _ = _gompertz(params, T)
+            return np.where(mask, (Y - f) ** 2, 0.0).sum(axis=1)
+
+        sse = _sse(p)
+        for _ in range(GOMPERTZ_ITERATIONS):
+            f, e = _gompertz(p, T)
+            r = np.where(mask, Y - f, 0.0)
+            J = np.stack([f / p[:, 0:1], -f * e, f * p[:, 1:2] * T * e], axis=2)
+            J = np.where(mask[:, :, None], J, 0.0)
+            JTJ = np.einsum("bni,bnj->bij", J, J)
+            JTr = np.einsum("bni,bn->bi", J, r)
+            diag = np.einsum("bii->bi", JTJ)
+            H = JTJ + lam[:, None, None] * np.eye(3)[None] * (diag[:, :, None] + 1e-9)
+            try:
+                step = np.linalg.solve(H, JTr[:, :, None])[:, :, 0]
+            except np.linalg.LinAlgError:
+                break
+            trial = p + step
+            trial[:, 0] = np.maximum(trial[:, 0], 1.0)
+            trial[:, 1] = np.maximum(trial[:, 1], 1e-6)
+            trial[:, 2] = np.clip(trial[:, 2], 1e-6, 1.0)
+            new_sse = _sse(trial)
+            better = np.isfinite(new_sse) & (new_sse < sse)
+            p = np.where(better[:, None], trial, p)
+            sse = np.where(better, new_sse, sse)
+            lam = np.where(better, lam / 10, lam * 10)
+        out[idx] = p
+    return out
+
+
+def _group_mean(keys: np.ndarray, values: np.ndarray) -> List[dict]:
+    ok = np.isfinite(values)
+    if not ok.any():
+        return []
+    uniq, inv = np.unique(keys[ok], return_inverse=True)
+    sums = np.bincount(inv, weights=values[ok])
+    cnt = np.bincount(inv)
+    return [
+        {"id": (int(k) if k >= 0 else None), "animals": int(c), "adg": round(float(s / c), 3)}
+        for k, s, c in zip(uniq, sums, cnt)
+    ]
+
+
+def compute_growth(
+    db: Session,
+    *,
+    group_id: Optional[int] = None,
+    camp_id: Optional[int] = None,
+    model: str = "linear",
+    target_date: Optional[date] = None,
+) -> dict:
+    """
+    Average daily gain (kg/day) per animal, group and camp, plus the projected
+    weight at `target_date`. model="gompertz" fits a growth curve for animals with
+    enough readings (ADG is then the curve slope at the latest reading) and falls
+    back to the straight line for the rest.
+    """
+    s = load_series(db, group_id=group_id, camp_id=camp_id)
+    starts, counts = _segments(s["animal_id"])
+    if starts.size == 0:
+        return {"model": model, "target_date": target_date.isoformat() if target_date else None,
+                "animals": [], "groups": [], "camps": []}
+
+    first_day = s["day"][starts]
+    t = s["day"] - np.repeat(first_day, counts)
+    y = s["weight"]
+    last = starts + counts - 1
+    t_last = t[last]
+
+    slope, intercept = fit_linear(t, y, starts, counts)
+    adg = slope.copy()
+    t_target = (target_date.toordinal() - first_day) if target_date else None
+    projected = intercept + slope * t_target if target_date else None
+    params = None
+
+    if model == "gompertz":
+        params = fit_gompertz(t, y, starts, counts, slope)
+        fitted = np.isfinite(params[:, 0])
+        if fitted.any():
+            pf = params[fitted]
+            f_last, e_last = _gompertz(pf, t_last[fitted][:, None])
+            adg[fitted] = (f_last * pf[:, 1:2] * pf[:, 2:3] * e_last)[:, 0]
+            if target_date:
+                f_t, _ = _gompertz(pf, t_target[fitted][:, None])
+                projected[fitted] = f_t[:, 0]
+
+    animal_ids = s["animal_id"][starts]
+    groups = s["group_id"][starts]
+    camps = s["camp_id"][starts]
+
+    def _r(v):
+        return round(float(v), 3) if np.isfinite(v) else None
+
+    animals = []
+    for i in range(starts.size):
+        row = {
+            "animal_id": int(animal_ids[i]),
+            "group_id": int(groups[i]) if groups[i] >= 0 else None,
+            "camp_id": int(camps[i]) if camps[i] >= 0 else None,
+            "points": int(counts[i]),
+            "first_date": date.fromordinal(int(first_day[i])).isoformat(),
+            "last_date": date.fromordinal(int(first_day[i] + t_last[i])).isoformat(),
+            "last_weight": _r(y[last[i]]),
+            "adg": _r(adg[i]),
+            "projected_weight": _r(projected[i]) if projected is not None else None,
+        }
+        if params is not None and np.isfinite(params[i, 0]):
+            row["curve"] = {"A": _r(params[i, 0]), "b": _r(params[i, 1]), "k": round(float(params[i, 2]), 6)}
+        animals.append(row)
+
+    return {
+        "model": model,
+        "target_date": target_date.isoformat() if target_date else None,
+        "animals": animals,
+        "groups": [dict(group_id=g.pop("id"), **g) for g in _group_mean(groups, adg)],
+        "camps": [dict(camp_id=c.pop("id"), **c) for c in _group_mean(camps, adg)],
+    }
+
+
+# ---------- cache ----------
+def cached_growth(
+    db: Session,
+    *,
+    group_id: Optional[int] = None,
+    camp_id: Optional[int] = None,
+    model: str = "linear",
+    target_date: Optional[date] = None,
+) -> dict:
+    """
+    compute_growth() memoised per (group, camp, model, target date), per process
+    (see backend.services.growth_cache). Entries remember which groups they
+    cover so invalidate_groups() can drop exactly the results a write affects.
+    """
+    key = (group_id, camp_id, model, target_date)
+    hit = growth_cache.get(key)
+    if hit is not None:
+        return hit
+
+    result = compute_growth(db, group_id=group_id, camp_id=camp_id, model=model, target_date=target_date)
+    covered = {g["group_id"] for g in result["groups"]}
+    if group_id is not None:
+        covered.add(group_id)
+    growth_cache.put(key, covered, result)
+    return result
@@ -0,0 +1,70 @@
+"""
+Result cache for backend.services.growth.
+
+Kept apart from the NumPy code so that the routers which change what a growth
+result covers (weights, group membership and moves, deaths) can invalidate it
+without importing NumPy.
+
+The cache lives in the process: with several uvicorn workers each keeps its
+own, and an invalidation only reaches the worker that served the write. Other
+workers can serve a stale result for up to CACHE_TTL_SECONDS.
+"""
+import threading
+import time
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from backend.models.animal import Animal
+
+CACHE_TTL_SECONDS = 600
+CACHE_MAX_ENTRIES = 64
+
+_cache: Dict[tuple, Tuple[float, frozenset, dict]] = {}
+_cache_lock = threading.Lock()
+cache_stats = {"hits": 0, "misses": 0}     # exported by backend.services.metrics
+
+
+def get(key: tuple) -> Optional[dict]:
+    """The cached result for `key` if it is younger than CACHE_TTL_SECONDS."""
+    now = time.monotonic()
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit and now - hit[0] < CACHE_TTL_SECONDS:
+            cache_stats["hits"] += 1
+            return hit[2]
+        cache_stats["misses"] += 1
+    return None
+
+
+def put(key: tuple, covered: Iterable[Hashable], result: dict) -> None:
+    """Store `result`, remembering the groups it `covered` for invalidate_groups()."""
+    with _cache_lock:
+        if key not in _cache and len(_cache) >= CACHE_MAX_ENTRIES:
+            _cache.pop(min(_cache, key=lambda k: _cache[k][0]))
+        _cache[key] = (time.monotonic(), frozenset(covered), result)
+
+
+def invalidate_groups(group_ids: Iterable[Optional[int]]) -> None:
+    """Drop cached results for these groups (None = animals without a group) and herd-wide results."""
+    groups = set(group_ids)
+    with _cache_lock:
+        for key, (_, covered, _) in list(_cache.items()):
+            group_key, camp_key = key[0], key[1]
+            # herd-wide and per-camp results can gain animals from any group
+            if group_key is None or camp_key is not None or covered & groups:
+                _cache.pop(key, None)
+
+
+def invalidate_animals(db: Session, animal_ids: Iterable[int]) -> None:
+    """Invalidate the cache for the groups these animals belong to."""
+    ids = list(set(animal_ids))
+    if not ids:
+        return
+    groups = set()
+    for i in range(0, len(ids), 500):
+        groups.update(
+            db.execute(sa.select(Animal.group_id).where(Animal.id.in_(ids[i:i + 500])).distinct()).scalars()
+        )
+    invalidate_groups(groups)
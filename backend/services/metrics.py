@@ -0,0 +1,248 @@
+"""
+In-process metrics in Prometheus text format.
+
+Recording is lock-free: every thread writes to its own dict (the event loop
+thread serves all async work, pool threads serve sync endpoints), and the
+shards are only summed when /api/metrics is scraped. A lock is taken once per
+thread, when its shard is registered.
+
+Multiple workers: set METRICS_DIR to a directory shared by the workers. Each
+process then writes its totals to METRICS_DIR/<pid>.json at most every
+METRICS_FLUSH_SECONDS (default 5) and on scrape, and a scrape sums the files
+of all live processes. The file of a worker that has exited is kept as
+retired-<pid>-<mtime>.json and still counted, so the summed counters never go
+backwards when a worker restarts.
+"""
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+# name -> (type, help, buckets)
+METRICS: Dict[str, Tuple[str, str, Optional[tuple]]] = {
+    "http_requests_total": ("counter", "HTTP requests by route and status.", None),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency by route.", LATENCY_BUCKETS),
+    "http_requests_in_flight": ("gauge", "HTTP requests currently being served.", None),
+    "db_pool_checkout_wait_seconds": ("histogram", "Time spent waiting for a pooled DB connection.", WAIT_BUCKETS),
+    "db_sqlite_busy_total": ("counter", "SQLite statements that failed with 'database is locked' after busy_timeout.", None),
+    "cache_requests_total": ("counter", "Cache lookups by cache and result (hit/miss).", None),
+}
+
+METRICS_DIR = os.getenv("METRICS_DIR") or None
+FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+_local = threading.local()
+_shards: List[dict] = []
+_shards_lock = threading.Lock()
+_collectors: List[Callable[[], Iterable[Tuple[str, Labels, float]]]] = []
+_next_flush = 0.0
+
+RETIRED_PREFIX = "retired-"            # retired-<pid>-<mtime>.json: final totals of a worker that has exited
+
+
+def _shard() -> dict:
+    d = getattr(_local, "shard", None)
+    if d is None:
+        d = {}
+        with _shards_lock:
+            _shards.append(d)
+        _local.shard = d
+    return d
+
+
+# ---------- recording ----------
+def inc(name: str, labels: Labels = (), value: float = 1.0) -> None:
+    d = _shard()
+    key = (name, labels)
+    d[key] = d.get(key, 0.0) + value
+
+
+def dec(name: str, labels: Labels = (), value: float = 1.0) -> None:
+    inc(name, labels, -value)
+
+
+def observe(name: str, labels: Labels, value: float) -> None:
+    """Add `value` to histogram `name`; buckets are stored non-cumulative and summed on render."""
+    buckets = METRICS[name][2]
+    d = _shard()
+    i = bisect_left(buckets, value)
+    key = (name, labels, i)                      # i == len(buckets) is the +Inf bucket
+    d[key] = d.get(key, 0.0) + 1
+    key = (name + "_sum", labels)
+    d[key] = d.get(key, 0.0) + value
+
+
+def register_collector(fn: Callable[[], Iterable[Tuple[str, Labels, float]]]) -> None:
+    """`fn` returns (name, labels, value) samples read at snapshot time (e.g. existing cache counters)."""
+    _collectors.append(fn)
+
+
+def _growth_cache_samples():
+    # imported when sampled: growth_cache imports the models, which import backend.db, which imports this module
+    from backend.services.growth_cache import cache_stats
+    return [
+        ("cache_requests_total", (("cache", "growth"), ("result", "hit")), cache_stats["hits"]),
+        ("cache_requests_total", (("cache", "growth"), ("result", "miss")), cache_stats["misses"]),
+    ]
+
+
+# registered here rather than by the cache module, so the series exists before the first growth request
+register_collector(_growth_cache_samples)
+
+
+# ---------- aggregation ----------
+def snapshot() -> Dict[str, float]:
+    """This process's totals, keyed by a JSON-safe string form of (name, labels[, bucket])."""
+    totals: Dict[str, float] = {}
+    with _shards_lock:
+        shards = list(_shards)
+    for d in shards:
+        for key, value in list(d.items()):
+            k = json.dumps([key[0], list(map(list, key[1]))] + list(key[2:]))
+            totals[k] = totals.get(k, 0.0) + value
+    for fn in _collectors:
+        for name, labels, value in fn():
+            k = json.dumps([name, list(map(list, labels))])
+            totals[k] = totals.get(k, 0.0) + value
+    return totals
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def flush(force: bool = False) -> None:
+    """Write this process's snapshot to METRICS_DIR (no-op without it, or if flushed recently)."""
+    global _next_flush
+    if METRICS_DIR is None:
+        return
+    now = time.monotonic()
+    if not force and now < _next_flush:
+        return
+    _next_flush = now + FLUSH_SECONDS
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    _write(os.path.join(METRICS_DIR, f"{os.getpid()}.json"), snapshot())
+
+
+def _read(path: str) -> Optional[Dict[str, float]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write(path: str, data: Dict[str, float]) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _retire(path: str, pid: int) -> Optional[str]:
+    """
+    Keep an exited worker's totals as retired-<pid>-<mtime>.json, so its counts
+    stay in the sums (a counter that goes down reads as a reset). The rename is
+    atomic and the name is derived from the file, so when several workers scrape
+    at once one of them moves it and all of them count it once. The mtime keeps
+    a later worker that reuses the pid from overwriting it.
+    """
+    try:
+        stamp = os.stat(path).st_mtime_ns
+    except OSError:
+        return None                            # retired by another worker since listdir()
+    retired = os.path.join(METRICS_DIR, f"{RETIRED_PREFIX}{pid}-{stamp}.json")
+    try:
+        os.rename(path, retired)
+    except OSError:
+        pass                                   # another worker got there first
+    return retired if os.path.exists(retired) else None
+
+
+def _combined() -> Dict[str, float]:
+    if METRICS_DIR is None:
+        return snapshot()
+    flush(force=True)
+    totals: Dict[str, float] = {}
+    for fname in os.listdir(METRICS_DIR):
+        if not fname.endswith(".json"):
+            continue
+        stem = fname[:-5]
+        path = os.path.join(METRICS_DIR, fname)
+        retired = stem.startswith(RETIRED_PREFIX)
+        if stem.isdigit() and not _alive(int(stem)):
+            path, retired = _retire(path, int(stem)), True
+            if path is None:
+                continue
+        elif not (stem.isdigit() or retired):
+            continue
+        data = _read(path)
+        if data is None:
+            continue
+        for k, v in data.items():
+            if retired and METRICS.get(json.loads(k)[0], ("",))[0] == "gauge":
+                continue                       # nothing is in flight in an exited worker
+            totals[k] = totals.get(k, 0.0) + v
+    return totals
+
+
+# ---------- exposition ----------
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _fmt_value(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf"
+    return repr(int(v)) if float(v).is_integer() else repr(v)
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format 0.0.4."""
+    samples: Dict[str, Dict[tuple, float]] = {}
+    hist: Dict[str, Dict[tuple, Dict[int, float]]] = {}
+    for k, v in _combined().items():
+        parts = json.loads(k)
+        name, labels = parts[0], tuple(tuple(p) for p in parts[1])
+        if len(parts) == 3:
+            hist.setdefault(name, {}).setdefault(labels, {})[parts[2]] = v
+        else:
+            samples.setdefault(name, {})[labels] = samples.get(name, {}).get(labels, 0.0) + v
+
+    lines = []
+    for name, (kind, help_, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind != "histogram":
+            for labels, v in sorted(samples.get(name, {}).items()):
+                lines.append(f"{name}{_fmt_labels(labels)} {_fmt_value(v)}")
+            continue
+        sums = samples.get(name + "_sum", {})
+        for labels, counts in sorted(hist.get(name, {}).items()):
+            running = 0.0
+            for i, le in enumerate(buckets + (math.inf,)):
+                running += counts.get(i, 0.0)
+                lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', _fmt_value(le)),))} {_fmt_value(running)}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {_fmt_value(sums.get(labels, 0.0))}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {_fmt_value(running)}")
+    return "\n".join(lines) + "\n"
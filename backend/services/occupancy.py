@@ -0,0 +1,118 @@
+"""
+Camp occupancy intervals.
+
+camp_occupancy holds one row per stay of a group in a camp, derived from
+group_movement_events: a move to camp C at time t opens [t, next move of that
+group) in C. Rows are maintained by record_move() whenever the groups router
+records a movement; rebuild() recreates them from the movement events.
+
+"Who was in camp X on day D" and "grazing days per camp" become
+interval-overlap queries on (camp_id, start_at, end_at).
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from backend.models.group import CampOccupancy, Group, GroupMovementEvent
+
+
+def _intervals(moves) -> List[Dict]:
+    """moves: (id, group_id, to_camp_id, date) ordered by group, date, id."""
+    rows = []
+    for i, (mid, gid, camp_id, at) in enumerate(moves):
+        nxt = moves[i + 1] if i + 1 < len(moves) else None
+        end = nxt[3] if nxt is not None and nxt[1] == gid else None
+        rows.append({"group_id": gid, "camp_id": camp_id, "start_at": at, "end_at": end, "movement_id": mid})
+    return rows
+
+
+def rebuild(db: Session, group_ids: Optional[Iterable[int]] = None) -> int:
+    """Recreate occupancy rows from movement events (all groups, or just `group_ids`). Does not commit."""
+    q = select(GroupMovementEvent.id, GroupMovementEvent.group_id, GroupMovementEvent.to_camp_id, GroupMovementEvent.date)
+    d = delete(CampOccupancy)
+    if group_ids is not None:
+        group_ids = list(group_ids)
+        q = q.where(GroupMovementEvent.group_id.in_(group_ids))
+        d = d.where(CampOccupancy.group_id.in_(group_ids))
+    moves = db.execute(q.order_by(GroupMovementEvent.group_id, GroupMovementEvent.date, GroupMovementEvent.id)).all()
+
+    db.execute(d)
+    rows = _intervals(moves)
+    if rows:
+        db.execute(insert(CampOccupancy), rows)
+    return len(rows)
+
+
+def record_move(db: Session, movement: GroupMovementEvent) -> None:
+    """
+    Update occupancy for a just-flushed movement. The common case (move dated
+    after the group's current stay began) closes the open interval and opens a
+    new one; a backdated move rebuilds that group's intervals. Does not commit.
+    """
+    open_row = db.execute(
+        select(CampOccupancy)
+        .where(CampOccupancy.group_id == movement.group_id)
+        .order_by(CampOccupancy.start_at.desc(), CampOccupancy.id.desc())
+        .limit(1)
+    ).scalar_one_or_none()
+
+    if open_row is not None and (open_row.end_at is not None or open_row.start_at > movement.date):
+        rebuild(db, [movement.group_id])
+        return
+    if open_row is not None:
+        db.execute(update(CampOccupancy).where(CampOccupancy.id == open_row.id).values(end_at=movement.date))
+    db.execute(insert(CampOccupancy).values(
+        group_id=movement.group_id, camp_id=movement.to_camp_id,
+        start_at=movement.date, end_at=None, movement_id=movement.id,
+    ))
+
+
+def camp_occupancy(db: Session, camp_id: int, start: date, end: date) -> Dict:
+    """
+    Stays in `camp_id` overlapping [start, end] (whole days), clipped to the window,
+    with grazing days per stay and in total.
+    """
+    lo = datetime.combine(start, time.min)
+    hi = datetime.combine(end + timedelta(days=1), time.min)
+    now = datetime.utcnow()
+
+    rows = db.execute(
+        select(
+            CampOccupancy.group_id, Group.name, CampOccupancy.start_at, CampOccupancy.end_at,
+        )
+        .outerjoin(Group, Group.id == CampOccupancy.group_id)
+        .where(
+            CampOccupancy.camp_id == camp_id,
+            CampOccupancy.start_at < hi,
+            or_(CampOccupancy.end_at.is_(None), CampOccupancy.end_at > lo),
+        )
+        .order_by(CampOccupancy.start_at)
+    ).all()
+
+    stays = []
+    total = 0.0
+    per_group = defaultdict(float)
+    for group_id, name, s, e in rows:
+        a = max(s, lo)
+        b = min(e or min(now, hi), hi)
+        days = max((b - a).total_seconds(), 0.0) / 86400.0
+        total += days
+        per_group[group_id] += days
+        stays.append({
+            "group_id": group_id,
+            "group_name": name,
+            "start": s,
+            "end": e,
+            "days_in_window": round(days, 2),
+        })
+    return {
+        "camp_id": camp_id,
+        "from": start,
+        "to": end,
+        "grazing_days": round(total, 2),
+        "groups": [{"group_id": g, "days": round(d, 2)} for g, d in per_group.items()],
+        "stays": stays,
+    }
@@ -0,0 +1,193 @@
+"""
+Grazing rotation planner.
+
+Simulates daily pasture cover (kg DM/ha) for every camp over a horizon and
+greedily proposes group moves. All camps are stepped together as NumPy arrays;
+only the (few) groups are looped over per day.
+
+Model, per camp:
+  growth   dC/dt = r * (1 - C / MAX_COVER)          (solved exactly per day)
+           r = BASE_GROWTH, x GREENFEED_FACTOR while greenfeed is young,
+           x FERTILISER_FACTOR for FERTILISER_DAYS after fertilising
+  grazing  C -= head * INTAKE / area_ha              (while a group is in the camp)
+A group leaves when cover drops to RESIDUAL_COVER and goes to the free camp
+with the most cover among those rested >= MIN_REST_DAYS (preferring camps at
+ENTRY_COVER or above).
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from backend.models.animal import Animal
+from backend.models.camp import Camp
+from backend.models.group import Group
+
+HORIZON_DAYS = 90
+MAX_COVER = 3500.0          # kg DM/ha, cover stops increasing here
+ENTRY_COVER = 2800.0        # target pre-grazing cover
+RESIDUAL_COVER = 1500.0     # move the group out at this cover
+BASE_GROWTH = 40.0          # kg DM/ha/day on bare, unfertilised pasture
+GREENFEED_FACTOR = 1.6
+GREENFEED_DAYS = 150        # greenfeed counts as "young" this long after planting
+FERTILISER_FACTOR = 1.3
+FERTILISER_DAYS = 60
+MIN_REST_DAYS = 30
+INTAKE = 12.0               # kg DM/head/day
+DEFAULT_AREA_HA = 5.0       # used for camps without area_ha
+
+
+@dataclass
+class Herd:
+    group_id: int
+    name: str
+    head: int
+    camp: int               # index into the camp arrays
+
+
+def _grow(cover: np.ndarray, rate: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """Exact solution of dC/dt = r (1 - C/MAX) after `days`."""
+    return MAX_COVER - (MAX_COVER - cover) * np.exp(-rate * days / MAX_COVER)
+
+
+def _date_offsets(values, today: date) -> np.ndarray:
+    """Days from `today` to each date (negative = in the past); NaN where missing."""
+    return np.array([(v - today).days if v else np.nan for v in values], dtype=float)
+
+
+def _growth_rates(greenfeed, planted, fertilised, horizon: int) -> np.ndarray:
+    """(horizon, camps) matrix of daily growth rates, built by broadcasting day offsets."""
+    day = np.arange(horizon, dtype=float)[:, None]
+    rate = np.full((horizon, greenfeed.size), BASE_GROWTH)
+    age = day - planted[None, :]
+    young = greenfeed[None, :] & (age >= 0) & (age <= GREENFEED_DAYS)
+    rate = np.where(young, rate * GREENFEED_FACTOR, rate)
+    since = day - fertilised[None, :]
+    boosted = (since >= 0) & (since <= FERTILISER_DAYS)
+    return np.where(boosted, rate * FERTILISER_FACTOR, rate)
+
+
+def load_inputs(db: Session) -> Dict:
+    camps = db.execute(
+        select(
+            Camp.id, Camp.name, Camp.area_ha, Camp.greenfeed, Camp.greenfeed_planting_date,
+            Camp.fertilised_date, Camp.grazed_status, Camp.grazed_out_date,
+        ).order_by(Camp.id)
+    ).all()
+    heads = dict(
+        db.execute(
+            select(Animal.group_id, func.count(Animal.id))
+            .where(Animal.deceased == False, Animal.group_id.isnot(None))  # noqa: E712
+            .group_by(Animal.group_id)
+        ).all()
+    )
+    groups = db.execute(select(Group.id, Group.name, Group.camp_id).order_by(Group.id)).all()
+    return {"camps": camps, "heads": heads, "groups": groups}
+
+
+def plan_rotation(inputs: Dict, *, today: Optional[date] = None, horizon: int = HORIZON_DAYS,
+                  include_series: bool = False) -> Dict:
+    today = today or date.today()
+    camps = inputs["camps"]
+    n = len(camps)
+    if n == 0:
+        return {"start": today, "days": horizon, "moves": [], "camps": [], "unplaced_groups": []}
+    ids, names, area, greenfeed, planted, fertilised, status, grazed_out = zip(*camps)
+    index = {cid: i for i, cid in enumerate(ids)}
+
+    area = np.array([a if a and a > 0 else DEFAULT_AREA_HA for a in area], dtype=float)
+    greenfeed = np.array([bool(g) for g in greenfeed])
+    rates = _growth_rates(greenfeed, _date_offsets(planted, today), _date_offsets(fertilised, today), horizon)
+
+    # starting state from the camp records
+    out_offset = _date_offsets(grazed_out, today)
+    rested = np.where(np.isnan(out_offset), MIN_REST_DAYS, -out_offset)
+    status = np.array([s or "N" for s in status])
+    cover = np.where(status == "Y", RESIDUAL_COVER, ENTRY_COVER)
+    cover = np.where(status == "in_progress", (ENTRY_COVER + RESIDUAL_COVER) / 2, cover)
+    regrow = (status == "Y") & ~np.isnan(out_offset)
+    cover = np.where(regrow, _grow(RESIDUAL_COVER, rates[0], np.maximum(rested, 0)), cover)
+
+    herds: List[Herd] = []
+    unplaced = []
+    for gid, gname, camp_id in inputs["groups"]:
+        head = int(inputs["heads"].get(gid, 0))
+        if head == 0:
+            continue
+        if camp_id in index:
+            herds.append(Herd(gid, gname, head, index[camp_id]))
+        else:
+            unplaced.append({"group_id": gid, "name": gname, "head": head})
+
+    occupants = np.zeros(n, dtype=int)   # groups per camp; two groups may share one
+    for h in herds:
+        occupants[h.camp] += 1
+    rested = np.where(occupants > 0, 0.0, rested)
+
+    series = np.empty((horizon, n)) if include_series else None
+    start_cover = cover.copy()
+    min_cover = cover.copy()
+    ready_day = np.where(cover >= ENTRY_COVER, 0, -1)
+    moves = []
+    for day in range(horizon):
+        demand = np.zeros(n)
+        for h in herds:
+            demand[h.camp] += h.head * INTAKE
+        cover = np.maximum(_grow(cover, rates[day], 1.0) - demand / area, 0.0)
+        rested = np.where(occupants > 0, 0.0, rested + 1)
+        np.minimum(min_cover, cover, out=min_cover)
+        ready_day[(ready_day < 0) & (cover >= ENTRY_COVER)] = day + 1
+        if include_series:
+            series[day] = cover
+
+        for h in sorted(herds, key=lambda h: cover[h.camp]):
+            if cover[h.camp] > RESIDUAL_COVER:
+                continue
+            free = (occupants == 0) & (rested >= MIN_REST_DAYS)
+            if not free.any():
+                continue
+            ready = free & (cover >= ENTRY_COVER)
+            pool = ready if ready.any() else free
+            target = int(np.argmax(np.where(pool, cover, -np.inf)))
+            if cover[target] <= cover[h.camp]:
+                continue
+            moves.append({
+                "date": today + timedelta(days=day + 1),
+                "group_id": h.group_id,
+                "group_name": h.name,
+                "from_camp_id": ids[h.camp],
+                "to_camp_id": ids[target],
+                "entry_cover": round(float(cover[target]), 1),
+                "below_target": bool(cover[target] < ENTRY_COVER),
+            })
+            occupants[h.camp] -= 1
+            rested[h.camp] = 0.0
+            occupants[target] += 1
+            h.camp = target
+
+    out_camps = []
+    for i in range(n):
+        row = {
+            "camp_id": ids[i],
+            "name": names[i],
+            "area_ha": float(area[i]),
+            "cover_start": round(float(start_cover[i]), 1),
+            "cover_end": round(float(cover[i]), 1),
+            "cover_min": round(float(min_cover[i]), 1),
+            "occupied_end": bool(occupants[i]),
+            # first day the camp is at ENTRY_COVER; None if not within the horizon
+            "ready_on": today + timedelta(days=int(ready_day[i])) if ready_day[i] >= 0 else None,
+        }
+        if include_series:
+            row["cover"] = np.round(series[:, i], 1).tolist()
+        out_camps.append(row)
+    return {
+        "start": today,
+        "days": horizon,
+        "moves": moves,
+        "camps": out_camps,
+        "unplaced_groups": unplaced,
+    }
@@ -0,0 +1,239 @@
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from backend.models.feed import Feed
+from backend.models.fertiliser import Fertiliser
+from backend.models.fuel import Fuel
+from backend.models.stock_ledger import StockCheckpoint, StockLedger
+from backend.models.vaccine import Vaccine
+from backend.services.stock_checkpoints import invalidate_after
+
+# ledger category -> item model; all four have an id and a current_stock column
+CATEGORIES = {
+    "vaccine": Vaccine,
+    "feed": Feed,
+    "fertiliser": Fertiliser,
+    "fuel": Fuel,
+}
+
+# URL segment used by the stocks router -> ledger category
+PLURALS = {"vaccines": "vaccine", "feeds": "feed", "fertilisers": "fertiliser", "fuels": "fuel"}
+
+
+def _as_datetime(d) -> datetime:
+    if d is None:
+        return datetime.utcnow()
+    if isinstance(d, datetime):
+        return d
+    if isinstance(d, date):
+        return datetime(d.year, d.month, d.day)
+    return datetime.strptime(str(d)[:10], "%Y-%m-%d")
+
+
+class InsufficientStock(ValueError):
+    """Raised by post_movement(reject_negative=True) when the balance would drop below zero."""
+
+    def __init__(self, category: str, item_id: int, delta: float):
+        super().__init__(f"Insufficient stock for {category} {item_id}")
+        self.category = category
+        self.item_id = item_id
+        self.delta = delta
+
+
+def _apply_delta(db: Session, category: str, item_id: int, delta: float, *, clamp: bool, reject_negative: bool):
+    """
+    Atomically add `delta` to the item's current_stock in the database; returns
+    (applied delta, new balance), or None if the item does not exist.
+    The increment happens inside one UPDATE, so concurrent writers never lose
+    each other's changes whatever the ORM objects in memory say.
+    """
+    model = CATEGORIES[category]
+    stock = func.coalesce(model.current_stock, 0.0)
+    guarded = clamp or reject_negative
+    q = update(model).where(model.id == item_id)
+    if guarded and delta < 0:
+        q = q.where(stock + delta >= 0)
+    q = q.values(current_stock=stock + delta).execution_options(synchronize_session=False)
+
+    if db.get_bind().dialect.update_returning:
+        end = db.execute(q.returning(model.current_stock)).scalar()
+    else:
+        end = db.execute(select(model.current_stock).where(model.id == item_id)).scalar() \
+            if db.execute(q).rowcount else None
+    if end is not None:
+        return delta, float(end)
+
+    exists = db.execute(select(model.id).where(model.id == item_id)).first()
+    if not exists:
+        return None
+    if not clamp:
+        raise InsufficientStock(category, item_id, delta)
+
+    # clamp: take whatever is left, compare-and-set against the value we read
+    for _ in range(10):
+        start = float(db.execute(select(stock).where(model.id == item_id)).scalar())
+        if start + delta >= 0:
+            return _apply_delta(db, category, item_id, delta, clamp=True, reject_negative=False)
+        hit = db.execute(
+            update(model)
+            .where(model.id == item_id, stock == start)
+            .values(current_stock=0.0)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if hit:
+            return -start, 0.0
+    raise InsufficientStock(category, item_id, delta)
+
+
+def post_movement(
+    db: Session,
+    *,
+    category: str,
+    item,
+    delta: float,
+    event_date=None,
+    reason: Optional[str] = None,
+    ref_type: Optional[str] = None,
+    ref_id: Optional[int] = None,
+    clamp: bool = False,
+    reject_negative: bool = False,
+) -> StockLedger:
+    """
+    Apply `delta` to an item's current_stock and append the matching StockLedger row.
+    This is the single path for stock changes, so the ledger always sums to current_stock.
+    `item` is the model instance or its id.
+
+    The change is an in-database `current_stock = current_stock + delta`, so
+    concurrent requests do not overwrite each other; balance_after is the value
+    the UPDATE returned. If clamp=True the balance never goes below zero and the
+    ledger records the delta actually applied; with reject_negative=True an
+    overdraw raises InsufficientStock instead. Checkpoints of this item dated
+    on/after event_date are dropped, so backdated movements are never hidden by
+    a stale checkpoint. Does not commit.
+    """
+    model = CATEGORIES.get(category)
+    if model is None:
+        raise ValueError(f"Unknown stock category '{category}'")
+    item_id = item if isinstance(item, int) else item.id
+
+    applied = _apply_delta(
+        db, category, item_id, float(delta or 0.0), clamp=clamp, reject_negative=reject_negative,
+    )
+    if applied is None:
+        raise ValueError(f"{category} {item_id} not found")
+    actual, end = applied
+    if not isinstance(item, int):
+        # keep the loaded instance in step without marking it dirty
+        set_committed_value(item, "current_stock", end)
+
+    when = _as_datetime(event_date)
+    invalidate_after(db, category=category, item_id=item_id, event_date=when)
+    row = StockLedger(
+        category=category,
+        item_id=item_id,
+        delta=actual,
+        reason=reason,
+        ref_type=ref_type,
+        ref_id=ref_id,
+        event_date=when,
+        balance_after=end,
+    )
+    db.add(row)
+    return row
+
+
+def post_movements(db: Session, *, category: str, item_id: int, movements: List[dict]) -> float:
+    """
+    Bulk form of post_movement for one item: a single atomic UPDATE for the
+    summed delta and one multi-row ledger insert, with balance_after running in
+    list order. Each movement is a dict with delta, event_date, reason,
+    ref_type, ref_id. Returns the new balance. No guards; does not commit.
+    """
+    model = CATEGORIES.get(category)
+    if model is None:
+        raise ValueError(f"Unknown stock category '{category}'")
+    if not movements:
+        return float(db.execute(select(model.current_stock).where(model.id == item_id)).scalar() or 0.0)
+
+    total = sum(float(m["delta"] or 0.0) for m in movements)
+    applied = _apply_delta(db, category, item_id, total, clamp=False, reject_negative=False)
+    if applied is None:
+        raise ValueError(f"{category} {item_id} not found")
+    end = applied[1]
+
+    balance = end - total
+    rows = []
+    for m in movements:
+        balance += float(m["delta"] or 0.0)
+        rows.append({
+            "category": category,
+            "item_id": item_id,
+            "delta": float(m["delta"] or 0.0),
+            "reason": m.get("reason"),
+            "ref_type": m.get("ref_type"),
+            "ref_id": m.get("ref_id"),
+            "event_date": _as_datetime(m.get("event_date")),
+            "balance_after": balance,
+            "created_at": datetime.utcnow(),
+        })
+    invalidate_after(db, category=category, item_id=item_id, event_date=min(r["event_date"] for r in rows))
+    db.execute(insert(StockLedger), rows)
+    return end
+
+
+def set_balance(
+    db: Session,
+    *,
+    category: str,
+    item,
+    balance: float,
+    event_date=None,
+    reason: Optional[str] = "Manual adjustment",
+    ref_type: str = "adjustment",
+) -> Optional[StockLedger]:
+    """Set current_stock to an absolute value, recording the difference as a movement."""
+    model = CATEGORIES[category]
+    current = db.execute(select(model.current_stock).where(model.id == item.id)).scalar()
+    delta = float(balance or 0.0) - float(current or 0.0)
+    if delta == 0:
+        return None
+    return post_movement(
+        db, category=category, item=item, delta=delta,
+        event_date=event_date, reason=reason, ref_type=ref_type,
+    )
+
+
+def open_item(db: Session, *, category: str, item, opening_stock: Optional[float]) -> None:
+    """Record the opening balance of a newly created item (item must be flushed so it has an id)."""
+    item.current_stock = 0.0
+    db.flush()
+    if opening_stock:
+        post_movement(
+            db, category=category, item=item, delta=float(opening_stock),
+            reason="Opening balance", ref_type="opening",
+        )
+
+
+def item_ledger(
+    db: Session,
+    *,
+    category: str,
+    item_id: int,
+    limit: int = 100,
+    before_id: Optional[int] = None,
+) -> List[StockLedger]:
+    """Newest-first movements for one item, paged by ledger id."""
+    q = select(StockLedger).where(StockLedger.category == category, StockLedger.item_id == item_id)
+    if before_id is not None:
+        q = q.where(StockLedger.id < before_id)
+    return db.execute(q.order_by(StockLedger.id.desc()).limit(limit)).scalars().all()
+
+
+def drop_item_ledger(db: Session, *, category: str, item_id: int) -> None:
+    """Remove an item's movements when the item itself is deleted (ids can be reused)."""
+    db.execute(delete(StockLedger).where(StockLedger.category == category, StockLedger.item_id == item_id))
+    db.execute(delete(StockCheckpoint).where(StockCheckpoint.category == category, StockCheckpoint.item_id == item_id))
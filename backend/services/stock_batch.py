@@ -0,0 +1,106 @@
+"""
+Batched stock event ingestion.
+
+apply_events() takes a list of events across all stock categories and, in one
+transaction:
+  1. validates every event and checks all referenced items exist (one query per category)
+  2. inserts the events into their tables with one multi-row INSERT ... RETURNING per table
+  3. applies one atomic UPDATE per item for the summed delta, plus the ledger rows
+Nothing is written unless the whole batch is valid.
+"""
+from collections import defaultdict
+from typing import Dict, List
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from backend.models.feed import FeedEvent
+from backend.models.fertiliser import FertiliserEvent
+from backend.models.fuel import FuelEvent
+from backend.models.vaccine import VaccineEvent, VaccineWasteEvent
+from backend.services.stock import CATEGORIES, post_movements
+
+# (category, event_type) -> (event model, item id column, ledger ref_type, sign)
+TARGETS = {
+    ("vaccine", "in"): (VaccineEvent, "vaccine_id", "vaccine_event", 1),
+    ("vaccine", "out"): (VaccineEvent, "vaccine_id", "vaccine_event", -1),
+    ("vaccine", "waste"): (VaccineWasteEvent, "vaccine_id", "vaccine_waste", -1),
+    ("feed", "in"): (FeedEvent, "feed_id", "feed_event", 1),
+    ("feed", "out"): (FeedEvent, "feed_id", "feed_event", -1),
+    ("fertiliser", "in"): (FertiliserEvent, "fertiliser_id", "fertiliser_event", 1),
+    ("fertiliser", "out"): (FertiliserEvent, "fertiliser_id", "fertiliser_event", -1),
+    ("fuel", "in"): (FuelEvent, "fuel_id", "fuel_event", 1),
+    ("fuel", "out"): (FuelEvent, "fuel_id", "fuel_event", -1),
+}
+
+
+class BatchError(ValueError):
+    """The batch was rejected; `errors` lists {index, detail} for each bad event."""
+
+    def __init__(self, errors: List[Dict]):
+        super().__init__(f"{len(errors)} invalid event(s)")
+        self.errors = errors
+
+
+def validate_events(db: Session, events: List[Dict]) -> None:
+    errors = []
+    wanted = defaultdict(set)
+    for i, e in enumerate(events):
+        if (e["category"], e["event_type"]) not in TARGETS:
+            errors.append({"index": i, "detail": f"'{e['event_type']}' is not a valid {e['category']} event"})
+        elif not e["amount"] or e["amount"] <= 0:
+            errors.append({"index": i, "detail": "amount must be positive"})
+        else:
+            wanted[e["category"]].add(e["item_id"])
+
+    found = {}
+    for cat, ids in wanted.items():
+        model = CATEGORIES[cat]
+        found[cat] = set(db.execute(select(model.id).where(model.id.in_(ids))).scalars())
+    for i, e in enumerate(events):
+        if e["category"] in found and e["item_id"] not in found[e["category"]]:
+            errors.append({"index": i, "detail": f"{e['category']} {e['item_id']} not found"})
+    if errors:
+        raise BatchError(sorted(errors, key=lambda x: x["index"]))
+
+
+def apply_events(db: Session, events: List[Dict]) -> Dict[tuple, float]:
+    """
+    Record `events` (dicts with category, item_id, event_type, amount, date,
+    reason). Returns {(category, item_id): new current_stock}. Does not commit.
+    """
+    validate_events(db, events)
+
+    # group by target table, keeping input order, and insert each group in one statement
+    by_table = defaultdict(list)
+    for i, e in enumerate(events):
+        model, item_col, ref_type, sign = TARGETS[(e["category"], e["event_type"])]
+        row = {item_col: e["item_id"], "amount": e["amount"], "date": e["date"], "reason": e.get("reason") or ""}
+        if model is not VaccineWasteEvent:
+            row["event_type"] = e["event_type"]
+        by_table[model].append((i, row))
+
+    ref_ids = [None] * len(events)
+    for model, rows in by_table.items():
+        ids = db.execute(
+            insert(model).returning(model.id, sort_by_parameter_order=True),
+            [r for _, r in rows],
+        ).scalars().all()
+        for (i, _), new_id in zip(rows, ids):
+            ref_ids[i] = new_id
+
+    per_item = defaultdict(list)
+    for i, e in enumerate(events):
+        _, _, ref_type, sign = TARGETS[(e["category"], e["event_type"])]
+        per_item[(e["category"], e["item_id"])].append({
+            "delta": sign * e["amount"],
+            "event_date": e["date"],
+            "reason": e.get("reason") or ("Waste" if e["event_type"] == "waste" else None),
+            "ref_type": ref_type,
+            "ref_id": ref_ids[i],
+        })
+
+    return {
+        (cat, item_id): post_movements(db, category=cat, item_id=item_id, movements=movements)
+        for (cat, item_id), movements in per_item.items()
+    }
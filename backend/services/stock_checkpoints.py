@@ -0,0 +1,166 @@
+"""
+Point-in-time stock balances.
+
+Balances are answered from the nearest StockCheckpoint at or before the
+requested day plus the ledger movements after it, so the cost does not grow
+with the age of the event tables. Checkpoints are written by
+run_checkpoint_job(), e.g. nightly from cron / Task Scheduler:
+
+    python -m backend.services.stock_checkpoints --period month
+"""
+import argparse
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from backend.models.stock_ledger import StockCheckpoint, StockLedger
+
+
+def _cutoff(day: date) -> datetime:
+    """Exclusive upper bound for movements that count towards the end of `day`."""
+    return datetime.combine(day + timedelta(days=1), time.min)
+
+
+def _month_ends(start: date, end: date) -> List[date]:
+    out = []
+    d = date(start.year, start.month, 1)
+    while d <= end:
+        nxt = date(d.year + (d.month == 12), d.month % 12 + 1, 1)
+        last = nxt - timedelta(days=1)
+        if start <= last <= end:
+            out.append(last)
+        d = nxt
+    return out
+
+
+def balances_as_of(db: Session, *, as_of: date, category: Optional[str] = None) -> Dict[Tuple[str, int], float]:
+    """
+    {(category, item_id): balance at the end of `as_of`} for every item with ledger history.
+    Two set-based queries: latest checkpoint per item, and the ledger tail after it.
+    """
+    cut = _cutoff(as_of)
+
+    latest = select(
+        StockCheckpoint.category, StockCheckpoint.item_id, func.max(StockCheckpoint.cutoff).label("cutoff")
+    ).where(StockCheckpoint.cutoff <= cut)
+    if category:
+        latest = latest.where(StockCheckpoint.category == category)
+    latest = latest.group_by(StockCheckpoint.category, StockCheckpoint.item_id).subquery()
+
+    cp = (
+        select(StockCheckpoint.category, StockCheckpoint.item_id, StockCheckpoint.cutoff, StockCheckpoint.balance)
+        .join(latest, and_(
+            StockCheckpoint.category == latest.c.category,
+            StockCheckpoint.item_id == latest.c.item_id,
+            StockCheckpoint.cutoff == latest.c.cutoff,
+        ))
+        .subquery()
+    )
+
+    out: Dict[Tuple[str, int], float] = {}
+    for cat, item_id, _, balance in db.execute(select(cp)):
+        out[(cat, item_id)] = float(balance)
+
+    tail = (
+        select(StockLedger.category, StockLedger.item_id, func.sum(StockLedger.delta))
+        .outerjoin(cp, and_(cp.c.category == StockLedger.category, cp.c.item_id == StockLedger.item_id))
+        .where(StockLedger.event_date < cut, or_(cp.c.cutoff.is_(None), StockLedger.event_date >= cp.c.cutoff))
+        .group_by(StockLedger.category, StockLedger.item_id)
+    )
+    if category:
+        tail = tail.where(StockLedger.category == category)
+    for cat, item_id, total in db.execute(tail):
+        out[(cat, item_id)] = out.get((cat, item_id), 0.0) + float(total or 0.0)
+    return out
+
+
+def write_checkpoints(db: Session, *, as_of: date) -> int:
+    """Store the end-of-day balances for `as_of` (replacing any existing ones). Does not commit."""
+    balances = balances_as_of(db, as_of=as_of)
+    cut = _cutoff(as_of)
+    db.execute(delete(StockCheckpoint).where(StockCheckpoint.cutoff == cut))
+    rows = [
+        {"category": cat, "item_id": item_id, "as_of": as_of, "cutoff": cut,
+         "balance": bal, "created_at": datetime.utcnow()}
+        for (cat, item_id), bal in balances.items()
+    ]
+    if rows:
+        db.execute(insert(StockCheckpoint), rows)
+    return len(rows)
+
+
+def invalidate_after(db: Session, *, category: str, item_id: int, event_date: datetime) -> None:
+    """A movement dated `event_date` makes every later checkpoint of that item stale."""
+    db.execute(
+        delete(StockCheckpoint).where(
+            StockCheckpoint.category == category,
+            StockCheckpoint.item_id == item_id,
+            StockCheckpoint.cutoff > event_date,
+        )
+    )
+
+
+def run_checkpoint_job(db: Session, *, period: str = "month", until: Optional[date] = None) -> int:
+    """
+    Fill in missing checkpoints up to `until` (default: yesterday), one per
+    month end or one per day, oldest first so each builds on the previous one.
+    A date missing the row of any item with history by then is rewritten whole.
+    Commits after each checkpoint date; returns the number of rows written.
+    """
+    until = until or (date.today() - timedelta(days=1))
+    # first movement per item: a day needs a checkpoint for every item that has history by then
+    first_seen: Dict[Tuple[str, int], datetime] = {}
+    for cat, item_id, first in db.execute(
+        select(StockLedger.category, StockLedger.item_id, func.min(StockLedger.event_date))
+        .group_by(StockLedger.category, StockLedger.item_id)
+    ):
+        if isinstance(first, str):
+            first = datetime.fromisoformat(first)
+        first_seen[(cat, item_id)] = first if isinstance(first, datetime) else datetime.combine(first, time.min)
+    if not first_seen:
+        return 0
+    start = min(first_seen.values()).date()
+
+    # keyed per item, so a day whose checkpoints invalidate_after() removed for one item is rewritten
+    have: Dict[date, set] = {}
+    for cat, item_id, as_of in db.execute(
+        select(StockCheckpoint.category, StockCheckpoint.item_id, StockCheckpoint.as_of)
+    ):
+        have.setdefault(as_of, set()).add((cat, item_id))
+    if period == "day":
+        days = [start + timedelta(days=i) for i in range((until - start).days + 1)]
+    else:
+        days = _month_ends(start, until)
+
+    written = 0
+    for day in days:
+        cut = _cutoff(day)
+        needed = {key for key, first in first_seen.items() if first < cut}
+        if needed <= have.get(day, set()):
+            continue
+        written += write_checkpoints(db, as_of=day)
+        db.commit()
+    return written
+
+
+def main(argv=None) -> None:
+    from backend.db import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Write stock balance checkpoints.")
+    parser.add_argument("--period", choices=("day", "month"), default="month")
+    parser.add_argument("--until", help="last day to checkpoint (YYYY-MM-DD), default yesterday")
+    args = parser.parse_args(argv)
+
+    until = datetime.strptime(args.until, "%Y-%m-%d").date() if args.until else None
+    db = SessionLocal()
+    try:
+        n = run_checkpoint_job(db, period=args.period, until=until)
+    finally:
+        db.close()
+    print(f"wrote {n} checkpoint rows")
+
+
+if __name__ == "__main__":
+    main()
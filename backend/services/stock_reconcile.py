@@ -0,0 +1,146 @@
+"""
+Stocktake reconciliation.
+
+For every stocktake the book value is the ledger balance of that item at the
+stocktake date; variance = recorded_stock - book_stock. All four stocktake
+tables are reconciled in one UNION ALL + ledger join, so a full-farm count is
+a single query however many items it covers.
+
+Optionally the variance is posted back as a ledger movement dated at the
+stocktake (ref_type "<category>_stocktake"), which makes current_stock agree
+with the count carried forward.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import and_, func, literal, select, union_all, update
+from sqlalchemy.orm import Session
+
+from backend.models.feed import FeedStocktakeEvent
+from backend.models.fertiliser import FertiliserStocktakeEvent
+from backend.models.fuel import FuelStocktakeEvent
+from backend.models.stock_ledger import StockLedger
+from backend.models.vaccine import VaccineStocktakeEvent
+from backend.services.stock import CATEGORIES, post_movement
+
+# ledger category -> (stocktake model, item id column name)
+STOCKTAKES = {
+    "vaccine": (VaccineStocktakeEvent, "vaccine_id"),
+    "feed": (FeedStocktakeEvent, "feed_id"),
+    "fertiliser": (FertiliserStocktakeEvent, "fertiliser_id"),
+    "fuel": (FuelStocktakeEvent, "fuel_id"),
+}
+
+# variances smaller than this are rounding, not a miscount
+TOLERANCE = 1e-9
+
+
+def _stocktakes(category: Optional[str], stocktake_ids: Optional[Sequence[int]], since: Optional[datetime]):
+    parts = []
+    for cat, (model, item_col) in STOCKTAKES.items():
+        if category and cat != category:
+            continue
+        q = select(
+            literal(cat).label("category"),
+            model.id.label("stocktake_id"),
+            getattr(model, item_col).label("item_id"),
+            model.date.label("date"),
+            model.recorded_stock.label("recorded_stock"),
+            model.adjustment_posted.label("adjustment_posted"),
+        )
+        if stocktake_ids is not None:
+            q = q.where(model.id.in_(list(stocktake_ids)))
+        if since is not None:
+            q = q.where(model.date >= since)
+        parts.append(q)
+    if not parts:
+        raise ValueError(f"Unknown stock category '{category}'")
+    return (union_all(*parts) if len(parts) > 1 else parts[0]).subquery("st")
+
+
+def reconcile(
+    db: Session,
+    *,
+    category: Optional[str] = None,
+    stocktake_ids: Optional[Sequence[int]] = None,
+    since: Optional[datetime] = None,
+    post_adjustments: bool = False,
+) -> List[Dict]:
+    """
+    Compute book_stock / variance for the selected stocktakes and store them on
+    the stocktake rows. With post_adjustments=True, every stocktake whose
+    variance has not been posted yet gets a ledger adjustment. Does not commit.
+
+    A stocktake's own adjustment is excluded from its book value, so running
+    this again is idempotent.
+    """
+    st = _stocktakes(category, stocktake_ids, since)
+    L = StockLedger
+    own_adjustment = and_(L.ref_type == st.c.category + "_stocktake", L.ref_id == st.c.stocktake_id)
+    q = (
+        select(
+            st.c.category, st.c.stocktake_id, st.c.item_id, st.c.date,
+            st.c.recorded_stock, st.c.adjustment_posted,
+            func.coalesce(func.sum(L.delta), 0.0).label("book"),
+        )
+        .outerjoin(L, and_(
+            L.category == st.c.category,
+            L.item_id == st.c.item_id,
+            L.event_date <= st.c.date,
+            ~own_adjustment,
+        ))
+        .group_by(
+            st.c.category, st.c.stocktake_id, st.c.item_id, st.c.date,
+            st.c.recorded_stock, st.c.adjustment_posted,
+        )
+        .order_by(st.c.category, st.c.item_id, st.c.date, st.c.stocktake_id)
+    )
+    rows = db.execute(q).all()
+
+    items = {}
+    if post_adjustments:
+        wanted = defaultdict(set)
+        for r in rows:
+            if not r.adjustment_posted:
+                wanted[r.category].add(r.item_id)
+        for cat, ids in wanted.items():
+            model = CATEGORIES[cat]
+            for item in db.query(model).filter(model.id.in_(ids)):
+                items[(cat, item.id)] = item
+
+    results = []
+    updates = defaultdict(list)
+    carried = defaultdict(float)   # adjustments posted in this run for earlier stocktakes of the item
+    for r in rows:
+        key = (r.category, r.item_id)
+        book = float(r.book) + carried[key]
+        variance = float(r.recorded_stock) - book
+        posted = bool(r.adjustment_posted)
+        if post_adjustments and not posted and key in items:
+            if abs(variance) > TOLERANCE:
+                post_movement(
+                    db, category=r.category, item=items[key], delta=variance,
+                    event_date=r.date, reason="Stocktake adjustment",
+                    ref_type=f"{r.category}_stocktake", ref_id=r.stocktake_id,
+                )
+                carried[key] += variance
+            posted = True
+
+        updates[r.category].append({
+            "id": r.stocktake_id, "book_stock": book, "variance": variance, "adjustment_posted": posted,
+        })
+        results.append({
+            "category": r.category,
+            "stocktake_id": r.stocktake_id,
+            "item_id": r.item_id,
+            "date": r.date,
+            "recorded_stock": r.recorded_stock,
+            "book_stock": round(book, 6),
+            "variance": round(variance, 6),
+            "adjustment_posted": posted,
+        })
+
+    for cat, values in updates.items():
+        db.execute(update(STOCKTAKES[cat][0]), values)
+    return results
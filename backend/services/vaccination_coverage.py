@@ -0,0 +1,133 @@
+import struct
+from array import array
+from datetime import date, timedelta
+from typing import Iterator, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from backend.models.animal import Animal
+from backend.models.vaccination import Vaccination
+from backend.models.vaccine import Vaccine
+
+EPOCH = date(1970, 1, 1)
+NEVER = -1  # cell value for "never vaccinated" in the last-date matrix
+
+# binary layout: magic, version, mode (0 = bitmap, 1 = dates), n_animals, n_vaccines
+BINARY_HEADER = struct.Struct("<4sBBII")
+BINARY_MAGIC = b"MQCV"
+
+
+class CoverageMatrix:
+    """
+    Column-oriented herd x vaccine matrix.
+    `last_days` is row-major (one row per animal), holding the latest vaccination
+    date as days since 1970-01-01, or NEVER.
+    """
+
+    def __init__(self, *, as_of: date, valid_days: int, animal_ids: List[int], animal_tags: List[Optional[str]],
+                 vaccine_ids: List[int], vaccine_names: List[str], last_days: array):
+        self.as_of = as_of
+        self.valid_days = valid_days
+        self.animal_ids = animal_ids
+        self.animal_tags = animal_tags
+        self.vaccine_ids = vaccine_ids
+        self.vaccine_names = vaccine_names
+        self.last_days = last_days
+
+    @property
+    def cutoff(self) -> int:
+        """Vaccinations on or after this day number count as covered."""
+        return (self.as_of - timedelta(days=self.valid_days) - EPOCH).days
+
+    def bitmap(self) -> bytes:
+        """Covered cells packed 8 per byte, row-major, most significant bit first."""
+        cutoff = self.cutoff
+        out = bytearray((len(self.last_days) + 7) // 8)
+        for i, d in enumerate(self.last_days):
+            if d != NEVER and d >= cutoff:
+                out[i >> 3] |= 0x80 >> (i & 7)
+        return bytes(out)
+
+    def to_binary(self, mode: str) -> bytes:
+        header = BINARY_HEADER.pack(
+            BINARY_MAGIC, 1, 0 if mode == "bitmap" else 1, len(self.animal_ids), len(self.vaccine_ids)
+        )
+        body = array("i", self.animal_ids).tobytes() + array("i", self.vaccine_ids).tobytes()
+        if mode == "bitmap":
+            return header + body + self.bitmap()
+        return header + body + self.last_days.tobytes()
+
+    def iter_csv(self, mode: str) -> Iterator[str]:
+        def _quote(s: Optional[str]) -> str:
+            s = s or ""
+            return '"' + s.replace('"', '""') + '"' if any(ch in s for ch in ',"\n') else s
+
+        yield ",".join(["animal_id", "tag_number"] + [_quote(n) for n in self.vaccine_names]) + "\n"
+        width = len(self.vaccine_ids)
+        cutoff = self.cutoff
+        for r, (animal_id, tag) in enumerate(zip(self.animal_ids, self.animal_tags)):
+            row = self.last_days[r * width:(r + 1) * width]
+            if mode == "bitmap":
+                cells = ["1" if d != NEVER and d >= cutoff else "0" for d in row]
+            else:
+                cells = [(EPOCH + timedelta(days=d)).isoformat() if d != NEVER else "" for d in row]
+            yield ",".join([str(animal_id), _quote(tag)] + cells) + "\n"
+
+
+def build_coverage(
+    db: Session,
+    *,
+    as_of: date,
+    valid_days: int,
+    vaccine_ids: Optional[List[int]] = None,
+    group_id: Optional[int] = None,
+) -> CoverageMatrix:
+    """
+    Builds the matrix for all live animals (optionally one group) against all
+    vaccines (optionally a subset). The cells come from a single
+    GROUP BY (animal_id, vaccine_id) -> MAX(date) query.
+    """
+    animals_q = select(Animal.id, Animal.tag_number).where(Animal.deceased == False)  # noqa: E712
+    if group_id is not None:
+        animals_q = animals_q.where(Animal.group_id == group_id)
+    animals = db.execute(animals_q.order_by(Animal.id)).all()
+
+    vaccines_q = select(Vaccine.id, Vaccine.name)
+    if vaccine_ids:
+        vaccines_q = vaccines_q.where(Vaccine.id.in_(vaccine_ids))
+    vaccines = db.execute(vaccines_q.order_by(Vaccine.id)).all()
+
+    row_of = {a_id: i for i, (a_id, _) in enumerate(animals)}
+    col_of = {v_id: j for j, (v_id, _) in enumerate(vaccines)}
+    width = len(vaccines)
+    last_days = array("i", [NEVER]) * (len(animals) * width)
+
+    agg = (
+        select(Vaccination.animal_id, Vaccination.vaccine_id, func.max(Vaccination.date))
+        .join(Animal, Vaccination.animal_id == Animal.id)
+        .where(Animal.deceased == False, Vaccination.date <= as_of)  # noqa: E712
+        .group_by(Vaccination.animal_id, Vaccination.vaccine_id)
+    )
+    if group_id is not None:
+        agg = agg.where(Animal.group_id == group_id)
+    if vaccine_ids:
+        agg = agg.where(Vaccination.vaccine_id.in_(vaccine_ids))
+
+    for animal_id, vaccine_id, last in db.execute(agg):
+        r, c = row_of.get(animal_id), col_of.get(vaccine_id)
+        if r is None or c is None or last is None:
+            continue
+        if isinstance(last, str):  # SQLite returns MAX() over DATE as text
+            last = date.fromisoformat(last)
+        last_days[r * width + c] = (last - EPOCH).days
+
+    return CoverageMatrix(
+        as_of=as_of,
+        valid_days=valid_days,
+        animal_ids=[a_id for a_id, _ in animals],
+        animal_tags=[tag for _, tag in animals],
+        vaccine_ids=[v_id for v_id, _ in vaccines],
+        vaccine_names=[name for _, name in vaccines],
+        last_days=last_days,
+    )
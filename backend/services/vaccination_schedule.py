@@ -0,0 +1,128 @@
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import and_, delete, insert, or_, select, true, func
+from sqlalchemy.orm import Session
+
+from backend.models.animal import Animal
+from backend.models.vaccination import Vaccination, VaccinationDue
+from backend.models.vaccine import Vaccine
+
+
+def _latest_vaccinations(animal_ids: Optional[List[int]], vaccine_ids: Optional[List[int]]):
+    """
+    Window subquery: one row per (animal_id, vaccine_id) with rn == 1 on the latest dose.
+    """
+    rn = func.row_number().over(
+        partition_by=(Vaccination.animal_id, Vaccination.vaccine_id),
+        order_by=(Vaccination.date.desc(), Vaccination.id.desc()),
+    ).label("rn")
+    q = select(Vaccination.animal_id, Vaccination.vaccine_id, Vaccination.date, rn)
+    if animal_ids is not None:
+        q = q.where(Vaccination.animal_id.in_(animal_ids))
+    if vaccine_ids is not None:
+        q = q.where(Vaccination.vaccine_id.in_(vaccine_ids))
+    return q.subquery("latest")
+
+
+def next_due(
+    *,
+    birth_date: Optional[date],
+    last_date: Optional[date],
+    first_dose_age_days: Optional[int],
+    booster_interval_days: Optional[int],
+):
+    """
+    Returns (due_date, kind) or (None, None) when the vaccine has no further dose due.
+    - never vaccinated: birth_date + first_dose_age_days (needs a birth date)
+    - vaccinated before: last_date + booster_interval_days
+    """
+    if last_date is None:
+        if first_dose_age_days is None or birth_date is None:
+            return None, None
+        return birth_date + timedelta(days=int(first_dose_age_days)), "first_dose"
+    if booster_interval_days is None:
+        return None, None
+    return last_date + timedelta(days=int(booster_interval_days)), "booster"
+
+
+def refresh_due_dates(
+    db: Session,
+    *,
+    animal_ids: Optional[Iterable[int]] = None,
+    vaccine_ids: Optional[Iterable[int]] = None,
+) -> int:
+    """
+    Recomputes the vaccination_due rows for the given animals/vaccines
+    (or the whole herd when both are None) and returns the number of rows written.
+
+    Uses one query: live animals x vaccines that have a scheduling rule,
+    left-joined to the latest vaccination per (animal_id, vaccine_id).
+    Does not commit; callers commit with the rest of their unit of work.
+    """
+    animal_ids = sorted(set(animal_ids)) if animal_ids is not None else None
+    vaccine_ids = sorted(set(vaccine_ids)) if vaccine_ids is not None else None
+
+    latest = _latest_vaccinations(animal_ids, vaccine_ids)
+    q = (
+        select(
+            Animal.id,
+            Animal.birth_date,
+            Vaccine.id,
+            Vaccine.first_dose_age_days,
+            Vaccine.booster_interval_days,
+            latest.c.date,
+        )
+        .select_from(Animal)
+        .join(Vaccine, true())
+        .outerjoin(
+            latest,
+            and_(
+                latest.c.animal_id == Animal.id,
+                latest.c.vaccine_id == Vaccine.id,
+                latest.c.rn == 1,
+            ),
+        )
+        .where(
+            Animal.deceased == False,  # noqa: E712
+            or_(
+                Vaccine.first_dose_age_days.isnot(None),
+                Vaccine.booster_interval_days.isnot(None),
+            ),
+        )
+    )
+    if animal_ids is not None:
+        q = q.where(Animal.id.in_(animal_ids))
+    if vaccine_ids is not None:
+        q = q.where(Vaccine.id.in_(vaccine_ids))
+
+    now = datetime.utcnow()
+    rows = []
+    for animal_id, birth_date, vaccine_id, first_age, booster, last_date in db.execute(q):
+        due, kind = next_due(
+            birth_date=birth_date,
+            last_date=last_date,
+            first_dose_age_days=first_age,
+            booster_interval_days=booster,
+        )
+        if due is None:
+            continue
+        rows.append({
+            "animal_id": animal_id,
+            "vaccine_id": vaccine_id,
+            "last_date": last_date,
+            "due_date": due,
+            "kind": kind,
+            "updated_at": now,
+        })
+
+    # replace the affected slice of the table
+    stale = delete(VaccinationDue)
+    if animal_ids is not None:
+        stale = stale.where(VaccinationDue.animal_id.in_(animal_ids))
+    if vaccine_ids is not None:
+        stale = stale.where(VaccinationDue.vaccine_id.in_(vaccine_ids))
+    db.execute(stale)
+    if rows:
+        db.execute(insert(VaccinationDue), rows)
+    return len(rows)
@@ -0,0 +1,208 @@
+import csv
+import io
+import json
+import math
+from datetime import date, datetime
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from backend.models.animal import Animal
+from backend.models.weight import Weight
+
+BATCH_SIZE = 1000   # rows per tag lookup / INSERT
+UPDATE_CHUNK = 500  # ids per IN (...) when refreshing Animal.current_weight
+
+TAG_COLUMNS = ("tag_number", "tag", "eid", "visual_tag", "animal")
+WEIGHT_COLUMNS = ("weight", "kg", "mass", "weight_kg")
+DATE_COLUMNS = ("date", "weigh_date", "weighed_on", "timestamp")
+
+
+def _pick(row: Dict[str, object], names) -> Optional[str]:
+    for n in names:
+        v = row.get(n)
+        if v not in (None, ""):
+            return str(v).strip()
+    return None
+
+
+def _parse_date(s: Optional[str]) -> Optional[date]:
+    if not s:
+        return None
+    try:
+        return date.fromisoformat(s[:10])
+    except ValueError:
+        pass
+    for fmt in ("%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d"):
+        try:
+            return datetime.strptime(s[:10], fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date '{s}'")
+
+
+def iter_rows(stream: BinaryIO, fmt: str) -> Iterator[Tuple[int, Dict[str, object]]]:
+    """
+    Yields (line_number, row) from a CSV or NDJSON stream without loading it all.
+    Column names are lower-cased so 'Tag', 'TAG' and 'tag' are equivalent.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "ndjson":
+        for line_no, line in enumerate(text, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                yield line_no, {"__error__": "invalid JSON"}
+                continue
+            if not isinstance(obj, dict):
+                yield line_no, {"__error__": "expected a JSON object"}
+                continue
+            yield line_no, {str(k).strip().lower(): v for k, v in obj.items()}
+    else:
+        reader = csv.DictReader(text)
+        for row in reader:
+            # header is line 1, so data starts on line 2
+            yield reader.line_num, {(k or "").strip().lower(): v for k, v in row.items()}
+
+
+def _resolve_tags(db: Session, tags: List[str]) -> Tuple[Dict[str, int], set]:
+    """
+    One set-based lookup for a batch of tags.
+    Returns ({tag: live animal id}, {tags that only match deceased animals}).
+    When a tag is shared, the live animal with the highest id wins.
+    """
+    found: Dict[str, int] = {}
+    deceased = set()
+    rows = db.execute(
+        select(Animal.id, Animal.tag_number, Animal.deceased)
+        .where(Animal.tag_number.in_(tags))
+        .order_by(Animal.id.desc())
+    ).all()
+    for animal_id, tag, is_dead in rows:
+        if is_dead:
+            deceased.add(tag)
+        else:
+            found.setdefault(tag, animal_id)
+    return found, deceased - found.keys()
+
+
+def refresh_current_weights(db: Session, animal_ids) -> int:
+    """
+    Set Animal.current_weight / weight_date from each animal's latest Weight row,
+    as one correlated UPDATE per chunk of ids.
+    """
+    latest = (
+        select(Weight.weight)
+        .where(Weight.animal_id == Animal.id)
+        .order_by(Weight.date.desc(), Weight.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    latest_date = (
+        select(Weight.date)
+        .where(Weight.animal_id == Animal.id)
+        .order_by(Weight.date.desc(), Weight.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    ids = sorted(set(animal_ids))
+    for i in range(0, len(ids), UPDATE_CHUNK):
+        db.execute(
+            update(Animal)
+            .where(Animal.id.in_(ids[i:i + UPDATE_CHUNK]))
+            .values(current_weight=latest, weight_date=latest_date, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+    return len(ids)
+
+
+def import_weigh_session(
+    db: Session,
+    *,
+    stream: BinaryIO,
+    fmt: str = "csv",
+    default_date: Optional[date] = None,
+) -> dict:
+    """
+    Imports a scale-indicator export (CSV or NDJSON rows of tag, weight[, date]).
+
+    Rows are processed in batches of BATCH_SIZE: each batch resolves its new tags
+    with one IN (...) query and inserts its Weight rows with one executemany.
+    Afterwards the touched animals get their current weight from their latest
+    reading. Nothing is committed; unknown tags and bad rows are reported back.
+    """
+    tag_cache: Dict[str, Optional[int]] = {}
+    dead_tags: set = set()
+    rejected: List[dict] = []
+    touched: set = set()
+    inserted = 0
+    total = 0
+    pending: List[Tuple[int, str, float, date]] = []
+
+    def _flush():
+        nonlocal inserted
+        new_tags = sorted({tag for _, tag, _, _ in pending if tag not in tag_cache})
+        if new_tags:
+            found, dead = _resolve_tags(db, new_tags)
+            dead_tags.update(dead)
+            for tag in new_tags:
+                tag_cache[tag] = found.get(tag)
+        rows = []
+        for line_no, tag, kg, day in pending:
+            animal_id = tag_cache.get(tag)
+            if animal_id is None:
+                reason = "animal is deceased" if tag in dead_tags else "unknown tag"
+                rejected.append({"line": line_no, "tag": tag, "reason": reason})
+                continue
+            rows.append({"animal_id": animal_id, "weight": kg, "date": day})
+            touched.add(animal_id)
+        if rows:
+            db.execute(insert(Weight), rows)
+            inserted += len(rows)
+        pending.clear()
+
+    for line_no, row in iter_rows(stream, fmt):
+        total += 1
+        if "__error__" in row:
+            rejected.append({"line": line_no, "tag": None, "reason": row["__error__"]})
+            continue
+        tag = _pick(row, TAG_COLUMNS)
+        if not tag:
+            rejected.append({"line": line_no, "tag": None, "reason": "missing tag"})
+            continue
+        try:
+            kg = float(str(_pick(row, WEIGHT_COLUMNS) or "").replace(",", "."))
+        except ValueError:
+            rejected.append({"line": line_no, "tag": tag, "reason": "invalid weight"})
+            continue
+        if not math.isfinite(kg) or kg <= 0:
+            rejected.append({"line": line_no, "tag": tag, "reason": "weight must be a finite number > 0"})
+            continue
+        try:
+            day = _parse_date(_pick(row, DATE_COLUMNS)) or default_date
+        except ValueError as e:
+            rejected.append({"line": line_no, "tag": tag, "reason": str(e)})
+            continue
+        if day is None:
+            rejected.append({"line": line_no, "tag": tag, "reason": "missing date"})
+            continue
+        pending.append((line_no, tag, kg, day))
+        if len(pending) >= BATCH_SIZE:
+            _flush()
+    if pending:
+        _flush()
+
+    updated = refresh_current_weights(db, touched) if touched else 0
+    rejected.sort(key=lambda r: r["line"])
+    return {
+        "rows": total,
+        "inserted": inserted,
+        "animals_updated": updated,
+        "animal_ids": sorted(touched),
+        "rejected": rejected,
+        "unknown_tags": sorted({r["tag"] for r in rejected if r["reason"] == "unknown tag"}),
+    }
@@ -0,0 +1,134 @@
+"""
+Startup work that used to run as import side effects of backend.main.
+
+Phase timings: backend.main wraps its import and initialisation steps in
+`phase(name)`; `report()` logs them as one line once the app is ready, at
+INFO on uvicorn's "uvicorn.error" logger (the one its default logging config
+prints, next to "Application startup complete"), and they are kept in PHASES.
+
+Schema check (on startup, not import): the database's alembic_version is
+compared with the head revision of backend/migrations, read from the
+migration files rather than through Alembic's script loader (which costs
+more than the rest of startup). SCHEMA_CHECK selects what happens:
+
+- "warn" (default): log a warning when the database is behind or unknown;
+  an empty database is created from the models and stamped at head, and a
+  database missing any of the models' tables stops startup (every request
+  touching them would fail)
+- "strict": the same, but any mismatch stops startup
+- "off": skip it
+
+A database from before Alembic matches the baseline revision, which drops
+and recreates every table, so it is brought up with
+`alembic stamp bdc47f427c94 && alembic upgrade head` (not `stamp head`).
+"""
+import ast
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+log = logging.getLogger("backend.startup")
+server_log = logging.getLogger("uvicorn.error")   # has a handler at INFO under uvicorn
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+VERSIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations", "versions")
+MEDIA_DIRS = ("backend/media", "backend/media/photos", "backend/media/uploads")
+
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "warn").lower()
+BASELINE_REVISION = "bdc47f427c94"
+
+PHASES: List[Tuple[str, float]] = []
+_started = time.perf_counter()
+
+_REVISION = re.compile(r"^(down_revision|revision)\b[^=]*=\s*(.+)$", re.M)
+
+
+@contextmanager
+def phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHASES.append((name, (time.perf_counter() - started) * 1000))
+
+
+def report() -> Dict[str, float]:
+    """Log the phase timings and the total since backend.startup was imported."""
+    total = (time.perf_counter() - _started) * 1000
+    server_log.info("startup %.0f ms (%s)", total, ", ".join(f"{name} {ms:.0f} ms" for name, ms in PHASES))
+    return dict(PHASES, total=total)
+
+
+def ensure_media_dirs() -> None:
+    for d in MEDIA_DIRS:
+        os.makedirs(d, exist_ok=True)
+
+
+# ---------- schema ----------
+def head_revision(versions_dir: str = VERSIONS_DIR) -> Optional[str]:
+    """The single head of the migration graph, or None if there is no single head."""
+    revisions, parents = set(), set()
+    for fname in os.listdir(versions_dir):
+        if not fname.endswith(".py"):
+            continue
+        with open(os.path.join(versions_dir, fname), encoding="utf-8") as f:
+            found = dict((k, ast.literal_eval(v.strip())) for k, v in _REVISION.findall(f.read()))
+        if "revision" not in found:
+            continue
+        revisions.add(found["revision"])
+        down = found.get("down_revision")
+        parents.update(down if isinstance(down, (tuple, list)) else [down] if down else [])
+    heads = revisions - parents
+    return heads.pop() if len(heads) == 1 else None
+
+
+def stamp_head(conn) -> None:
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    cfg = Config(os.path.join(ROOT, "alembic.ini"))
+    cfg.set_main_option("script_location", os.path.join(ROOT, "backend", "migrations"))  # alembic.ini's is cwd-relative
+    script = ScriptDirectory.from_config(cfg)
+    MigrationContext.configure(conn).stamp(script, "head")
+
+
+def check_schema(engine) -> None:
+    """Compare the database revision with the migrations' head (see module docstring)."""
+    if SCHEMA_CHECK == "off":
+        return
+    from sqlalchemy import inspect, text
+
+    from backend.db import Base
+    import backend.models  # noqa: F401  (registers every table on Base.metadata)
+
+    head = head_revision()
+    with engine.begin() as conn:
+        tables = inspect(conn).get_table_names()
+        current = None
+        if "alembic_version" in tables:
+            current = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+        if not tables:
+            Base.metadata.create_all(bind=conn)
+            stamp_head(conn)
+            log.info("created an empty database from the models, stamped at %s", head)
+            return
+
+    missing = sorted(set(Base.metadata.tables) - set(tables))
+    if current == head and not missing:
+        return
+    if current is None:
+        problem = (f"database is not under Alembic (run `alembic stamp {BASELINE_REVISION} && alembic upgrade head`"
+                   " if it predates the migrations)")
+    elif current != head:
+        problem = f"database is at {current}, migrations at {head} (run `alembic upgrade head`)"
+    else:
+        problem = f"database is at {head} but tables are missing"
+    if missing:
+        problem += "; missing tables: " + ", ".join(missing)
+    if SCHEMA_CHECK == "strict" or missing:
+        raise RuntimeError(problem)
+    log.warning(problem)
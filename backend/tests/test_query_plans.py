@@ -0,0 +1,75 @@
+"""
+Every router query, planned against a small generated database: each call in
+backend.bench.plans.CALLS (reads, filters and writes) must succeed and must
+not read a whole table unless ALLOWED_SCANS says the route needs every row.
+
+    python -m pytest backend/tests
+"""
+import re
+from dataclasses import replace
+
+import pytest
+
+from backend.bench.plans import CALLS
+
+# routes that run no query, so have nothing to plan
+NO_QUERIES = {
+    ("GET", "/api/metrics"),
+    ("POST", "/api/animals/upload"),   # generic file upload
+    ("GET", "/api/history"),    # same handler as /api/history/
+    ("GET", "/api/health"),
+}
+
+
+@pytest.fixture(scope="module")
+def app_db(tmp_path_factory):
+    """A generated database (at head) with backend.db and backend.main pointed at it."""
+    root = tmp_path_factory.mktemp("plans")
+    url = f"sqlite:///{root / 'plans.db'}"
+    with pytest.MonkeyPatch.context() as mp:
+        # read when backend.db / backend.main are first imported
+        mp.setenv("DATABASE_URL", url)
+        mp.setenv("API_ONLY", "1")
+        mp.delenv("REQUEST_CAPTURE_DIR", raising=False)
+        mp.chdir(root)     # media directories and uploaded photos land here
+
+        from backend.bench.generate import PRESETS, generate
+        from backend.db import engine, make_engine
+        if str(engine.url) != url:
+            pytest.skip("backend.db was already imported with another DATABASE_URL")
+        target = make_engine(url)
+        generate(target, replace(PRESETS["small"], weights=5000, vaccinations=2000, stock_events=5000), reset=True)
+        target.dispose()
+        yield url
+
+
+@pytest.fixture(scope="module")
+def report(app_db):
+    from backend.bench.plans import check
+    return check(writes=True)
+
+
+@pytest.mark.parametrize("name", [c.name for c in CALLS])
+def test_call_uses_indexes(report, name):
+    result = report[name]
+    assert not result["error"], f"HTTP {result['status']}: {result['error']}"
+    unexpected = [f for f in result["findings"] if f["unexpected"]]
+    assert not unexpected, "\n".join(
+        f"full scan of {', '.join(f['unexpected'])}: {f['statement'][:200]}" for f in unexpected
+    )
+
+
+def test_every_route_is_called(app_db):
+    from backend.main import app
+
+    calls = [(c.method, re.sub(r"\{\w+\}", "1", c.path).split("?")[0]) for c in CALLS]
+    missing = []
+    for path, operations in app.openapi()["paths"].items():
+        pattern = re.compile(re.sub(r"\{\w+\}", "[^/]+", path) + "$")
+        for method in operations:
+            method = method.upper()
+            if (method, path) in NO_QUERIES:
+                continue
+            if not any(m == method and pattern.match(p) for m, p in calls):
+                missing.append(f"{method} {path}")
+    assert not missing, "no call in backend.bench.plans.CALLS for: " + ", ".join(missing)
@@ -40,7 +40,8 @@ def adjust_stock(
 
     # ledger
     ledger = StockLedger(
-        vaccine_id=v.id,
+        category="vaccine",
+        item_id=v.id,
         delta=actual_delta,
         reason=reason,
         ref_type=ref_type,